@@ -0,0 +1,123 @@
+"""
+Benchmark the single-pass scanner against the former eight-pattern search
+and four-pattern substitution on large inputs.
+
+Usage: python benchmarks/bench_scanner.py [--size-mb 50] [--repeat 3]
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import re
+import timeit
+
+from simplebumpversion.core.buffer_api import (
+    apply_edits,
+    find_versions_in_buffer,
+    version_edits,
+)
+from simplebumpversion.core.scanner import best_match
+
+
+def legacy_find_version(content: str) -> str:
+    """find_version_in_file before the scanner, minus the file read"""
+    semantic_patterns = [
+        r'version\s*=\s*["\'](\d+\.\d+\.\d+)["\']',
+        r'VERSION\s*=\s*["\'](\d+\.\d+\.\d+)["\']',
+        r'__version__\s*=\s*["\'](\d+\.\d+\.\d+)["\']',
+        r'"version"\s*:\s*"(\d+\.\d+\.\d+)"',
+    ]
+    flexible_patterns = [
+        r'version\s*=\s*["\']([\w\.\-]+)["\']',
+        r'VERSION\s*=\s*["\']([\w\.\-]+)["\']',
+        r'__version__\s*=\s*["\']([\w\.\-]+)["\']',
+        r'"version"\s*:\s*"([\w\.\-]+)"',
+    ]
+    for pattern in semantic_patterns + flexible_patterns:
+        match = re.search(pattern, content)
+        if match:
+            return match.group(1)
+    return None
+
+
+def legacy_update_version(content: str, old_version: str, new_version: str) -> str:
+    """update_version_in_file before the scanner, minus the file read and write"""
+    patterns = [
+        (
+            f"version\\s*=\\s*[\"']({re.escape(old_version)})[\"']",
+            f'version = "{new_version}"',
+        ),
+        (
+            f"VERSION\\s*=\\s*[\"']({re.escape(old_version)})[\"']",
+            f'VERSION = "{new_version}"',
+        ),
+        (
+            f"__version__\\s*=\\s*[\"']({re.escape(old_version)})[\"']",
+            f'__version__ = "{new_version}"',
+        ),
+        (
+            f'"version"\\s*:\\s*"({re.escape(old_version)})"',
+            f'"version": "{new_version}"',
+        ),
+    ]
+    for pattern, replacement in patterns:
+        content, _ = re.subn(pattern, replacement, content)
+    return content
+
+
+def scanner_find_and_update(content: bytes, new_version: str) -> bytes:
+    matches = find_versions_in_buffer(content)
+    match = best_match(matches)
+    edits = version_edits(content, match.version, new_version, matches=matches)
+    return apply_edits(content, edits)
+
+
+def legacy_find_and_update(content: str, new_version: str) -> str:
+    old_version = legacy_find_version(content)
+    return legacy_update_version(content, old_version, new_version)
+
+
+def make_content(size_mb: int) -> dict:
+    """Synthetic inputs where the version sits at the end of a large file"""
+    filler_line = "x = 'some unrelated line of generated code that is long enough'\n"
+    filler = filler_line * (size_mb * 1024 * 1024 // len(filler_line))
+    return {
+        "json-tail": filler + '"version": "1.2.3"\n',
+        "dunder-tail": filler + '__version__ = "1.2.3"\n',
+        "git-describe-tail": filler + 'version = "v0.9-19-g7e2d"\n',
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scanner benchmark")
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'input':<20}{'legacy (s)':>12}{'scanner (s)':>14}{'speedup':>10}")
+    for name, content in make_content(args.size_mb).items():
+        data = content.encode()
+        assert scanner_find_and_update(data, "2.0.0").endswith(
+            legacy_find_and_update(content, "2.0.0")[-10:].encode()
+        )
+        legacy = min(
+            timeit.repeat(
+                lambda: legacy_find_and_update(content, "2.0.0"),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        scanner = min(
+            timeit.repeat(
+                lambda: scanner_find_and_update(data, "2.0.0"),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        print(f"{name:<20}{legacy:>12.3f}{scanner:>14.3f}{legacy / scanner:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark the "any updates since last tag" check on a synthetic deep-history repo.
+The former check listed `git log <tag>..HEAD` in full; the session-based check
+compares the tagged commit with HEAD.
+
+Usage: python benchmarks/bench_updates.py [--commits 400000]
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import subprocess
+import tempfile
+import time
+
+from fixtures import make_deep_repo
+from simplebumpversion.core.git_session import GitSession
+
+
+def legacy_any_updates(repo: str) -> bool:
+    """if_any_updates before the session layer"""
+    try:
+        tag = (
+            subprocess.check_output(
+                ["git", "describe", "--tags", "--abbrev=0"],
+                cwd=repo,
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except subprocess.CalledProcessError:
+        tag = None
+    log_range = f"{tag}..HEAD" if tag else "HEAD"
+    output = subprocess.check_output(["git", "log", log_range, "--oneline"], cwd=repo)
+    return bool(output.strip())
+
+
+def session_any_updates(repo: str) -> bool:
+    with GitSession(repo) as session:
+        return session.has_commits_since(session.describe(), reachable=True)
+
+
+def timed(func, repo):
+    start = time.perf_counter()
+    result = func(repo)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Any-updates benchmark")
+    parser.add_argument("--commits", type=int, default=400000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    scenarios = {
+        "untagged": dict(tags=0),
+        "tagged-tip": dict(tags=0, tag_tip=True),
+        "tag-10-back": dict(tags=0),
+    }
+    print(f"{'scenario':<14}{'legacy (s)':>12}{'session (s)':>14}")
+    for name, kwargs in scenarios.items():
+        repo = os.path.join(root, name)
+        make_deep_repo(repo, args.commits, **kwargs)
+        if name == "tag-10-back":
+            subprocess.run(["git", "tag", "1.0.0", "HEAD~10"], cwd=repo, check=True)
+        legacy, legacy_time = timed(legacy_any_updates, repo)
+        current, session_time = timed(session_any_updates, repo)
+        assert legacy == current, name
+        print(f"{name:<14}{legacy_time:>12.3f}{session_time:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
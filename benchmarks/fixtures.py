@@ -0,0 +1,112 @@
+"""
+Synthetic fixtures for the benchmarks. Everything is generated locally.
+"""
+
+import os
+import subprocess
+
+COMMITTER = "Bench <bench@example.com>"
+
+
+def make_deep_repo(path: str, commits: int, tags: int = 0, tag_tip: bool = False):
+    """
+    Create a repository with a long linear history through `git fast-import`.
+    Args:
+        path(str): directory to create the repository in
+        commits(int): number of commits on main
+        tags(int): number of lightweight tags spread evenly over the history
+        tag_tip(bool): tag HEAD as well, so there are no commits since the last tag
+    """
+    os.makedirs(path, exist_ok=True)
+    subprocess.run(["git", "init", "-q", "-b", "main", path], check=True)
+    tag_every = commits // tags if tags else 0
+    lines = []
+    for i in range(1, commits + 1):
+        message = f"commit {i}".encode()
+        lines.append(b"commit refs/heads/main\n")
+        lines.append(b"mark :%d\n" % i)
+        lines.append(b"committer %s %d +0000\n" % (COMMITTER.encode(), 1600000000 + i))
+        lines.append(b"data %d\n%s\n" % (len(message), message))
+        if i > 1:
+            lines.append(b"from :%d\n" % (i - 1))
+        if tag_every and i % tag_every == 0:
+            lines.append(b"reset refs/tags/0.%d.0\nfrom :%d\n" % (i // tag_every, i))
+    if tag_tip:
+        lines.append(b"reset refs/tags/9.9.9\nfrom :%d\n" % commits)
+    subprocess.run(
+        ["git", "fast-import", "--quiet"],
+        cwd=path,
+        input=b"".join(lines),
+        check=True,
+    )
+    subprocess.run(["git", "checkout", "-q", "main"], cwd=path, check=True)
+
+
+def make_version_files(path: str, count: int) -> list:
+    """
+    Create count small Python files holding a version, spread over
+    subdirectories of 1000 files each.
+    Args:
+        path(str): directory to create the files in
+        count(int): number of files
+    Returns:
+        list[str]: paths of the created files
+    """
+    files = []
+    for i in range(count):
+        directory = os.path.join(path, f"pkg_{i // 1000:03d}")
+        os.makedirs(directory, exist_ok=True)
+        file_path = os.path.join(directory, f"version_{i}.py")
+        with open(file_path, "w") as f:
+            f.write(f'"""package {i}"""\n\n__version__ = "1.2.3"\n')
+        files.append(file_path)
+    return files
+
+
+def make_lockfile(path: str, size: int):
+    """
+    Create a package-lock.json style file of about size bytes.
+    The top-level version comes first, followed by dependency entries
+    that each carry their own "version" key.
+    Args:
+        path(str): file to create
+        size(int): approximate size in bytes
+    """
+    head = b'{\n  "name": "bench",\n  "version": "1.2.3",\n  "packages": {\n'
+    with open(path, "wb") as f:
+        f.write(head)
+        written = len(head)
+        i = 0
+        while written < size:
+            entry = (
+                b'    "node_modules/dep-%d": {\n'
+                b'      "version": "%d.%d.%d",\n'
+                b'      "resolved": "https://registry.example.com/dep-%d.tgz",\n'
+                b'      "integrity": "sha512-%s"\n'
+                b"    },\n" % (i, i % 7, i % 13, i % 31, i, b"x" * 64)
+            )
+            f.write(entry)
+            written += len(entry)
+            i += 1
+        f.write(b'    "": {}\n  }\n}\n')
+
+
+def make_changelog(path: str, size: int):
+    """
+    Create a changelog of about size bytes in the format written by write_changelog.
+    Args:
+        path(str): file to create
+        size(int): approximate size in bytes
+    """
+    with open(path, "wb") as f:
+        written = 0
+        i = 0
+        while written < size:
+            entry = (
+                b"## 0.%d.0 - 2020-01-01 [ minor ]\n\n"
+                b"- abc%04x feat: change number %d\n"
+                b"- def%04x fix: another change\n\n" % (i, i % 65536, i, i % 65536)
+            )
+            f.write(entry)
+            written += len(entry)
+            i += 1
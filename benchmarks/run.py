@@ -0,0 +1,339 @@
+"""
+Benchmark suite on synthetic fixtures.
+Builds a repository with a deep history and many tags, thousands of version
+files, a large lockfile and a large changelog, then times the file, changelog
+and git helpers and full main() runs. Results are written as JSON so that
+runs can be compared; --compare flags cases that got slower than a baseline.
+
+Usage:
+    python benchmarks/run.py [--scale 0.01] [--fixtures DIR] [--output results.json]
+    python benchmarks/run.py --compare baseline.json [--threshold 0.2]
+
+At --scale 1 the fixtures are: 500k commits with 10k tags, 10k version files,
+a 500MB lockfile and a 50MB changelog. Building them takes a few minutes;
+pass --fixtures to keep them for later runs.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import contextlib
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from fixtures import make_changelog, make_deep_repo, make_lockfile, make_version_files
+from simplebumpversion.core import git_tools
+from simplebumpversion.core.bump_version import (
+    bump_semantic_version,
+    find_version_in_file,
+    update_version_in_file,
+)
+from simplebumpversion.core.change_logger import write_changelog
+from simplebumpversion.main import main as bump_main
+
+RESULTS_FORMAT = 1
+# fixture sizes at --scale 1
+FULL_COMMITS = 500_000
+FULL_TAGS = 10_000
+FULL_VERSION_FILES = 10_000
+FULL_LOCKFILE_BYTES = 500 * 1024 * 1024
+FULL_CHANGELOG_BYTES = 50 * 1024 * 1024
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Bench",
+    "GIT_AUTHOR_EMAIL": "bench@example.com",
+    "GIT_COMMITTER_NAME": "Bench",
+    "GIT_COMMITTER_EMAIL": "bench@example.com",
+}
+
+
+class Fixtures(NamedTuple):
+    repo: str
+    version_files: List[str]
+    small_file: str
+    lockfile: str
+    changelog: str
+
+
+class Case(NamedTuple):
+    name: str
+    func: Callable[[], object]
+    # run before every timed call, not timed itself
+    setup: Optional[Callable[[], object]] = None
+
+
+def build_fixtures(root: str, scale: float) -> Fixtures:
+    """
+    Build the fixtures under root, reusing the ones already there.
+    Args:
+        root(str): fixture directory
+        scale(float): multiplier applied to the full fixture sizes
+    Returns:
+        Fixtures: paths of the fixtures
+    """
+    root = os.path.join(root, f"scale-{scale:g}")
+    repo = os.path.join(root, "repo")
+    files_dir = os.path.join(repo, "packages")
+    lockfile = os.path.join(root, "package-lock.json")
+    changelog = os.path.join(root, "CHANGELOG.md")
+
+    commits = max(10, int(FULL_COMMITS * scale))
+    tags = max(1, int(FULL_TAGS * scale))
+    if not os.path.isdir(os.path.join(repo, ".git")):
+        log(f"building repository: {commits} commits, {tags} tags")
+        # one extra commit so HEAD is past the last tag and there is something to bump
+        make_deep_repo(repo, commits - commits % tags + 1, tags)
+    if not os.path.isdir(files_dir):
+        count = max(10, int(FULL_VERSION_FILES * scale))
+        log(f"building {count} version files")
+        make_version_files(files_dir, count)
+    if not os.path.exists(lockfile):
+        size = max(1 << 20, int(FULL_LOCKFILE_BYTES * scale))
+        log(f"building lockfile: {size >> 20}MB")
+        make_lockfile(lockfile, size)
+    if not os.path.exists(changelog):
+        size = max(1 << 16, int(FULL_CHANGELOG_BYTES * scale))
+        log(f"building changelog: {size >> 10}KB")
+        make_changelog(changelog, size)
+
+    version_files = sorted(
+        os.path.join(directory, name)
+        for directory, _, names in os.walk(files_dir)
+        for name in names
+    )
+    return Fixtures(repo, version_files, version_files[0], lockfile, changelog)
+
+
+def bump_file(file_path: str):
+    current = find_version_in_file(file_path)
+    new = bump_semantic_version(current, patch=True)
+    update_version_in_file(file_path, current, new, False)
+
+
+def quiet(func, *args):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return func(*args)
+
+
+def new_commit():
+    """Add a commit so main() has updates to bump, then start from a cold session"""
+    subprocess.run(
+        ["git", "commit", "-q", "--allow-empty", "-m", "feat: bench"], check=True
+    )
+    git_tools.close_sessions()
+
+
+def define_cases(fixtures: Fixtures) -> List[Case]:
+    counter = iter(range(10**9))
+
+    def quiet_main(argv):
+        return quiet(bump_main, argv)
+
+    def latest_tag():
+        return git_tools.get_latest_git_tag()
+
+    files = fixtures.version_files
+    small = fixtures.small_file
+    return [
+        Case("find_version_in_file/small", lambda: find_version_in_file(small)),
+        Case(
+            "find_version_in_file/lockfile",
+            lambda: find_version_in_file(fixtures.lockfile),
+        ),
+        Case("update_version_in_file/small", lambda: bump_file(small)),
+        Case("update_version_in_file/lockfile", lambda: bump_file(fixtures.lockfile)),
+        Case(
+            "write_changelog/large",
+            lambda: write_changelog(
+                f"1.0.{next(counter)}", fixtures.changelog, "- change", "patch", False
+            ),
+        ),
+        # git helpers start from a cold session, as a fresh CLI invocation does
+        Case(
+            "git_tools.get_git_version",
+            git_tools.get_git_version,
+            git_tools.close_sessions,
+        ),
+        Case("git_tools.get_latest_git_tag", latest_tag, git_tools.close_sessions),
+        Case(
+            "git_tools.get_highest_git_tag",
+            git_tools.get_highest_git_tag,
+            git_tools.close_sessions,
+        ),
+        Case(
+            "git_tools.if_any_updates",
+            git_tools.if_any_updates,
+            git_tools.close_sessions,
+        ),
+        Case(
+            "git_tools.get_commits_since_tag/latest",
+            lambda: git_tools.get_commits_since_tag(latest_tag()),
+            git_tools.close_sessions,
+        ),
+        Case(
+            "git_tools.get_commits_since_tag/all",
+            lambda: git_tools.get_commits_since_tag(None),
+            git_tools.close_sessions,
+        ),
+        Case(
+            "git_tools.iter_commits_since_tag/all",
+            lambda: sum(1 for _ in git_tools.iter_commits_since_tag(None)),
+            git_tools.close_sessions,
+        ),
+        Case(
+            "git_tools.update_git_tag",
+            lambda: quiet(git_tools.update_git_tag, f"bench-{time.time_ns()}"),
+            git_tools.close_sessions,
+        ),
+        Case(
+            "main/dry-run-1-file",
+            lambda: quiet_main([small, "--patch", "--dry-run"]),
+            new_commit,
+        ),
+        Case(
+            "main/dry-run-all-files",
+            lambda: quiet_main([*files, "--patch", "--dry-run"]),
+            new_commit,
+        ),
+        Case(
+            "main/bump-all-files",
+            lambda: quiet_main([*files, "--patch", "--change_msg", "bench"]),
+            new_commit,
+        ),
+        Case(
+            "main/bump-1-file-no-cache",
+            lambda: quiet_main(
+                [
+                    small,
+                    "--patch",
+                    "--no-cache",
+                    "--changelog",
+                    fixtures.changelog,
+                ]
+            ),
+            new_commit,
+        ),
+    ]
+
+
+def time_case(case: Case, repeat: int) -> Dict[str, object]:
+    runs = []
+    for _ in range(repeat):
+        if case.setup is not None:
+            case.setup()
+        start = time.perf_counter()
+        case.func()
+        runs.append(time.perf_counter() - start)
+    return {
+        "runs": runs,
+        "min": min(runs),
+        "median": statistics.median(runs),
+    }
+
+
+def run_cases(
+    cases: List[Case], repeat: int, pattern: Optional[str]
+) -> Dict[str, dict]:
+    results = {}
+    for case in cases:
+        if pattern and pattern not in case.name:
+            continue
+        results[case.name] = time_case(case, repeat)
+        log(f"{case.name:<42}{results[case.name]['median']:>10.4f}s")
+    return results
+
+
+def compare(
+    results: Dict[str, dict], baseline: Dict[str, dict], threshold: float
+) -> List[str]:
+    """
+    Compare the medians of two result sets and print a table.
+    Args:
+        results(dict): results of this run
+        baseline(dict): results to compare against
+        threshold(float): relative slowdown that counts as a regression, 0.2 = 20%
+    Returns:
+        list[str]: names of the cases that regressed
+    """
+    regressions = []
+    print(f"{'case':<42}{'baseline':>10}{'current':>10}{'change':>9}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["median"]
+        after = result["median"]
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<42}{before:>10.4f}{after:>10.4f}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def log(message: str):
+    print(message, file=sys.stderr)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="simplebumpversion benchmark suite")
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="fixture size relative to full scale"
+    )
+    parser.add_argument("--fixtures", help="directory to build or reuse fixtures in")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("-k", dest="pattern", help="only run cases containing this")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="results JSON file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative slowdown reported as a regression (default: 0.2)",
+    )
+    args = parser.parse_args()
+
+    fixtures = build_fixtures(args.fixtures or tempfile.mkdtemp(), args.scale)
+    os.environ.update(GIT_ENV)
+    os.chdir(fixtures.repo)
+    git_version = subprocess.check_output(["git", "--version"], text=True).strip()
+    results = run_cases(define_cases(fixtures), args.repeat, args.pattern)
+    git_tools.close_sessions()
+
+    report = {
+        "format": RESULTS_FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "git": git_version,
+        "scale": args.scale,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            log(f"warning: baseline scale {baseline.get('scale')} != {args.scale}")
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Asyncio API.
+Bumps versions from inside an event loop, e.g. a release service that drives
+many repositories at once. Git runs through `asyncio.create_subprocess_exec`,
+file reads and writes run on the loop's default thread pool, and a semaphore
+caps how many repositories are worked on at the same time, so hundreds of
+bumps share one loop and a bounded number of threads and git processes.
+
+Nothing here depends on the current directory: every call takes the
+repository path, so concurrent bumps of different repositories do not
+interfere. Bumping the same repository twice at the same time is not supported.
+
+    results = await bump_many(
+        [
+            BumpRequest("/srv/repos/api", ["setup.py"]),
+            BumpRequest("/srv/repos/web", ["package.json"], part="minor"),
+        ],
+        concurrency=32,
+    )
+"""
+
+import asyncio
+import os
+import subprocess
+import tempfile
+from typing import List, NamedTuple, Optional, Sequence, Union
+
+from simplebumpversion.core.batch import (
+    PlannedBump,
+    apply_bumps,
+    distinct_versions,
+    plan_bumps,
+)
+from simplebumpversion.core.change_logger import write_changelog
+from simplebumpversion.core.git_session import (
+    GitSession,
+    count_subprocess,
+    ref_transaction,
+    write_object_files,
+)
+from simplebumpversion.core.git_tools import tag_objects
+from simplebumpversion.core.schemes import DEFAULT_SCHEME, make_bumper
+
+# repositories bumped at the same time by bump_many
+DEFAULT_CONCURRENCY = 16
+
+
+class BumpRequest(NamedTuple):
+    """Arguments of one bump, see bump"""
+
+    repo: str
+    files: Sequence[str]
+    part: str = "patch"
+    scheme: str = DEFAULT_SCHEME
+    label: Optional[str] = None
+    change_msg: Optional[str] = None
+    changelog: Optional[str] = "CHANGELOG.md"
+    dry_run: bool = False
+
+
+class BumpResult(NamedTuple):
+    """Outcome of one bump"""
+
+    repo: str
+    # planned changes, one per file; empty if there were no commits since the last tag
+    plans: List[PlannedBump]
+    # tags created, empty on dry runs
+    tags: List[str]
+
+    @property
+    def has_updates(self) -> bool:
+        return bool(self.plans)
+
+
+async def run_git(repo: str, *args: str, stdin: Optional[bytes] = None) -> str:
+    """
+    Run a git command in a repository without blocking the event loop.
+    Args:
+        repo(str): work tree to run in
+        args(str): git arguments, without the leading "git"
+        stdin(bytes|None): input of the command
+    Returns:
+        str: stripped stdout
+    Raises:
+        subprocess.CalledProcessError: git exited with an error
+    """
+    count_subprocess()
+    process = await asyncio.create_subprocess_exec(
+        "git",
+        *args,
+        cwd=repo,
+        stdin=None if stdin is None else asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate(stdin)
+    if process.returncode:
+        raise subprocess.CalledProcessError(
+            process.returncode, ["git", *args], stdout, stderr
+        )
+    return stdout.decode().strip()
+
+
+async def get_latest_tag(repo: str) -> Optional[str]:
+    """
+    Returns:
+        str|None: nearest tag reachable from HEAD, None if there is none
+    """
+    try:
+        return await run_git(repo, "describe", "--tags", "--abbrev=0") or None
+    except subprocess.CalledProcessError:
+        return None
+
+
+async def has_commits_since(repo: str, tag: Optional[str]) -> bool:
+    """
+    Returns:
+        bool: True if HEAD has commits that are not in tag (any commit if tag is None)
+    """
+    log_range = f"{tag}..HEAD" if tag else "HEAD"
+    try:
+        return bool(await run_git(repo, "rev-list", "--max-count=1", log_range))
+    except subprocess.CalledProcessError:
+        # empty repository
+        return False
+
+
+async def get_commits_since(repo: str, tag: Optional[str]) -> Optional[str]:
+    """
+    Returns:
+        str|None: one "<short hash> <subject>" line per commit since tag, newest first
+    """
+    log_range = f"{tag}..HEAD" if tag else "HEAD"
+    return await run_git(repo, "log", log_range, "--format=%h %s") or None
+
+
+async def is_tagged(repo: str, version: str) -> bool:
+    """
+    Returns:
+        bool: True if the version is tagged, with or without "v" prefix
+    """
+    plain = version[1:] if version.startswith("v") else version
+    return bool(await run_git(repo, "tag", "--list", plain, f"v{plain}"))
+
+
+def _stage_tag_objects(repo: str, names: List[str], directory: str) -> bytes:
+    # blocking part of create_tags: HEAD, the tagger and the object files
+    with GitSession(repo) as session:
+        target = session.head()
+        if target is None:
+            raise ValueError("There is no commit to tag")
+        objects = tag_objects(
+            target, [(name, None) for name in names], session.committer_ident()
+        )
+    return write_object_files(directory, objects)
+
+
+async def create_tags(repo: str, names: List[str]) -> None:
+    """
+    Create annotated tags on HEAD, all of them or none, as
+    git_tools.create_git_tags does: the tag objects are written by one
+    `git hash-object` call and the refs are published in one
+    `git update-ref --stdin` transaction.
+    Args:
+        repo(str): work tree of the repository
+        names(list[str]): tag names, "Tag <name>" is the message of each
+    Raises:
+        ValueError: the repository has no commit
+        subprocess.CalledProcessError: git rejected an object or the transaction
+    """
+    loop = asyncio.get_running_loop()
+    with tempfile.TemporaryDirectory(prefix="bump-version-") as directory:
+        paths = await loop.run_in_executor(
+            None, _stage_tag_objects, repo, names, directory
+        )
+        output = await run_git(
+            repo, "hash-object", "-w", "-t", "tag", "--stdin-paths", stdin=paths
+        )
+    refs = [(f"refs/tags/{name}", oid) for name, oid in zip(names, output.split())]
+    await run_git(repo, "update-ref", "--stdin", stdin=ref_transaction(refs))
+
+
+async def bump(
+    repo: str,
+    files: Sequence[str],
+    part: str = "patch",
+    scheme: str = DEFAULT_SCHEME,
+    label: Optional[str] = None,
+    change_msg: Optional[str] = None,
+    changelog: Optional[str] = "CHANGELOG.md",
+    dry_run: bool = False,
+    limiter: Optional[asyncio.Semaphore] = None,
+) -> BumpResult:
+    """
+    Bump the version files of a repository, write the changelog and tag the
+    new version, like the bump command does. Nothing is printed.
+    Args:
+        repo(str): work tree of the repository
+        files(list[str]): version files, relative to repo or absolute
+        part(str): major, minor, patch, prerelease or build
+        scheme(str): version scheme, see schemes.get_scheme
+        label(str|None): pre-release label for "prerelease" bumps
+        change_msg(str|None): changelog message, defaults to the commits since
+            the last tag
+        changelog(str|None): changelog path relative to repo, None to skip the changelog
+        dry_run(bool): plan and report, but change nothing
+        limiter(asyncio.Semaphore|None): held for the whole bump, shared between
+            bumps to cap how many run at the same time
+    Returns:
+        BumpResult: planned changes and created tags, no plans if there were no
+        commits since the last tag
+    Raises:
+        FileNotFoundError: a version file does not exist
+        NoValidVersionStr: no version number found in a file
+        ValueError: a version cannot be bumped, is already tagged or a file
+            could not be updated
+        subprocess.CalledProcessError: a git command failed
+    """
+    args = (repo, files, part, scheme, label, change_msg, changelog, dry_run)
+    if limiter is None:
+        return await _bump(*args)
+    async with limiter:
+        return await _bump(*args)
+
+
+async def _bump(repo, files, part, scheme, label, change_msg, changelog, dry_run):
+    loop = asyncio.get_running_loop()
+    repo = os.path.abspath(repo)
+    tag = await get_latest_tag(repo)
+    if not await has_commits_since(repo, tag):
+        return BumpResult(repo, [], [])
+
+    bumper = make_bumper(part, scheme, label)
+    paths = [os.path.join(repo, file) for file in files]
+    # one worker per repository, concurrency comes from running many repositories
+    plans = await loop.run_in_executor(
+        None, plan_bumps, paths, False, False, False, 1, None, bumper
+    )
+    versions = distinct_versions(plans)
+    tagged = await asyncio.gather(*(is_tagged(repo, version) for version in versions))
+    if any(tagged):
+        already = [version for version, found in zip(versions, tagged) if found]
+        raise ValueError(f"Version {', '.join(already)} is already tagged")
+    if change_msg is None and changelog is not None:
+        change_msg = await get_commits_since(repo, tag)
+
+    failed = await loop.run_in_executor(None, apply_bumps, plans, dry_run, None, False)
+    if failed:
+        raise ValueError(f"Failed to update version in {', '.join(failed)}")
+
+    if change_msg and changelog is not None:
+        for version in versions:
+            await loop.run_in_executor(
+                None,
+                write_changelog,
+                version,
+                os.path.join(repo, changelog),
+                change_msg,
+                part,
+                dry_run,
+            )
+    if dry_run:
+        return BumpResult(repo, plans, [])
+    await create_tags(repo, versions)
+    return BumpResult(repo, plans, versions)
+
+
+async def bump_many(
+    requests: Sequence[BumpRequest], concurrency: int = DEFAULT_CONCURRENCY
+) -> List[Union[BumpResult, BaseException]]:
+    """
+    Bump many repositories concurrently on the running event loop.
+    Args:
+        requests(list[BumpRequest]): one request per repository
+        concurrency(int): repositories worked on at the same time
+    Returns:
+        list[BumpResult|Exception]: result or raised error of each request, in order
+    """
+    limiter = asyncio.Semaphore(max(1, concurrency))
+    return await asyncio.gather(
+        *(bump(*request, limiter=limiter) for request in requests),
+        return_exceptions=True,
+    )
@@ -0,0 +1,316 @@
+"""
+Batch execution mode.
+Repository state is resolved once per invocation, the new versions of all
+target files are worked out in a single planning pass and only then applied.
+This keeps the number of git subprocesses flat no matter how many files are bumped.
+
+Planning reads and scans the files concurrently on a thread pool and builds
+the new contents in memory. Applying stages every file next to its target
+and renames them only after all of them were staged, so a failure never
+leaves some files bumped and others not.
+"""
+
+import os
+from functools import cached_property
+from typing import Callable, List, Optional, Tuple
+
+from simplebumpversion.core import instrumentation
+from simplebumpversion.core.bump_version import (
+    scan_file,
+    find_version_in_large_file,
+    find_version_spans_in_large_file,
+    bump_semantic_version,
+)
+from simplebumpversion.core.file_handler import (
+    is_large_file,
+    stage_content,
+    stage_patched_copy,
+    commit_staged,
+    discard_staged,
+)
+from simplebumpversion.core.buffer_api import apply_edits, version_edits
+from simplebumpversion.core.version_index import VersionIndex, shift_spans
+from simplebumpversion.core.git_tools import (
+    get_latest_git_tag,
+    get_commits_since_tag,
+    if_any_updates,
+)
+
+# upper bound of worker threads used for planning when no job count is given
+DEFAULT_JOBS = 32
+
+
+class RepoState:
+    """Repository state shared by every file of a batch run"""
+
+    def __init__(self, latest_tag: Optional[str], has_updates: bool):
+        self.latest_tag = latest_tag
+        self.has_updates = has_updates
+
+    @cached_property
+    def commits(self) -> Optional[str]:
+        """Commit log since the latest tag, only read from git when needed"""
+        return get_commits_since_tag(self.latest_tag)
+
+
+class PlannedBump:
+    """Version change planned for a single file"""
+
+    def __init__(
+        self,
+        file_path: str,
+        current_version: str,
+        new_version: str,
+        new_content: Optional[bytes] = None,
+        spans: Optional[List[Tuple[int, int]]] = None,
+        kind: Optional[str] = None,
+        span: Optional[Tuple[int, int]] = None,
+    ):
+        self.file_path = file_path
+        self.current_version = current_version
+        self.new_version = new_version
+        # new content built during planning, None for large files which are patched
+        self.new_content = new_content
+        # byte spans of every occurrence of the version; patched directly when
+        # there is no new content (large files and version index hits)
+        self.spans = spans if spans is not None else []
+        # kind and byte span of the reported match, kept for the version index
+        self.kind = kind
+        self.span = span
+
+    def __repr__(self) -> str:
+        return (
+            f"PlannedBump(file_path={self.file_path!r}, "
+            f"current_version={self.current_version!r}, "
+            f"new_version={self.new_version!r})"
+        )
+
+    @property
+    def updated(self) -> bool:
+        return self.new_content is not None or bool(self.spans)
+
+
+def resolve_repo_state() -> RepoState:
+    """
+    Query git once for the latest tag and whether there are commits since.
+    Returns:
+        RepoState: latest tag and update status
+    """
+    return RepoState(get_latest_git_tag(), if_any_updates())
+
+
+def plan_file(
+    file_path: str,
+    is_major: bool,
+    is_minor: bool,
+    is_patch: bool,
+    index: Optional[VersionIndex] = None,
+    bump: Optional[Callable[[str], str]] = None,
+) -> PlannedBump:
+    """
+    Read and scan one file and build its new content in memory.
+    If the file is unchanged since the index saw it, only a small window
+    around the known version offset is read.
+    Args:
+        file_path(str): path to the file containing the version number
+        is_major(bool): bump major version
+        is_minor(bool): bump minor version
+        is_patch(bool): bump patch version
+        index(VersionIndex|None): version-location index to read and update
+        bump(callable|None): maps the current version to the new one, overrides
+            the flags, e.g. schemes.make_bumper("prerelease")
+    Returns:
+        PlannedBump: the planned change, `updated` is False if nothing would change
+    Raises:
+        FileNotFoundError: the file does not exist
+        NoValidVersionStr: no version number found in the file
+        ValueError: the version found cannot be bumped
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Error: File '{file_path}' not found")
+
+    if bump is None:
+
+        def bump(version: str) -> str:
+            return bump_semantic_version(
+                version, major=is_major, minor=is_minor, patch=is_patch
+            )
+
+    hit = index.lookup(file_path) if index is not None else None
+    if hit is not None:
+        new_version = bump(hit.version)
+        return PlannedBump(
+            file_path,
+            hit.version,
+            new_version,
+            spans=hit.spans,
+            kind=hit.kind,
+            span=hit.span,
+        )
+
+    if is_large_file(file_path):
+        current_version = find_version_in_large_file(file_path)
+        new_version = bump(current_version)
+        spans = find_version_spans_in_large_file(file_path, current_version)
+        return PlannedBump(file_path, current_version, new_version, spans=spans)
+
+    content, matches, match = scan_file(file_path)
+    current_version = match.version.decode()
+    new_version = bump(current_version)
+    edits = version_edits(content, current_version, new_version, matches=matches)
+    plan = PlannedBump(
+        file_path,
+        current_version,
+        new_version,
+        apply_edits(content, edits) if edits else None,
+        spans=[(edit.start, edit.end) for edit in edits],
+        kind=match.kind,
+        span=(match.start, match.end),
+    )
+    if index is not None:
+        record_scan(index, file_path, matches, match)
+    return plan
+
+
+def record_scan(
+    index: VersionIndex, file_path: str, matches: list, match
+) -> Tuple[Tuple[int, int], List[Tuple[int, int]]]:
+    """
+    Record the version location found by scan_file in the index.
+    Returns:
+        tuple(tuple(int, int), list[tuple(int, int)]): byte span of the reported
+        match and byte spans of every occurrence of its version
+    """
+    span = (match.start, match.end)
+    spans = [(m.start, m.end) for m in matches if m.version == match.version]
+    index.record(file_path, match.version.decode(), match.kind, span, spans)
+    return span, spans
+
+
+def plan_bumps(
+    files: List[str],
+    is_major: bool,
+    is_minor: bool,
+    is_patch: bool,
+    jobs: Optional[int] = None,
+    index: Optional[VersionIndex] = None,
+    bump: Optional[Callable[[str], str]] = None,
+) -> List[PlannedBump]:
+    """
+    Work out the new version of every file without changing anything.
+    Files are read and scanned concurrently.
+    Args:
+        files(list[str]): paths to the files containing version numbers
+        is_major(bool): bump major version
+        is_minor(bool): bump minor version
+        is_patch(bool): bump patch version
+        jobs(int|None): number of worker threads, defaults to min(32, cpu count + 4)
+        index(VersionIndex|None): version-location index to read and update
+        bump(callable|None): maps the current version to the new one, overrides
+            the flags
+    Returns:
+        list[PlannedBump]: planned version change for each file, in input order
+    Raises:
+        FileNotFoundError: a target file does not exist
+        NoValidVersionStr: no version number found in a file
+        ValueError: the version found cannot be bumped
+    """
+    # a file listed twice is planned and written once
+    files = list(dict.fromkeys(files))
+    if jobs is None:
+        jobs = min(DEFAULT_JOBS, (os.cpu_count() or 1) + 4)
+    jobs = max(1, min(jobs, len(files)))
+    if jobs == 1:
+        return [
+            plan_file(file, is_major, is_minor, is_patch, index, bump) for file in files
+        ]
+    # the thread pool is only imported when there is something to run in parallel
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(plan_file, file, is_major, is_minor, is_patch, index, bump)
+            for file in files
+        ]
+        # the first error in input order is raised, after all workers finished
+        return [future.result() for future in futures]
+
+
+def apply_bumps(
+    plans: List[PlannedBump],
+    is_dry_run: bool,
+    index: Optional[VersionIndex] = None,
+    verbose: bool = True,
+) -> List[str]:
+    """
+    Write the planned versions to their files, all or nothing.
+    Nothing is written if any file could not be updated. Otherwise every
+    new file is staged next to its target, all staged files are synced in
+    one batch and then renamed over their targets. Large files whose version
+    keeps its length are patched in place instead of copied, see
+    file_handler.commit_staged.
+    Args:
+        plans(list[PlannedBump]): output of plan_bumps
+        is_dry_run(bool): only report, do not change the files
+        index(VersionIndex|None): version-location index updated with the new files
+        verbose(bool): print a line per bumped file
+    Returns:
+        list[str]: paths of the files that could not be updated
+    """
+    failed = [plan.file_path for plan in plans if not plan.updated]
+    if failed:
+        return failed
+
+    if not is_dry_run:
+        with instrumentation.span("write"):
+            staged = []
+            patches = []
+            try:
+                for plan in plans:
+                    old = plan.current_version.encode()
+                    new = plan.new_version.encode()
+                    if plan.new_content is not None:
+                        tmp_path = stage_content(plan.file_path, plan.new_content)
+                    elif len(old) == len(new):
+                        patches.append((plan.file_path, plan.spans, old, new))
+                        continue
+                    else:
+                        tmp_path = stage_patched_copy(plan.file_path, plan.spans, new)
+                    staged.append((tmp_path, plan.file_path))
+            except BaseException:
+                discard_staged(staged)
+                raise
+            commit_staged(staged, patches)
+        if index is not None:
+            for plan in plans:
+                record_bumped(index, plan)
+
+    if verbose:
+        for plan in plans:
+            print(
+                f"Version bumped from {plan.current_version} to {plan.new_version}"
+                f" in '{plan.file_path}'"
+            )
+    return []
+
+
+def record_bumped(index: VersionIndex, plan: PlannedBump) -> None:
+    """
+    Store the version location of a file after its bump was written,
+    so the next run finds the new version without scanning.
+    """
+    if plan.span is None or plan.kind is None:
+        index.forget(plan.file_path)
+        return
+    old_length = len(plan.current_version.encode())
+    new_spans = shift_spans(plan.spans, old_length, len(plan.new_version.encode()))
+    new_span = new_spans[plan.spans.index(plan.span)]
+    index.record(plan.file_path, plan.new_version, plan.kind, new_span, new_spans)
+
+
+def distinct_versions(plans: List[PlannedBump]) -> List[str]:
+    """
+    Get the distinct new versions of a plan, in first-seen order.
+    Changelog entries and git tags are created once per version, not once per file.
+    """
+    return list(dict.fromkeys(plan.new_version for plan in plans))
@@ -0,0 +1,127 @@
+"""
+In-memory buffer API.
+Finds and replaces the version of content that is already in memory, e.g. a
+build system that holds the files and pipes them through, without going
+through the disk. Buffers are bytes-like (bytes, bytearray, memoryview, mmap)
+and are never decoded: the version patterns only match ASCII, so the spans are
+byte offsets and UTF-8 content around the version is left exactly as it was,
+newlines included. A memoryview is searched in place, the only copy made is
+the output of apply_edits.
+
+    match = find_version_in_buffer(data, "pyproject.toml")
+    edits = version_edits(data, match.version, b"1.3.0", "pyproject.toml")
+    new_data = apply_edits(data, edits)
+
+The file name picks the structured locator (see locators.py), the generic
+scanner is used without it. find_version_in_file and update_version_in_file
+are wrappers that read and write the whole file as bytes.
+"""
+
+from typing import List, NamedTuple, Optional, Union
+
+from simplebumpversion.core.exceptions import NoValidVersionStr
+from simplebumpversion.core.locators import locate_versions
+from simplebumpversion.core.scanner import VersionMatch, best_match
+
+
+class Edit(NamedTuple):
+    """Bytes in [start, end) of a buffer to replace with replacement"""
+
+    start: int
+    end: int
+    replacement: bytes
+
+
+def _buffer(content):
+    if isinstance(content, str):
+        raise TypeError("Expected a bytes-like buffer, got str")
+    if isinstance(content, memoryview) and (content.ndim != 1 or content.format != "B"):
+        # offsets are in bytes; casting does not copy
+        return content.cast("B")
+    return content
+
+
+def _encoded(version: Union[str, bytes]) -> bytes:
+    return version.encode() if isinstance(version, str) else bytes(version)
+
+
+def find_versions_in_buffer(content, file_name: str = "") -> List[VersionMatch]:
+    """
+    Find every version candidate of a buffer, see locators.locate_versions.
+    Args:
+        content(bytes|bytearray|memoryview|mmap): content of the file
+        file_name(str): name or path of the file the content belongs to
+    Returns:
+        list[VersionMatch]: matches with bytes versions and byte offsets,
+        in the order they appear in the buffer
+    """
+    return locate_versions(file_name, _buffer(content))
+
+
+def find_version_in_buffer(content, file_name: str = "") -> VersionMatch:
+    """
+    Find the version of a buffer, as find_version_in_file does for a file.
+    Args:
+        content(bytes|bytearray|memoryview|mmap): content of the file
+        file_name(str): name or path of the file the content belongs to
+    Returns:
+        VersionMatch: the reported version (bytes) and its byte span
+    Raises:
+        NoValidVersionStr: version number pattern is not found in the buffer
+    """
+    match = best_match(find_versions_in_buffer(content, file_name))
+    if match is None:
+        raise NoValidVersionStr(f"Error: No version found in {file_name or 'buffer'}")
+    return match
+
+
+def version_edits(
+    content,
+    old_version: Union[str, bytes],
+    new_version: Union[str, bytes],
+    file_name: str = "",
+    matches: Optional[List[VersionMatch]] = None,
+) -> List[Edit]:
+    """
+    Work out the edits that replace old_version with new_version.
+    Only version values are replaced, the surrounding key, quotes and spacing are kept.
+    Args:
+        content(bytes|bytearray|memoryview|mmap): content of the file
+        old_version(str|bytes): version to replace
+        new_version(str|bytes): replacement version
+        file_name(str): name or path of the file the content belongs to
+        matches(list[VersionMatch]|None): output of find_versions_in_buffer for
+            this buffer, to avoid scanning it again
+    Returns:
+        list[Edit]: one per occurrence of old_version, in ascending order;
+        empty if the buffer does not hold old_version
+    """
+    if matches is None:
+        matches = find_versions_in_buffer(content, file_name)
+    old_version = _encoded(old_version)
+    new_version = _encoded(new_version)
+    return [
+        Edit(match.start, match.end, new_version)
+        for match in matches
+        if match.version == old_version
+    ]
+
+
+def apply_edits(content, edits: List[Edit]) -> bytes:
+    """
+    Build the new content of a buffer. The buffer itself is not changed.
+    Args:
+        content(bytes|bytearray|memoryview|mmap): content of the file
+        edits(list[Edit]): non-overlapping edits in ascending order
+    Returns:
+        bytes: content with every edit applied
+    """
+    view = memoryview(_buffer(content))
+    parts = []
+    position = 0
+    for start, end, replacement in edits:
+        parts.append(view[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(view[position:])
+    return b"".join(parts)
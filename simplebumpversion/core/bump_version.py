@@ -1,14 +1,34 @@
 #!/usr/bin/env python3
 import re
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 from simplebumpversion.core.git_tools import get_git_version, get_latest_git_tag
-from simplebumpversion.core.file_handler import read_file, write_to_file
+from simplebumpversion.core.file_handler import (
+    read_bytes,
+    write_bytes,
+    is_large_file,
+    map_file,
+    patch_file_spans,
+    HEAD_WINDOW,
+)
 from simplebumpversion.core.exceptions import NoValidVersionStr
+from simplebumpversion.core import instrumentation
+from simplebumpversion.core.scanner import VersionMatch, best_match
+from simplebumpversion.core.locators import locate_versions
+from simplebumpversion.core.buffer_api import (
+    apply_edits,
+    find_version_in_buffer,
+    find_versions_in_buffer,
+    version_edits,
+)
+from simplebumpversion.core.schemes import parse_version
+
+_PLAIN_VERSION = re.compile(r"\d+\.\d+\.\d+")
 
 
 def parse_semantic_version(version_str: str) -> Tuple[int, int, int]:
     """
     Parse a semantic version string into its integer components.
+    Parsing is memoized, see schemes.parse_version.
     Args:
         version_str(str): a string containing the version number.
     Returns:
@@ -17,14 +37,14 @@ def parse_semantic_version(version_str: str) -> Tuple[int, int, int]:
     Raises:
         ValueError:
     """
-    match = re.fullmatch(
-        r"v?(\d+)\.(\d+)\.(\d+)", version_str
-    )  # supports both 1.2.3 and v.1.2.3 formats
-    if not match:
+    # supports both 1.2.3 and v1.2.3 formats, pre-releases are not plain versions
+    try:
+        parsed = parse_version(version_str)
+    except ValueError:
+        parsed = None
+    if parsed is None or parsed.prerelease or parsed.build:
         raise ValueError(f"Invalid version format: {version_str}")
-
-    major, minor, patch = match.groups()
-    return int(major), int(minor), int(patch)
+    return parsed.release
 
 
 def is_git_tag_version(version_str: str) -> bool:
@@ -43,7 +63,7 @@ def is_git_tag_version(version_str: str) -> bool:
     # Git tags often have this format: v0.9-19-g7e2d
     # They frequently contain hyphens and letters not in the semantic version pattern
     return "-" in version_str or (  # Contains hyphen
-        not re.match(r"^\d+\.\d+\.\d+$", version_str)  # Not a simple semantic version
+        not _PLAIN_VERSION.fullmatch(version_str)  # Not a simple semantic version
         and any(c.isalpha() for c in version_str)
     )  # Contains letters
 
@@ -53,6 +73,8 @@ def bump_semantic_version(
 ) -> str:
     """
     Bump the version according to the specified flags.
+    Only plain semantic versions are accepted; pre-releases, build metadata
+    and other schemes are bumped with schemes.bump_version.
     Args:
         current_version(str): the current version as str, e.g. version=1.2.3
         major(bool): bump major version
@@ -89,6 +111,7 @@ def bump_semantic_version(
 def find_version_in_file(file_path: str) -> str:
     """
     Find the version string in the specified file.
+    The file is read as bytes and searched with find_version_in_buffer.
     Args:
         file_path(str): Path to the file containing the version number.
     Returns:
@@ -96,44 +119,31 @@ def find_version_in_file(file_path: str) -> str:
     Raises:
         NoValidVersionStr: version number pattern is not found in the file
     """
-    content = read_file(file_path)
-
-    # Common semantic version patterns (strict semantic versioning)
-    semantic_patterns = [
-        r'version\s*=\s*["\'](\d+\.\d+\.\d+)["\']',  # version = "1.2.3"
-        r'VERSION\s*=\s*["\'](\d+\.\d+\.\d+)["\']',  # VERSION = "1.2.3"
-        r'__version__\s*=\s*["\'](\d+\.\d+\.\d+)["\']',  # __version__ = "1.2.3"
-        r'"version"\s*:\s*"(\d+\.\d+\.\d+)"',  # "version": "1.2.3"
-    ]
-
-    # More flexible patterns that can match git tags or other version formats
-    flexible_patterns = [
-        r'version\s*=\s*["\']([\w\.\-]+)["\']',  # version = "v1.2.3-19-gabc123"
-        r'VERSION\s*=\s*["\']([\w\.\-]+)["\']',  # VERSION = "v1.2.3-19-gabc123"
-        r'__version__\s*=\s*["\']([\w\.\-]+)["\']',  # __version__ = "v1.2.3-19-gabc123"
-        r'"version"\s*:\s*"([\w\.\-]+)"',  # "version": "v1.2.3-19-gabc123"
-    ]
-
-    # First try to find a semantic version
-    version = None
-    for pattern in semantic_patterns:
-        match = re.search(pattern, content)
-        if match:
-            version = match.group(1)
-            break
-
-    # If no semantic version found, try flexible patterns that can match git tags
-    if version is None:
-        for pattern in flexible_patterns:
-            match = re.search(pattern, content)
-            if match:
-                version = match.group(1)
-                break
-
-    if version is None:
-        raise NoValidVersionStr(f"Error: No version found in {file_path}")
+    if is_large_file(file_path):
+        return find_version_in_large_file(file_path)
+    return find_version_in_buffer(read_bytes(file_path), file_path).version.decode()
 
-    return version
+
+def scan_file(file_path: str) -> Tuple[bytes, List[VersionMatch], VersionMatch]:
+    """
+    Read a file once as bytes and scan it once for version keys.
+    Semantic versions (1.2.3) take precedence over flexible ones (v1.2.3-19-gabc123).
+    Files with a structured locator (see locators.py) only report their version field.
+    Args:
+        file_path(str): Path to the file containing the version number.
+    Returns:
+        tuple(bytes, list[VersionMatch], VersionMatch):
+        file content, every version match and the match reported as the file
+        version; versions are bytes and spans are byte offsets
+    Raises:
+        NoValidVersionStr: version number pattern is not found in the file
+    """
+    content = read_bytes(file_path)
+    matches = find_versions_in_buffer(content, file_path)
+    match = best_match(matches)
+    if match is None:
+        raise NoValidVersionStr(f"Error: No version found in {file_path}")
+    return content, matches, match
 
 
 def update_version_in_file(
@@ -141,42 +151,98 @@ def update_version_in_file(
 ) -> bool:
     """
     Update the version in the specified file.
+    Only the version bytes change, see buffer_api.version_edits: the encoding
+    and the newlines of the file are kept.
+    Args:
+        file_path(str): path to the file to update
+        old_version(str): old version number string
+        new_version(str): the new version number string
+        is_dry_run(bool): do not write the file
+    Returns:
+        bool: whether version update was successful
+    """
+    if is_large_file(file_path):
+        return update_version_in_large_file(
+            file_path, old_version, new_version, is_dry_run
+        )
+    content = read_bytes(file_path)
+    edits = version_edits(content, old_version, new_version, file_path)
+    if edits and not is_dry_run:
+        write_bytes(file_path, apply_edits(content, edits))
+    return bool(edits)
+
+
+def find_version_in_large_file(file_path: str, window: Optional[int] = None) -> str:
+    """
+    Find the version string of a large file without loading it.
+    The file is memory-mapped. Files with a structured locator are walked up to
+    their version field, other files have the first `window` bytes scanned, and
+    the rest only if there is no version in that window.
+    Args:
+        file_path(str): Path to the file containing the version number.
+        window(int|None): bytes at the top of the file to search first (HEAD_WINDOW)
+    Returns:
+        str: version number string
+    Raises:
+        NoValidVersionStr: version number pattern is not found in the file
+    """
+    window = window or HEAD_WINDOW
+    with map_file(file_path) as mapped:
+        end = min(window, len(mapped))
+        # pages are loaded lazily, only the scanned part is read
+        instrumentation.count("bytes.read", end)
+        matches = locate_versions(file_path, mapped, scan_end=end)
+        if not matches and end < len(mapped):
+            instrumentation.count("bytes.read", len(mapped) - end)
+            matches = locate_versions(file_path, mapped)
+        match = best_match(matches)
+    if match is None:
+        raise NoValidVersionStr(f"Error: No version found in {file_path}")
+    return match.version.decode()
+
+
+def find_version_spans_in_large_file(
+    file_path: str, version: str
+) -> List[Tuple[int, int]]:
+    """
+    Find the byte spans of every occurrence of a version in a large file,
+    as update_version_in_file does for a small one.
+    The mapping is scanned page by page, the file is never loaded as a whole.
+    Args:
+        file_path(str): path to the file
+        version(str): version string to look for
+    Returns:
+        list[tuple(int, int)]: (start, end) byte offsets in ascending order
+    """
+    version_bytes = version.encode()
+    with map_file(file_path) as mapped:
+        instrumentation.count("bytes.read", len(mapped))
+        return [
+            (match.start, match.end)
+            for match in locate_versions(file_path, mapped)
+            if match.version == version_bytes
+        ]
+
+
+def update_version_in_large_file(
+    file_path: str,
+    old_version: str,
+    new_version: str,
+    is_dry_run: bool,
+) -> bool:
+    """
+    Patch every occurrence of the version of a large file in place.
+    Equal-length versions are patched in place, otherwise only the tail of
+    the file is shifted.
     Args:
         file_path(str): path to the file to update
         old_version(str): old version number string
         new_version(str): the new version number string
+        is_dry_run(bool): do not write the file
     Returns:
         bool: whether version update was successful
     """
-    content = read_file(file_path)
-
-    # Common version patterns to replace, works for both semantic versions and git tags
-    patterns = [
-        (
-            f"version\\s*=\\s*[\"']({re.escape(old_version)})[\"']",
-            f'version = "{new_version}"',
-        ),
-        (
-            f"VERSION\\s*=\\s*[\"']({re.escape(old_version)})[\"']",
-            f'VERSION = "{new_version}"',
-        ),
-        (
-            f"__version__\\s*=\\s*[\"']({re.escape(old_version)})[\"']",
-            f'__version__ = "{new_version}"',
-        ),
-        (
-            f'"version"\\s*:\\s*"({re.escape(old_version)})"',
-            f'"version": "{new_version}"',
-        ),
-    ]
-
-    updated = False
-    for pattern, replacement in patterns:
-        new_content, count = re.subn(pattern, replacement, content)
-        if count > 0:
-            content = new_content
-            updated = True
-
-    if updated and not is_dry_run:
-        write_to_file(file_path, content)
-    return updated
+    spans = find_version_spans_in_large_file(file_path, old_version)
+    if spans and not is_dry_run:
+        patch_file_spans(file_path, spans, new_version.encode())
+    return bool(spans)
@@ -1,22 +1,289 @@
 import os
-from datetime import datetime
-import subprocess
 import re
+import shutil
+from typing import Iterable, List, Optional, Tuple
 
+from simplebumpversion.core import instrumentation
+from simplebumpversion.core.file_handler import (
+    commit_staged,
+    copy_file_contents,
+    discard_staged,
+)
 
-def write_changelog(new_version, changelog_path, message, update_type, is_dry_run):
-    new_entry = f"## {new_version} - {datetime.now().strftime('%Y-%m-%d')} [ {update_type} ]\n\n"
-    new_entry += "\n".join(f"- {line}" for line in message.strip().splitlines())
-    new_entry += "\n\n"
 
-    if os.path.exists(changelog_path):
-        with open(changelog_path, "r") as f:
-            old_content = f.read()
-    else:
-        old_content = ""
+# conventional commit subject: type(scope)!: description
+_CONVENTIONAL_SUBJECT = re.compile(
+    r"(?P<type>[A-Za-z]+)(?:\((?P<scope>[^)]*)\))?(?P<breaking>!)?:\s*(?P<desc>.+)"
+)
+# changelog sections in output order, keyed by conventional commit type
+CONVENTIONAL_SECTIONS = {
+    "breaking": "Breaking changes",
+    "feat": "Features",
+    "fix": "Bug fixes",
+    "perf": "Performance",
+    "other": "Other changes",
+}
 
-    if not is_dry_run:
-        with open(changelog_path, "w") as f:
-            f.write(new_entry + old_content)
+
+def write_changelog(
+    new_version,
+    changelog_path,
+    message,
+    update_type,
+    is_dry_run,
+    archive_size: Optional[int] = None,
+    grouped: bool = False,
+):
+    """
+    Prepend a new entry to the changelog file.
+    The old content is streamed behind the new entry into a temp file,
+    which then atomically replaces the changelog.
+    Args:
+        new_version(str): version the entry is written for
+        changelog_path(str): path to the changelog file
+        message(str): change description, one bullet point per line
+        update_type(str|None): major, minor or patch
+        is_dry_run(bool): only return the entry, do not write the file
+        archive_size(int|None): roll the existing entries into an archive file
+            once the changelog reaches this many bytes
+        grouped(bool): message comes from build_conventional_changelog, its
+            "### Section" headings and blank lines are kept as they are
+    Returns:
+        str: the new changelog entry
+    """
+    from datetime import datetime
+
+    with instrumentation.span("changelog"):
+        new_entry = f"## {new_version} - {datetime.now().strftime('%Y-%m-%d')} [ {update_type} ]\n\n"
+        if grouped:
+            lines = (
+                _format_grouped_line(line) for line in message.strip().splitlines()
+            )
+        else:
+            lines = (f"- {line}" for line in message.strip().splitlines())
+        new_entry += "\n".join(lines)
+        new_entry += "\n\n"
+
+        if not is_dry_run:
+            add_changelog_entry(changelog_path, new_entry, archive_size)
 
     return new_entry
+
+
+def add_changelog_entry(
+    changelog_path: str, new_entry: str, archive_size: Optional[int] = None
+) -> None:
+    """
+    Put a formatted entry at the top of the changelog, see write_changelog.
+    Args:
+        changelog_path(str): path to the changelog file
+        new_entry(str): entry as returned by write_changelog
+        archive_size(int|None): roll the existing entries into an archive file
+            once the changelog reaches this many bytes
+    """
+    commit_staged(stage_changelog_entry(changelog_path, new_entry, archive_size))
+
+
+def stage_changelog_entry(
+    changelog_path: str, new_entry: str, archive_size: Optional[int] = None
+) -> List[Tuple[str, str]]:
+    """
+    Stage the files add_changelog_entry writes, without renaming any of them,
+    so they can be committed together with other staged files.
+    Args:
+        changelog_path(str): path to the changelog file
+        new_entry(str): entry as returned by write_changelog
+        archive_size(int|None): roll the existing entries into an archive file
+            once the changelog reaches this many bytes
+    Returns:
+        list[tuple(str, str)]: (temp path, target path) pairs for commit_staged
+    """
+    if archive_size and _file_size(changelog_path) >= archive_size:
+        return _stage_archive(changelog_path, new_entry.encode())[0]
+    tmp_path = _stage_file(changelog_path, new_entry.encode(), changelog_path)
+    return [(tmp_path, changelog_path)]
+
+
+def _format_grouped_line(line: str) -> str:
+    # section headings of a grouped message are kept, everything else is a bullet
+    if line.startswith("### "):
+        return f"{line}\n"
+    if not line:
+        return ""
+    return f"- {line}"
+
+
+def build_conventional_changelog(
+    commits: Iterable, max_entries: int = 50
+) -> Tuple[str, Optional[str]]:
+    """
+    Group a stream of commits by conventional-commit type and derive the bump type.
+    Commits are consumed one at a time; at most max_entries commits per section
+    are kept, the rest are only counted, so memory does not grow with the stream.
+    Args:
+        commits(Iterable[Commit]): commit stream, e.g. from iter_commits_since_tag
+        max_entries(int): maximum number of entries listed per section
+    Returns:
+        tuple(str, str|None): changelog message with one "### Section" heading per
+        non-empty group, and "major", "minor" or "patch" (None if there were no commits)
+    """
+    sections = {key: [] for key in CONVENTIONAL_SECTIONS}
+    counts = dict.fromkeys(CONVENTIONAL_SECTIONS, 0)
+    bump_type = None
+    for commit in commits:
+        match = _CONVENTIONAL_SUBJECT.fullmatch(commit.subject.strip())
+        commit_type = match.group("type").lower() if match else None
+        breaking = match is not None and (
+            match.group("breaking") is not None or "BREAKING CHANGE" in commit.body
+        )
+        if breaking:
+            section = "breaking"
+        elif commit_type in sections:
+            section = commit_type
+        else:
+            section = "other"
+
+        if breaking:
+            bump_type = "major"
+        elif commit_type == "feat" and bump_type != "major":
+            bump_type = "minor"
+        elif bump_type is None:
+            bump_type = "patch"
+
+        counts[section] += 1
+        if len(sections[section]) < max_entries:
+            if match and section != "other":
+                scope = match.group("scope")
+                text = match.group("desc")
+                if scope:
+                    text = f"{scope}: {text}"
+            else:
+                # the type is kept for commits that land in the catch-all section
+                text = commit.subject
+            sections[section].append(f"{text} ({commit.short_hash})")
+
+    lines = []
+    for key, title in CONVENTIONAL_SECTIONS.items():
+        if not counts[key]:
+            continue
+        lines.append(f"### {title}")
+        lines.extend(sections[key])
+        if counts[key] > len(sections[key]):
+            lines.append(f"... and {counts[key] - len(sections[key])} more")
+        lines.append("")
+    return "\n".join(lines).strip(), bump_type
+
+
+def _create_temp_file(directory: str) -> Tuple[int, str]:
+    """
+    Create a new file in directory with the permissions open() would give it.
+    Unlike mkstemp (always 0o600), the file is opened with mode 0o666 and the
+    kernel applies the umask, so the process umask is never changed.
+    Returns:
+        tuple(int, str): file descriptor and path of the file
+    """
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+    while True:
+        tmp_path = os.path.join(directory, f".changelog-{os.urandom(6).hex()}")
+        try:
+            return os.open(tmp_path, flags, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+
+def _stage_file(file_path: str, data: bytes, source: Optional[str]) -> str:
+    """
+    Write data, followed by the content of source, to a synced temp file next
+    to file_path. Source is copied in chunks, never read into memory.
+    The temp file gets the permissions of file_path, or of source, if it exists.
+    Returns:
+        str: path to the temp file
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = _create_temp_file(directory)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+            out.flush()
+            if source is not None and os.path.exists(source):
+                with open(source, "rb") as src:
+                    copy_file_contents(src, out)
+            if os.path.exists(file_path):
+                shutil.copymode(file_path, tmp_path)
+            elif source is not None and os.path.exists(source):
+                shutil.copymode(source, tmp_path)
+            os.fsync(out.fileno())
+            instrumentation.count("bytes.written", os.fstat(out.fileno()).st_size)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+def prepend_to_file(file_path: str, data: bytes) -> None:
+    """
+    Write data in front of the current content of a file.
+    The file is never read into memory: data is written to a temp file
+    in the same directory, the old content is copied behind it in chunks
+    and the temp file is renamed over the original.
+    Args:
+        file_path(str): file to prepend to, created if it does not exist
+        data(bytes): bytes to put at the top of the file
+    """
+    commit_staged([(_stage_file(file_path, data, file_path), file_path)])
+
+
+def archive_changelog(changelog_path: str, new_entry: bytes) -> str:
+    """
+    Move the current changelog to the next free numbered archive file,
+    e.g. CHANGELOG.md -> CHANGELOG.3.md, and start a new changelog with
+    new_entry and a link to the archive.
+    Both files are staged as temp files before either is renamed into place,
+    so a failure never leaves the changelog missing.
+    Args:
+        changelog_path(str): path to the changelog file
+        new_entry(bytes): first entry of the new changelog
+    Returns:
+        str: file name of the archive
+    """
+    staged, archive_name = _stage_archive(changelog_path, new_entry)
+    commit_staged(staged)
+    return archive_name
+
+
+def _stage_archive(
+    changelog_path: str, new_entry: bytes
+) -> Tuple[List[Tuple[str, str]], str]:
+    # the archive comes first, so the old entries are in place before the
+    # changelog that links to them
+    directory, name = os.path.split(changelog_path)
+    stem, ext = os.path.splitext(name)
+    archive_pattern = re.compile(rf"{re.escape(stem)}\.(\d+){re.escape(ext)}")
+    numbers = [
+        int(match.group(1))
+        for match in map(archive_pattern.fullmatch, os.listdir(directory or "."))
+        if match
+    ]
+    archive_name = f"{stem}.{max(numbers, default=0) + 1}{ext}"
+    archive_path = os.path.join(directory, archive_name)
+    footer = f"Older entries are archived in [{archive_name}]({archive_name})\n"
+    staged = []
+    try:
+        staged.append((_stage_file(archive_path, b"", changelog_path), archive_path))
+        staged.append(
+            (
+                _stage_file(changelog_path, new_entry + footer.encode(), None),
+                changelog_path,
+            )
+        )
+    except BaseException:
+        discard_staged(staged)
+        raise
+    return staged, archive_name
+
+
+def _file_size(file_path: str) -> int:
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
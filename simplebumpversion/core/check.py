@@ -0,0 +1,154 @@
+"""
+Read-only version consistency check.
+`bump-version check` confirms that every target file carries the same
+well-formed version and that the version is not tagged yet, e.g. in a
+pre-commit hook. Files are scanned concurrently, with the version index
+answering for unchanged files, and the tags are read once from the refs;
+no commit log is read and nothing in the work tree is written.
+"""
+
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from simplebumpversion.core.batch import DEFAULT_JOBS, record_scan
+from simplebumpversion.core.bump_version import find_version_in_large_file, scan_file
+from simplebumpversion.core.exceptions import NoValidVersionStr
+from simplebumpversion.core.file_handler import is_large_file
+from simplebumpversion.core.schemes import DEFAULT_SCHEME, parse_version
+from simplebumpversion.core.version_index import VersionIndex
+
+# file sets up to this size are read inline: with a warm version index a read is
+# a stat and a few KB, less than starting the thread pool
+INLINE_FILES = 4
+
+
+class FileVersion(NamedTuple):
+    """Version found in one file, or why none was found"""
+
+    file_path: str
+    version: Optional[str]
+    error: Optional[str] = None
+
+
+def read_version(file_path: str, index: Optional[VersionIndex] = None) -> str:
+    """
+    Find the version of a file like find_version_in_file, from the index if
+    the file is unchanged since it was recorded.
+    Raises:
+        FileNotFoundError: the file does not exist
+        NoValidVersionStr: no version number found in the file
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Error: File '{file_path}' not found")
+    hit = index.lookup(file_path) if index is not None else None
+    if hit is not None:
+        return hit.version
+    if is_large_file(file_path):
+        return find_version_in_large_file(file_path)
+    _, matches, match = scan_file(file_path)
+    if index is not None:
+        record_scan(index, file_path, matches, match)
+    return match.version.decode()
+
+
+def _read(file_path: str, index: Optional[VersionIndex]) -> FileVersion:
+    try:
+        return FileVersion(file_path, read_version(file_path, index))
+    except (FileNotFoundError, NoValidVersionStr) as e:
+        return FileVersion(file_path, None, str(e))
+
+
+def scan_versions(
+    files: Sequence[str],
+    jobs: Optional[int] = None,
+    index: Optional[VersionIndex] = None,
+    fail_fast: bool = False,
+    groups: Optional[Dict[str, str]] = None,
+) -> List[FileVersion]:
+    """
+    Read the version of every file concurrently.
+    Args:
+        files(list[str]): paths to the files containing version numbers
+        jobs(int|None): number of worker threads, see batch.plan_bumps
+        index(VersionIndex|None): version-location index to read and update
+        fail_fast(bool): stop at the first file without a version or with a
+            version different from the others of its group
+        groups(dict[str, str]|None): group of each file, files of a group must
+            have the same version; by default all files form one group
+    Returns:
+        list[FileVersion]: one per file, in input order; with fail_fast the
+        files not read before the stop are left out
+    """
+    files = list(dict.fromkeys(files))
+    if jobs is None:
+        jobs = min(DEFAULT_JOBS, (os.cpu_count() or 1) + 4)
+    jobs = max(1, min(jobs, len(files)))
+    if len(files) <= INLINE_FILES:
+        jobs = 1
+    results: Dict[str, FileVersion] = {}
+    # group -> versions seen
+    seen: Dict[str, set] = {}
+
+    def stop(result: FileVersion) -> bool:
+        results[result.file_path] = result
+        group = groups.get(result.file_path, "") if groups else ""
+        versions = seen.setdefault(group, set())
+        versions.add(result.version)
+        return fail_fast and (result.error is not None or len(versions) > 1)
+
+    if jobs == 1:
+        for file in files:
+            if stop(_read(file, index)):
+                break
+    else:
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_read, file, index) for file in files]
+            for future in as_completed(futures):
+                if stop(future.result()):
+                    for pending in futures:
+                        pending.cancel()
+                    break
+    return [results[file] for file in files if file in results]
+
+
+def check_versions(
+    results: List[FileVersion],
+    tags: Optional[Dict[str, str]] = None,
+    tag_prefix: str = "",
+    scheme: str = DEFAULT_SCHEME,
+) -> List[str]:
+    """
+    Check that files agree on one well-formed, untagged version.
+    Args:
+        results(list[FileVersion]): output of scan_versions
+        tags(dict[str, str]|None): tag names of the repository (GitSession.tags),
+            None to skip the tag check
+        tag_prefix(str): prefix of the version's tags, e.g. "api-"
+        scheme(str): version scheme the version must follow, see schemes.get_scheme
+    Returns:
+        list[str]: one message per problem, empty if the files are consistent
+    """
+    errors = [result.error for result in results if result.error is not None]
+    versions: Dict[str, List[str]] = {}
+    for result in results:
+        if result.version is not None:
+            versions.setdefault(result.version, []).append(result.file_path)
+    if len(versions) > 1:
+        found = "; ".join(
+            f"{version} in {', '.join(paths)}" for version, paths in versions.items()
+        )
+        errors.append(f"Versions differ: {found}")
+    for version in versions:
+        try:
+            parse_version(version, scheme)
+        except ValueError as e:
+            errors.append(str(e))
+        if tags is not None:
+            plain = version[1:] if version.startswith("v") else version
+            for tag in (f"{tag_prefix}{plain}", f"{tag_prefix}v{plain}"):
+                if tag in tags:
+                    errors.append(f"Version {version} is already tagged ({tag})")
+                    break
+    return errors
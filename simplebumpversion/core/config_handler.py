@@ -1,14 +1,89 @@
+"""
+Config file loading.
+A config file is parsed once (with the libyaml loader when available),
+validated against CONFIG_SCHEMA and compiled into one ConfigProfile per profile.
+Compiled configs are cached in memory and pickled to disk, keyed by path,
+modification time and size, so later runs skip parsing and validation.
+"""
+
 import os
-import yaml
+import pickle
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 config_name_key = "name"
 config_desc_key = "description"
 settings_key = "settings"
 bump_type_key = "bump_type"
 files_key = "files"
+profiles_key = "profiles"
+force_key = "force"
+packages_key = "packages"
+package_file_key = "file"
+package_root_key = "root"
+tag_prefix_key = "tag_prefix"
 
 change_log_file_key = "change_log_file"
 
+# profile used when none is selected, built from the top-level settings
+DEFAULT_PROFILE = "default"
+BUMP_TYPES = ("major", "minor", "patch")
+
+# key -> (expected type, required)
+SETTINGS_SCHEMA = {
+    bump_type_key: (str, False),
+    # settings need files, packages or both; checked in _settings_errors
+    files_key: (list, False),
+    packages_key: (list, False),
+    change_log_file_key: (str, False),
+    force_key: (bool, False),
+}
+PACKAGE_SCHEMA = {
+    package_file_key: (str, True),
+    package_root_key: (str, False),
+    tag_prefix_key: (str, False),
+    change_log_file_key: (str, False),
+}
+PROFILE_SCHEMA = {
+    config_name_key: (str, False),
+    config_desc_key: (str, False),
+    settings_key: (dict, True),
+}
+CONFIG_SCHEMA = {
+    config_name_key: (str, False),
+    config_desc_key: (str, False),
+    settings_key: (dict, False),
+    profiles_key: (dict, False),
+}
+
+# bump when the pickled representation changes
+CONFIG_CACHE_FORMAT = 2
+
+# absolute path -> (mtime_ns, size, compiled profiles)
+_config_cache: Dict[str, Tuple[int, int, Dict[str, "ConfigProfile"]]] = {}
+
+
+class PackageSpec(NamedTuple):
+    """A package of a monorepo: its version file, directory and tag prefix"""
+
+    file: str
+    # directory whose changes trigger a bump, defaults to the file's directory
+    root: str
+    # prepended to the version in tag names, e.g. "api-" for api-1.2.3
+    tag_prefix: str
+    change_log_file: Optional[str]
+
+
+class ConfigProfile(NamedTuple):
+    """Validated settings of one profile of a config file"""
+
+    name: Optional[str]
+    description: Optional[str]
+    bump_type: str
+    files: Tuple[str, ...]
+    change_log_file: Optional[str]
+    force: bool
+    packages: Tuple[PackageSpec, ...] = ()
+
 
 def open_config_file(config_path: os.PathLike) -> dict:
     """
@@ -22,14 +97,104 @@ def open_config_file(config_path: os.PathLike) -> dict:
     """
     if not os.path.isfile(config_path):
         raise FileNotFoundError(f"Config file {config_path} was not found")
+    import yaml
+
+    # the libyaml loader is several times faster, if PyYAML was built with it
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
     with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=loader)
     return config
 
 
 def write_config_file(config_path, config):
+    import yaml
+
     with open(config_path, "w") as f:
         yaml.dump(config, f, sort_keys=False)
+    _config_cache.pop(os.path.abspath(config_path), None)
+
+
+def _schema_errors(
+    values: dict, schema: dict, where: str, partial: bool = False
+) -> List[str]:
+    errors = []
+    for key, (expected, required) in schema.items():
+        if key not in values:
+            if required and not partial:
+                errors.append(f"{where}: missing '{key}'")
+        elif not isinstance(values[key], expected):
+            errors.append(f"{where}: '{key}' must be a {expected.__name__}")
+    for key in values:
+        if key not in schema:
+            errors.append(f"{where}: unknown key '{key}'")
+    return errors
+
+
+def _settings_errors(settings: dict, where: str, partial: bool = False) -> List[str]:
+    errors = _schema_errors(settings, SETTINGS_SCHEMA, where, partial)
+    bump_type = settings.get(bump_type_key)
+    if isinstance(bump_type, str) and bump_type not in BUMP_TYPES:
+        errors.append(
+            f"{where}: '{bump_type_key}' must be one of {', '.join(BUMP_TYPES)}"
+        )
+    files = settings.get(files_key)
+    if isinstance(files, list):
+        if not files:
+            errors.append(f"{where}: '{files_key}' must not be empty")
+        elif not all(isinstance(file, str) for file in files):
+            errors.append(f"{where}: '{files_key}' must be a list of paths")
+    packages = settings.get(packages_key)
+    if isinstance(packages, list):
+        if not packages:
+            errors.append(f"{where}: '{packages_key}' must not be empty")
+        for i, package in enumerate(packages):
+            package_where = f"{where}.{packages_key}[{i}]"
+            if isinstance(package, dict):
+                errors += _schema_errors(package, PACKAGE_SCHEMA, package_where)
+            else:
+                errors.append(f"{package_where}: must be a mapping")
+    if not partial and files_key not in settings and packages_key not in settings:
+        errors.append(f"{where}: missing '{files_key}'")
+    return errors
+
+
+def config_errors(config) -> List[str]:
+    """
+    Check a parsed config against CONFIG_SCHEMA.
+    Profile settings are merged over the top-level settings, so with profiles
+    the top-level settings may leave out keys that every profile sets.
+    Args:
+        config: parsed config file
+    Returns:
+        list[str]: one message per problem, empty if the config is valid
+    """
+    if not isinstance(config, dict):
+        return ["config must be a mapping"]
+    errors = _schema_errors(config, CONFIG_SCHEMA, "config")
+    if errors:
+        return errors
+    base = config.get(settings_key, {})
+    profiles = config.get(profiles_key, {})
+    if not profiles and settings_key not in config:
+        return [f"config: missing '{settings_key}'"]
+    if settings_key in config:
+        errors += _settings_errors(base, settings_key, partial=bool(profiles))
+    for name, profile in profiles.items():
+        where = f"{profiles_key}.{name}"
+        if not isinstance(profile, dict):
+            errors.append(f"{where}: must be a mapping")
+            continue
+        profile_errors = _schema_errors(profile, PROFILE_SCHEMA, where)
+        if not profile_errors:
+            where = f"{where}.{settings_key}"
+            settings = profile[settings_key]
+            profile_errors = _settings_errors(settings, where, partial=True)
+            if not any(
+                key in base or key in settings for key in (files_key, packages_key)
+            ):
+                profile_errors.append(f"{where}: missing '{files_key}'")
+        errors += profile_errors
+    return errors
 
 
 def validate_config(config: dict) -> bool:
@@ -39,16 +204,181 @@ def validate_config(config: dict) -> bool:
     Returns:
         bool
     """
-    return True
+    return not config_errors(config)
+
+
+def compile_config(config: dict) -> Dict[str, ConfigProfile]:
+    """
+    Build the settings of every profile of a validated config.
+    Args:
+        config(dict): config that passed validation
+    Returns:
+        dict[str, ConfigProfile]: profiles by name, the top-level settings
+        are available as DEFAULT_PROFILE
+    """
+    base = config.get(settings_key, {})
+    sources = {}
+    # without files of its own, the top-level settings are only a base for profiles
+    if files_key in base or packages_key in base:
+        sources[DEFAULT_PROFILE] = (config, base)
+    for name, profile in config.get(profiles_key, {}).items():
+        settings = {**base, **profile[settings_key]}
+        # a profile listing files replaces the packages of the base, and vice versa
+        if files_key in profile[settings_key]:
+            settings.pop(packages_key, None)
+        elif packages_key in profile[settings_key]:
+            settings.pop(files_key, None)
+        sources[name] = ({**config, **profile}, settings)
+    return {
+        name: ConfigProfile(
+            info.get(config_name_key),
+            info.get(config_desc_key),
+            settings.get(bump_type_key, "patch"),
+            tuple(settings.get(files_key, ())),
+            settings.get(change_log_file_key),
+            settings.get(force_key, False),
+            tuple(_package_spec(package) for package in settings.get(packages_key, ())),
+        )
+        for name, (info, settings) in sources.items()
+    }
+
+
+def _package_spec(package: dict) -> PackageSpec:
+    file = package[package_file_key]
+    return PackageSpec(
+        file,
+        package.get(package_root_key, os.path.dirname(file) or "."),
+        package.get(tag_prefix_key, ""),
+        package.get(change_log_file_key),
+    )
+
+
+def _disk_cache_path(config_path: str) -> str:
+    import hashlib
+    from simplebumpversion.core.version_index import default_index_dir
+
+    key = hashlib.blake2b(config_path.encode(), digest_size=8).hexdigest()
+    directory = default_index_dir(os.path.dirname(config_path))
+    return os.path.join(directory, f"config-{key}.pickle")
+
+
+def _read_disk_cache(cache_path: str, mtime_ns: int, size: int):
+    try:
+        with open(cache_path, "rb") as f:
+            data = pickle.load(f)
+    except Exception:
+        # missing, truncated or written by an incompatible version: a miss
+        return None
+    if (
+        not isinstance(data, dict)
+        or data.get("format") != CONFIG_CACHE_FORMAT
+        or data.get("mtime_ns") != mtime_ns
+        or data.get("size") != size
+    ):
+        return None
+    return data.get("profiles")
+
+
+def _write_disk_cache(cache_path: str, mtime_ns: int, size: int, profiles) -> None:
+    import tempfile
+
+    data = {
+        "format": CONFIG_CACHE_FORMAT,
+        "mtime_ns": mtime_ns,
+        "size": size,
+        "profiles": profiles,
+    }
+    # the cache is only an optimization: if it cannot be written, it is skipped
+    try:
+        directory = os.path.dirname(cache_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        os.remove(tmp_path)
+
+
+def load_config_profiles(
+    config_path: os.PathLike, use_cache: bool = True
+) -> Dict[str, ConfigProfile]:
+    """
+    Parse, validate and compile a config file, or get it from the cache.
+    The file is only parsed again when its modification time or size changed.
+    Args:
+        config_path(os.PathLike): path to the config file
+        use_cache(bool): read and write the on-disk cache
+    Returns:
+        dict[str, ConfigProfile]: profiles by name
+    Raises:
+        FileNotFoundError: config file is not found
+        ValueError: config file is invalid
+    """
+    path = os.path.abspath(config_path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise FileNotFoundError(f"Config file {config_path} was not found")
+    key = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _config_cache.get(path)
+    if cached is not None and cached[:2] == key:
+        return cached[2]
+
+    profiles = None
+    cache_path = _disk_cache_path(path) if use_cache else None
+    if cache_path is not None:
+        profiles = _read_disk_cache(cache_path, *key)
+    if profiles is None:
+        config = open_config_file(path)
+        errors = config_errors(config)
+        if errors:
+            raise ValueError(f"Config file is invalid: {'; '.join(errors)}")
+        profiles = compile_config(config)
+        if cache_path is not None:
+            _write_disk_cache(cache_path, *key, profiles)
+    _config_cache[path] = (*key, profiles)
+    return profiles
+
+
+def load_config(
+    config_path: os.PathLike, profile: Optional[str] = None, use_cache: bool = True
+) -> ConfigProfile:
+    """
+    Get the settings of one profile of a config file.
+    Args:
+        config_path(os.PathLike): path to the config file
+        profile(str|None): profile name, defaults to the top-level settings
+        use_cache(bool): read and write the on-disk cache
+    Returns:
+        ConfigProfile: validated settings
+    Raises:
+        FileNotFoundError: config file is not found
+        ValueError: config file is invalid or has no such profile
+    """
+    profiles = load_config_profiles(config_path, use_cache)
+    name = profile or DEFAULT_PROFILE
+    if name not in profiles:
+        available = ", ".join(sorted(profiles)) or "none"
+        raise ValueError(
+            f"Profile '{name}' not found in {config_path}. Available profiles: {available}"
+        )
+    return profiles[name]
 
 
 def parse_config_arguments(
-    config_path: os.PathLike,
+    config_path: os.PathLike, profile: Optional[str] = None, use_cache: bool = True
 ) -> tuple[list[str], bool, bool, bool, bool]:
     """
     Parse the arguments in the config file
     Args:
         config(os.PathLike): path to the config file
+        profile(str|None): profile to use, defaults to the top-level settings
+        use_cache(bool): read and write the on-disk cache
     Returns:
         tuple(list[str], bool, bool, bool, bool):
         list of paths to files with version numbers and boolean flags for bump version type
@@ -57,18 +387,17 @@ def parse_config_arguments(
         ValueError: major bump type provided in config file
     """
     is_dry_run = False
-    config = open_config_file(config_path)
-    ### if config not complete, raise error
-    if not validate_config(config):
-        raise ValueError("Config file is invalid")
-    bump_type: str = config[settings_key][bump_type_key]
+    settings = load_config(config_path, profile, use_cache)
+    bump_type = settings.bump_type
     if bump_type == "major":
         raise ValueError(
             "Major version bumping is not supported with a config file. Use CLI instead"
         )
     is_minor, is_patch = get_bump_flags(bump_type)
     is_major = False
-    files = config[settings_key][files_key]
+    # files of a monorepo config are bumped only when their package changed,
+    # see monorepo.py
+    files = list(settings.files) + [package.file for package in settings.packages]
 
     return files, is_major, is_minor, is_patch, is_dry_run
 
@@ -97,10 +426,8 @@ def get_bump_flags(bump_type: str) -> tuple[bool, bool]:
     return is_minor, is_patch
 
 
-def get_change_log_file(config_path):
-    config = open_config_file(config_path)
-    change_log_file = config[settings_key][change_log_file_key]
-    return change_log_file
+def get_change_log_file(config_path, profile: Optional[str] = None):
+    return load_config(config_path, profile).change_log_file
 
 
 def set_change_log_file(config_path, new_name):
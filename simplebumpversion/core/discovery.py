@@ -0,0 +1,490 @@
+"""
+Version file discovery.
+Paths in the `files` list of a config and on the command line may be glob
+patterns, e.g. `**/pyproject.toml` or `packages/*/package.json`: `*` and `?`
+match within a path component, `**` matches any number of directories.
+
+Patterns are expanded by a directory walker that
+- starts at the literal prefix of the pattern (`packages/` above) and prunes
+  directories that cannot match the next components or are too deep;
+- skips paths ignored by `.gitignore` files and `.git/info/exclude`, and
+  vendored trees such as `node_modules`, without descending into them;
+- lists directories with `os.scandir` on a thread pool;
+- keeps the listing of every directory in an on-disk cache, reused while the
+  directory's modification time is unchanged, so a repeat run only stats
+  the directories instead of listing them.
+"""
+
+import os
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from simplebumpversion.core import instrumentation
+
+LISTING_CACHE_FORMAT = 1
+# directories never descended into by patterns, whatever the ignore files say
+PRUNED_DIRS = frozenset(
+    (
+        ".git",
+        ".hg",
+        ".svn",
+        "node_modules",
+        "bower_components",
+        "vendor",
+        "__pycache__",
+        ".tox",
+        ".nox",
+        ".venv",
+        "venv",
+        ".mypy_cache",
+        ".pytest_cache",
+    )
+)
+# listings of directories modified this recently are not cached: another change
+# within the timestamp granularity would not change the modification time
+RACY_SECONDS = 2
+_MAGIC = re.compile(r"[*?\[]")
+
+
+def is_pattern(path: str) -> bool:
+    """Check if a path is a glob pattern rather than a file path"""
+    return _MAGIC.search(path) is not None
+
+
+def translate(pattern: str) -> str:
+    """
+    Translate a glob pattern to a regular expression over "/"-separated paths.
+    `*`, `?` and `[...]` do not match "/"; `**` matches across directories.
+    Args:
+        pattern(str): glob pattern
+    Returns:
+        str: regular expression, to be used with fullmatch
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+                continue
+            chars = pattern[i:end].replace("\\", "\\\\")
+            if chars[0] in "!^":
+                chars = "^" + chars[1:]
+            out.append(f"[{chars}]")
+            i = end + 1
+        else:
+            out.append(re.escape(c))
+    return "".join(out)
+
+
+class IgnoreRule(NamedTuple):
+    """One line of an ignore file"""
+
+    regex: "re.Pattern"
+    negated: bool
+    dir_only: bool
+
+
+def parse_ignore_file(text: str) -> List[IgnoreRule]:
+    """
+    Parse the lines of a .gitignore file.
+    Supports comments, `!` negation, trailing `/` for directories, patterns
+    anchored by a `/` and `**`.
+    Args:
+        text(str): content of the file
+    Returns:
+        list[IgnoreRule]: rules in file order, matched against paths relative
+        to the directory of the file
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        if "/" in line:
+            # anchored to the directory of the ignore file
+            regex = translate(line.lstrip("/"))
+        else:
+            regex = "(?:.*/)?" + translate(line)
+        rules.append(IgnoreRule(re.compile(regex), negated, dir_only))
+    return rules
+
+
+# ignore rules in effect in a directory: (path of the rules' directory relative
+# to the top of the work tree, rules), outermost first
+RuleChain = Tuple[Tuple[str, Tuple[IgnoreRule, ...]], ...]
+
+
+def is_ignored(chain: RuleChain, path: str, is_dir: bool) -> bool:
+    """
+    Check a path against ignore rules; the last matching rule wins.
+    Args:
+        chain(RuleChain): rules of the path's directory and its parents
+        path(str): path relative to the top of the work tree
+        is_dir(bool): the path is a directory
+    """
+    ignored = False
+    for base, rules in chain:
+        relative = path[len(base) + 1 :] if base else path
+        for rule in rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.fullmatch(relative):
+                ignored = not rule.negated
+    return ignored
+
+
+def _read_rules(path: str) -> Tuple[IgnoreRule, ...]:
+    try:
+        with open(path, errors="replace") as f:
+            return tuple(parse_ignore_file(f.read()))
+    except OSError:
+        return ()
+
+
+def parent_rules(directory: str) -> Tuple[str, RuleChain]:
+    """
+    Collect the ignore rules that apply to a directory from outside of it:
+    `.git/info/exclude` and the .gitignore files of its parents up to the top
+    of the work tree.
+    Args:
+        directory(str): absolute path of the walk root
+    Returns:
+        tuple(str, RuleChain): path of the directory relative to the top of
+        the work tree and the rules; ("", ()) outside of a work tree
+    """
+    from simplebumpversion.core.git_session import find_git_dir
+
+    _, common_dir = find_git_dir(directory)
+    if common_dir is None:
+        return "", ()
+    top = directory
+    parents = []
+    while not os.path.exists(os.path.join(top, ".git")):
+        parent = os.path.dirname(top)
+        if parent == top:
+            # GIT_DIR outside of the tree: only the directory's own files apply
+            return "", ()
+        top = parent
+        parents.append(top)
+
+    chain = []
+    exclude = _read_rules(os.path.join(common_dir, "info", "exclude"))
+    if exclude:
+        chain.append(("", exclude))
+    for parent in reversed(parents):
+        rules = _read_rules(os.path.join(parent, ".gitignore"))
+        if rules:
+            base = os.path.relpath(parent, top).replace(os.sep, "/")
+            chain.append(("" if base == "." else base, rules))
+    offset = os.path.relpath(directory, top).replace(os.sep, "/")
+    return ("" if offset == "." else offset), tuple(chain)
+
+
+class DirectoryWalker:
+    """
+    Parallel, cached directory listing.
+    Listings are keyed by absolute directory path and reused while the
+    directory's modification time is unchanged.
+    """
+
+    def __init__(self, jobs: Optional[int] = None, cache_path: Optional[str] = None):
+        """
+        Args:
+            jobs(int|None): listing threads, defaults to 4 per core (the work is I/O)
+            cache_path(str|None): listing cache file, None to not cache on disk
+        """
+        self.jobs = jobs or min(32, (os.cpu_count() or 1) * 4)
+        self.cache_path = cache_path
+        # directory -> (mtime_ns, file names, directory names)
+        self._cached: Dict[str, Tuple[int, Tuple[str, ...], Tuple[str, ...]]] = {}
+        # directories listed by this walker
+        self._seen = set()
+        self._dirty = False
+        self._racy_ns = (time.time() - RACY_SECONDS) * 1e9
+        if cache_path is not None:
+            self._cached = self._load()
+
+    def _load(self) -> dict:
+        import pickle
+
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = pickle.load(f)
+        except Exception:
+            # missing, truncated or written by an incompatible version
+            return {}
+        if not isinstance(data, dict) or data.get("format") != LISTING_CACHE_FORMAT:
+            return {}
+        return data.get("listings", {})
+
+    def save(self) -> None:
+        """
+        Write the listings to disk, if any of them is new.
+        Listings of deleted directories are evicted.
+        The cache is only an optimization: if it cannot be written, it is skipped.
+        """
+        if self.cache_path is None or not self._dirty:
+            return
+        import pickle
+        import tempfile
+
+        for path in [path for path in self._cached if path not in self._seen]:
+            if not os.path.isdir(path):
+                del self._cached[path]
+        data = {"format": LISTING_CACHE_FORMAT, "listings": self._cached}
+        try:
+            directory = os.path.dirname(self.cache_path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            os.remove(tmp_path)
+        self._dirty = False
+
+    def list_dir(self, path: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """
+        List a directory, from the cache if it is unchanged.
+        Symbolic links to directories are listed as files and not followed.
+        Args:
+            path(str): absolute directory path
+        Returns:
+            tuple(tuple[str], tuple[str]): file names and directory names
+        """
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return (), ()
+        # set.add and dict assignment are atomic, no lock needed between threads
+        self._seen.add(path)
+        cached = self._cached.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1], cached[2]
+        files, dirs = [], []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    (dirs if is_dir else files).append(entry.name)
+        except OSError:
+            return (), ()
+        listing = (mtime_ns, tuple(files), tuple(dirs))
+        if mtime_ns < self._racy_ns:
+            self._cached[path] = listing
+            self._dirty = True
+        instrumentation.count("dirs.listed")
+        return listing[1], listing[2]
+
+    def _visit(self, root: str, directory: "_Directory", pattern: "FilePattern"):
+        # list one directory: its matching files and the directories to enter
+        relative, depth, chain, anchor = directory
+        path = os.path.join(root, relative) if relative else root
+        files, dirs = self.list_dir(path)
+        if ".gitignore" in files:
+            rules = _read_rules(os.path.join(path, ".gitignore"))
+            if rules:
+                chain = chain + ((f"{anchor}{relative}".rstrip("/"), rules),)
+        prefix = f"{relative}/" if relative else ""
+        matches = []
+        if pattern.files_at(depth):
+            if pattern.name is not None:
+                # a literal file name, e.g. **/pyproject.toml: no need to look at
+                # every file
+                files = (pattern.name,) if pattern.name in files else ()
+            for name in files:
+                path = prefix + name
+                if pattern.matches(path) and not is_ignored(
+                    chain, anchor + path, False
+                ):
+                    matches.append(path)
+        children = []
+        for name in dirs:
+            if name in PRUNED_DIRS or not pattern.enters(name, depth):
+                continue
+            path = prefix + name
+            if not is_ignored(chain, anchor + path, True):
+                children.append(_Directory(path, depth + 1, chain, anchor))
+        return matches, children
+
+    def _walk_tree(self, root: str, top: "_Directory", pattern: "FilePattern"):
+        # walk a subtree on one thread
+        found = []
+        stack = [top]
+        while stack:
+            matches, children = self._visit(root, stack.pop(), pattern)
+            found.extend(matches)
+            stack.extend(children)
+        return found
+
+    def walk(self, root: str, pattern: "FilePattern") -> List[str]:
+        """
+        Find the files under root matching a pattern.
+        The top levels are listed until there are a few subtrees per thread,
+        then each subtree is walked on the thread pool.
+        Args:
+            root(str): directory to walk
+            pattern(FilePattern): pattern relative to root
+        Returns:
+            list[str]: matching paths relative to root, "/"-separated, unordered
+        """
+        root = os.path.abspath(root)
+        if not os.path.isdir(root):
+            return []
+        offset, chain = parent_rules(root)
+        # ignore rules match paths relative to the top of the work tree
+        anchor = f"{offset}/" if offset else ""
+
+        found = []
+        frontier = [_Directory("", 0, chain, anchor)]
+        while frontier and len(frontier) < self.jobs * 4:
+            level = []
+            for directory in frontier:
+                matches, children = self._visit(root, directory, pattern)
+                found.extend(matches)
+                level.extend(children)
+            frontier = level
+        if len(frontier) == 1 or self.jobs == 1:
+            for directory in frontier:
+                found.extend(self._walk_tree(root, directory, pattern))
+        elif frontier:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                subtrees = [(root, directory, pattern) for directory in frontier]
+                for matches in executor.map(lambda a: self._walk_tree(*a), subtrees):
+                    found.extend(matches)
+        return found
+
+
+class _Directory(NamedTuple):
+    # a directory to list: path relative to the walk root, depth below it,
+    # ignore rules in effect and the walk root relative to the top of the work tree
+    relative: str
+    depth: int
+    chain: RuleChain
+    anchor: str
+
+
+class FilePattern:
+    """A glob pattern split into the directory it starts at and the rest"""
+
+    def __init__(self, pattern: str):
+        pattern = pattern.replace(os.sep, "/")
+        parts = pattern.split("/")
+        literal = 0
+        while literal < len(parts) - 1 and not is_pattern(parts[literal]):
+            literal += 1
+        # literal directory the walk starts at ("" for the current directory)
+        self.base = "/".join(parts[:literal])
+        if not self.base and pattern.startswith("/"):
+            self.base = "/"
+        rest = parts[literal:]
+        self.regex = re.compile(translate("/".join(rest)))
+        # component regexes of the directories before the first "**"
+        self.dir_parts = []
+        for part in rest[:-1]:
+            if "**" in part:
+                break
+            self.dir_parts.append(re.compile(translate(part)))
+        self.recursive = any("**" in part for part in rest)
+        # depth of the files if there is no "**"
+        self.depth = len(rest) - 1
+        last = rest[-1]
+        self.name = None if is_pattern(last) else last
+
+    def files_at(self, depth: int) -> bool:
+        return self.recursive or depth == self.depth
+
+    def enters(self, name: str, depth: int) -> bool:
+        """Check if a directory at depth can contain matches"""
+        if depth < len(self.dir_parts):
+            return self.dir_parts[depth].fullmatch(name) is not None
+        return self.recursive
+
+    def matches(self, path: str) -> bool:
+        return self.regex.fullmatch(path) is not None
+
+
+def listing_cache_path(root: str) -> str:
+    """Get the listing cache file of a walk root, next to the version index"""
+    import hashlib
+    from simplebumpversion.core.version_index import default_index_dir
+
+    key = hashlib.blake2b(root.encode(), digest_size=8).hexdigest()
+    return os.path.join(default_index_dir(root), f"listings-{key}.pickle")
+
+
+def expand_files(
+    paths: Sequence[str],
+    jobs: Optional[int] = None,
+    use_cache: bool = True,
+    root: str = ".",
+) -> List[str]:
+    """
+    Expand the glob patterns among paths to the files they match.
+    Plain paths are kept as they are, existing or not.
+    Args:
+        paths(list[str]): file paths and glob patterns, relative to root or absolute
+        jobs(int|None): listing threads, see DirectoryWalker
+        use_cache(bool): read and write the on-disk listing cache
+        root(str): directory relative paths and patterns are relative to
+    Returns:
+        list[str]: the paths, each pattern replaced by its matches in sorted
+        order, without duplicates
+    Raises:
+        FileNotFoundError: a pattern matches no file
+    """
+    if not any(is_pattern(path) for path in paths):
+        return list(paths)
+    root = os.path.abspath(root)
+    walker = DirectoryWalker(jobs, listing_cache_path(root) if use_cache else None)
+    found = []
+    with instrumentation.span("discover"):
+        for path in paths:
+            if not is_pattern(path):
+                found.append(path)
+                continue
+            pattern = FilePattern(path)
+            base = os.path.join(root, pattern.base)
+            matches = sorted(walker.walk(base, pattern))
+            if not matches:
+                walker.save()
+                raise FileNotFoundError(f"No files match '{path}'")
+            found.extend(
+                os.path.join(pattern.base, *match.split("/")) for match in matches
+            )
+        walker.save()
+    return list(dict.fromkeys(found))
@@ -3,20 +3,341 @@ Helper module for reading and writing to generic files.
 The main objective of this module is to allow code reuse and implement error handling in one place.
 """
 
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import List, Sequence, Tuple
 
-def read_file(file_path: str) -> str:
+from simplebumpversion.core import instrumentation
+
+# files at least this large are patched in place through mmap instead of being rewritten
+MMAP_THRESHOLD = 16 * 1024 * 1024
+# size of the window at the top of a large file that is searched for the version
+HEAD_WINDOW = 1024 * 1024
+# buffer size used when shifting the tail of a large file
+CHUNK_SIZE = 1024 * 1024
+
+
+def read_bytes(file_path: str) -> bytes:
+    """
+    Read a whole file without decoding it.
+    Args:
+        file_path(str): path to the file
+    Returns:
+        bytes: content of the file
+    """
     try:
-        with open(file_path, "r") as f:
-            return f.read()
+        with instrumentation.span("read"), open(file_path, "rb") as f:
+            content = f.read()
     except FileNotFoundError:
         raise FileNotFoundError(f"Could not find {file_path}")
     except PermissionError:
         raise PermissionError(f"Could not read {file_path}")
+    instrumentation.count("bytes.read", len(content))
+    return content
 
 
-def write_to_file(file_path: str, content: str) -> None:
+def write_bytes(file_path: str, content) -> None:
+    """
+    Write bytes to a file as they are, newlines and encoding are kept.
+    Args:
+        file_path(str): path to the file
+        content(bytes|memoryview): new content of the file
+    """
     try:
-        with open(file_path, "w") as f:
+        with instrumentation.span("write"), open(file_path, "wb") as f:
             f.write(content)
+    except PermissionError:
+        raise PermissionError(f"Could not write {file_path}")
+    instrumentation.count("bytes.written", len(content))
+
+
+def read_file(file_path: str) -> str:
+    """
+    Read a UTF-8 file as text, a wrapper over read_bytes.
+    Newlines are not translated, so write_to_file gives back the same bytes.
+    Args:
+        file_path(str): path to the file
+    Returns:
+        str: content of the file
+    """
+    return read_bytes(file_path).decode("utf-8")
+
+
+def write_to_file(file_path: str, content: str) -> None:
+    """
+    Write text to a file as UTF-8, a wrapper over write_bytes.
+    Newlines are written as they are in content.
+    Args:
+        file_path(str): path to the file
+        content(str): new content of the file
+    """
+    write_bytes(file_path, content.encode("utf-8"))
+
+
+def _written(f) -> int:
+    # size of a file after writing it, in bytes
+    f.flush()
+    return os.fstat(f.fileno()).st_size
+
+
+def is_large_file(file_path: str) -> bool:
+    """
+    Check if a file should be handled byte-wise through mmap.
+    Args:
+        file_path(str): path to the file
+    Returns:
+        bool: True if the file size reaches MMAP_THRESHOLD
+    """
+    try:
+        return os.path.getsize(file_path) >= MMAP_THRESHOLD
+    except OSError:
+        return False
+
+
+@contextmanager
+def map_file(file_path: str):
+    """
+    Map a file read-only into memory. Pages are loaded lazily by the OS,
+    so only the parts that are actually searched are read from disk.
+    Args:
+        file_path(str): path to a non-empty file
+    Yields:
+        mmap.mmap: read-only mapping of the whole file
+    """
+    try:
+        with open(file_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Could not find {file_path}")
     except PermissionError:
         raise PermissionError(f"Could not read {file_path}")
+
+
+def patch_file_bytes(file_path: str, start: int, end: int, replacement: bytes) -> None:
+    """
+    Replace the bytes in [start, end) of a file without rewriting the whole file.
+    If the replacement has the same length, the bytes are patched in place through mmap.
+    Otherwise only the tail after `end` is shifted, CHUNK_SIZE bytes at a time,
+    so peak memory does not depend on the file size.
+    The patch is not atomic: an interrupted shift leaves the file partially moved.
+    Args:
+        file_path(str): path to the file to patch
+        start(int): offset of the first byte to replace
+        end(int): offset after the last byte to replace
+        replacement(bytes): new bytes
+    """
+    delta = len(replacement) - (end - start)
+    try:
+        with open(file_path, "r+b") as f:
+            size = os.fstat(f.fileno()).st_size
+            if delta == 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE) as mapped:
+                    mapped[start:end] = replacement
+                    mapped.flush()
+                instrumentation.count("bytes.written", len(replacement))
+                return
+            if delta > 0:
+                # grow first, then move the tail backwards starting from the end
+                f.truncate(size + delta)
+                position = size
+                while position > end:
+                    chunk_start = max(end, position - CHUNK_SIZE)
+                    f.seek(chunk_start)
+                    chunk = f.read(position - chunk_start)
+                    f.seek(chunk_start + delta)
+                    f.write(chunk)
+                    position = chunk_start
+            else:
+                # move the tail forwards starting from the front, then shrink
+                position = end
+                while position < size:
+                    f.seek(position)
+                    chunk = f.read(min(CHUNK_SIZE, size - position))
+                    f.seek(position + delta)
+                    f.write(chunk)
+                    position += len(chunk)
+                f.truncate(size + delta)
+            f.seek(start)
+            f.write(replacement)
+        # the replacement plus the shifted tail
+        instrumentation.count("bytes.written", len(replacement) + size - end)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Could not find {file_path}")
+    except PermissionError:
+        raise PermissionError(f"Could not write {file_path}")
+
+
+def patch_file_spans(
+    file_path: str, spans: List[Tuple[int, int]], replacement: bytes
+) -> None:
+    """
+    Replace several byte spans of a file with the same bytes, see patch_file_bytes.
+    Args:
+        file_path(str): path to the file to patch
+        spans(list[tuple(int, int)]): (start, end) offsets in ascending order
+        replacement(bytes): new bytes for every span
+    """
+    # patch from the bottom up so the offsets of earlier spans stay valid
+    for start, end in reversed(spans):
+        patch_file_bytes(file_path, start, end, replacement)
+
+
+def copy_file_contents(src, dst) -> None:
+    """
+    Append the whole content of src to dst at the current position of dst.
+    Uses os.copy_file_range or os.sendfile where available, so the data
+    is copied inside the kernel; falls back to fixed-size chunked copying.
+    Args:
+        src: file object opened for binary reading
+        dst: file object opened for binary writing, flushed
+    """
+    size = os.fstat(src.fileno()).st_size
+    offset = 0
+    for copy in (_copy_file_range, _sendfile):
+        try:
+            while offset < size:
+                copied = copy(src.fileno(), dst.fileno(), offset, size - offset)
+                if copied == 0:
+                    break
+                offset += copied
+            if offset >= size:
+                return
+        except (AttributeError, OSError):
+            # not supported for this platform or file system, try the next method
+            pass
+    src.seek(offset)
+    dst.seek(0, os.SEEK_END)
+    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    return os.copy_file_range(src_fd, dst_fd, min(count, CHUNK_SIZE), offset)
+
+
+def _sendfile(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    return os.sendfile(dst_fd, src_fd, offset, min(count, CHUNK_SIZE))
+
+
+def _staging_file(file_path: str):
+    directory = os.path.dirname(os.path.abspath(file_path))
+    prefix = f".{os.path.basename(file_path)}."
+    return tempfile.mkstemp(dir=directory, prefix=prefix, suffix=".tmp")
+
+
+def stage_content(file_path: str, content: bytes) -> str:
+    """
+    Write the new content of a file to a temp file next to it.
+    The temp file is not synced yet, see commit_staged.
+    Args:
+        file_path(str): file that will be replaced
+        content(bytes): its new content
+    Returns:
+        str: path to the temp file
+    """
+    fd, tmp_path = _staging_file(file_path)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            instrumentation.count("bytes.written", _written(f))
+        shutil.copymode(file_path, tmp_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+def stage_patched_copy(
+    file_path: str, spans: List[Tuple[int, int]], replacement: bytes
+) -> str:
+    """
+    Copy a large file to a temp file next to it and patch the copy.
+    The copy is made inside the kernel where possible, so the file
+    is never loaded into memory.
+    Args:
+        file_path(str): file that will be replaced
+        spans(list[tuple(int, int)]): byte spans to replace
+        replacement(bytes): new bytes for every span
+    Returns:
+        str: path to the temp file
+    """
+    fd, tmp_path = _staging_file(file_path)
+    try:
+        with os.fdopen(fd, "wb") as dst, open(file_path, "rb") as src:
+            copy_file_contents(src, dst)
+            instrumentation.count("bytes.written", _written(dst))
+        shutil.copymode(file_path, tmp_path)
+        patch_file_spans(tmp_path, spans, replacement)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+def discard_staged(staged: List[Tuple[str, str]]) -> None:
+    """
+    Remove staged temp files that were not committed.
+    Args:
+        staged(list[tuple(str, str)]): (temp path, target path) pairs
+    """
+    for tmp_path, _ in staged:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def commit_staged(
+    staged: List[Tuple[str, str]],
+    patches: Sequence[Tuple[str, List[Tuple[int, int]], bytes, bytes]] = (),
+) -> None:
+    """
+    Move staged temp files over their targets.
+    All temp files are synced first, in one batch, and only then renamed,
+    so a failure before the renames leaves every target untouched.
+    Changes that keep the length of a file are patched in place instead of
+    staged, after the sync; if one fails, the ones already made are undone.
+    Args:
+        staged(list[tuple(str, str)]): (temp path, target path) pairs
+        patches(list[tuple(str, list, bytes, bytes)]): (path, spans, old bytes,
+            new bytes) of files patched in place, old and new of equal length
+    """
+    try:
+        for tmp_path, _ in staged:
+            fd = os.open(tmp_path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        patched = []
+        try:
+            for patch in patches:
+                # recorded first: undoing a span that was not patched yet is a no-op
+                patched.append(patch)
+                file_path, spans, _, new = patch
+                patch_file_spans(file_path, spans, new)
+        except BaseException:
+            for file_path, spans, old, _ in reversed(patched):
+                patch_file_spans(file_path, spans, old)
+            raise
+        for tmp_path, target in staged:
+            os.replace(tmp_path, target)
+    finally:
+        discard_staged(staged)
+    _sync_directories({os.path.dirname(os.path.abspath(t)) for _, t in staged})
+
+
+def _sync_directories(directories) -> None:
+    # make the renames durable; not supported on every platform
+    for directory in directories:
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
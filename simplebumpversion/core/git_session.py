@@ -0,0 +1,667 @@
+"""
+Persistent git session.
+Refs (HEAD, tags, packed-refs) are read straight from the .git directory,
+objects are read through one long-lived `git cat-file --batch` process,
+and every result is memoized for the lifetime of the session.
+Only commands without a file-level equivalent spawn a git subprocess of their own.
+"""
+
+import os
+import re
+import subprocess
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from simplebumpversion.core import instrumentation
+
+# read size used when streaming the output of a git command
+STREAM_CHUNK_SIZE = 64 * 1024
+# describe follows at most this many commits before asking git describe
+DESCRIBE_WALK_LIMIT = 1000
+# describe peels at most this many tags through cat-file before asking git describe
+DESCRIBE_PEEL_LIMIT = 100
+
+# number of git subprocesses spawned by all sessions during the current run
+_subprocess_count = 0
+
+
+def get_subprocess_count() -> int:
+    """
+    Get the number of git subprocesses spawned so far.
+    Returns:
+        int: subprocess count since the process started
+    """
+    return _subprocess_count
+
+
+def count_subprocess() -> None:
+    """
+    Count a spawned git subprocess. Sessions count their own; code that runs
+    git in another way, e.g. the asyncio API, calls this so that
+    get_subprocess_count covers every git process of the run.
+    """
+    global _subprocess_count
+    _subprocess_count += 1
+    instrumentation.count("git.subprocesses")
+
+
+# a git config line: [section] or [section "subsection"], or key = value
+_CONFIG_SECTION = re.compile(r'\s*\[\s*([\w.-]+)(?:\s+"(?:[^"\\]|\\.)*")?\s*\]\s*(.*)')
+_CONFIG_ENTRY = re.compile(r"\s*([A-Za-z][\w-]*)\s*(?:=\s*(.*))?")
+
+
+def _config_value(raw: str) -> str:
+    # strip comments and unquote, as git does; escapes other than \" \\ \n \t are rejected
+    value = []
+    # length of the value without trailing unquoted whitespace
+    kept = 0
+    quoted = False
+    i = 0
+    while i < len(raw):
+        char = raw[i]
+        if char == '"':
+            quoted = not quoted
+            kept = len(value)
+        elif char in "#;" and not quoted:
+            break
+        elif char == "\\":
+            i += 1
+            escaped = raw[i : i + 1]
+            if escaped not in ('"', "\\", "n", "t"):
+                raise ValueError("unsupported escape in git config")
+            value.append({"n": "\n", "t": "\t"}.get(escaped, escaped))
+            kept = len(value)
+        else:
+            value.append(char)
+            if quoted or not char.isspace():
+                kept = len(value)
+        i += 1
+    if quoted:
+        raise ValueError("unterminated quote in git config")
+    return "".join(value[:kept])
+
+
+def read_git_config(path: str) -> Dict[str, str]:
+    """
+    Read the plain entries of one git config file.
+    Args:
+        path(str): config file, missing files are empty
+    Returns:
+        dict[str, str]: "section.key" (lowercase, no subsections) -> last value
+    Raises:
+        ValueError: the file has includes or syntax this reader does not
+            handle; ask git instead
+    """
+    entries: Dict[str, str] = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return entries
+    section = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped[0] in "#;":
+            continue
+        match = _CONFIG_SECTION.fullmatch(line)
+        if match is not None:
+            name = match.group(1).lower()
+            if name in ("include", "includeif"):
+                raise ValueError("git config includes other files")
+            section = None if '"' in line.split("]")[0] else name
+            line = match.group(2)
+            if not line.strip() or line.strip()[0] in "#;":
+                continue
+        match = _CONFIG_ENTRY.fullmatch(line)
+        if match is None or line.rstrip().endswith("\\"):
+            raise ValueError(f"cannot read git config line {line!r}")
+        if section is not None:
+            raw = match.group(2)
+            # a key without "=" is boolean true
+            value = "true" if raw is None else _config_value(raw)
+            entries[f"{section}.{match.group(1).lower()}"] = value
+    return entries
+
+
+def write_object_files(directory: str, contents: List[bytes]) -> bytes:
+    """
+    Write object contents to files for `git hash-object --stdin-paths`.
+    Args:
+        directory(str): existing directory to write the files to
+        contents(list[bytes]): content of every object
+    Returns:
+        bytes: the paths, one per line, to pass on stdin
+    """
+    paths = []
+    for i, data in enumerate(contents):
+        path = os.path.join(directory, str(i))
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    return "".join(f"{path}\n" for path in paths).encode()
+
+
+def ref_transaction(refs: List[Tuple[str, str]]) -> bytes:
+    """
+    Build the stdin of a `git update-ref --stdin` transaction that creates refs.
+    Args:
+        refs(list[tuple(str, str)]): full ref name and object id
+    Returns:
+        bytes: one create command per ref
+    """
+    return "".join(f"create {name} {oid}\n" for name, oid in refs).encode()
+
+
+def find_git_dir(path: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Locate the git directory of the repository containing path.
+    Handles worktrees and submodules, where .git is a file pointing elsewhere.
+    Args:
+        path(str): any directory inside the work tree
+    Returns:
+        tuple(str|None, str|None): the git dir holding HEAD and the common dir
+        holding refs and objects, (None, None) when path is not in a repository
+    """
+    git_dir = os.environ.get("GIT_DIR")
+    if git_dir is None:
+        current = os.path.abspath(path)
+        while True:
+            candidate = os.path.join(current, ".git")
+            if os.path.isdir(candidate):
+                git_dir = candidate
+                break
+            if os.path.isfile(candidate):
+                with open(candidate) as f:
+                    pointer = f.read().strip()
+                if pointer.startswith("gitdir:"):
+                    git_dir = os.path.join(current, pointer[len("gitdir:") :].strip())
+                    break
+            parent = os.path.dirname(current)
+            if parent == current:
+                return None, None
+            current = parent
+
+    common_dir = git_dir
+    commondir_file = os.path.join(git_dir, "commondir")
+    if os.path.isfile(commondir_file):
+        with open(commondir_file) as f:
+            common_dir = os.path.join(git_dir, f.read().strip())
+    return os.path.normpath(git_dir), os.path.normpath(common_dir)
+
+
+class GitSession:
+    """
+    A repository handle that answers tag, HEAD and object queries
+    with as few git processes as possible.
+    """
+
+    def __init__(self, path: str = "."):
+        self.work_tree = os.path.abspath(path)
+        self.git_dir, self.common_dir = find_git_dir(self.work_tree)
+        self._cat_file: Optional[subprocess.Popen] = None
+        self._run_cache: Dict[Tuple[str, ...], str] = {}
+        self._ref_cache: Dict[str, Optional[str]] = {}
+        self._packed_refs: Optional[Dict[str, Tuple[str, Optional[str]]]] = None
+        self._tags: Optional[Dict[str, str]] = None
+        self._commits: Dict[str, Tuple[List[str], int]] = {}
+        self._peeled: Dict[str, str] = {}
+        self._describe: Dict[str, Optional[str]] = {}
+
+    # -- subprocesses ----------------------------------------------------------
+
+    def run(self, args: List[str], cache: bool = True) -> str:
+        """
+        Run a git command in the work tree and return its stdout.
+        Args:
+            args(list[str]): git arguments, without the leading "git"
+            cache(bool): memoize the output for the rest of the session.
+                Commands that change the repository must pass False.
+        Returns:
+            str: stripped stdout
+        Raises:
+            subprocess.CalledProcessError: git exited with an error
+        """
+        key = tuple(args)
+        if cache and key in self._run_cache:
+            return self._run_cache[key]
+        count_subprocess()
+        output = (
+            subprocess.check_output(["git", *args], cwd=self.work_tree).decode().strip()
+        )
+        if cache:
+            self._run_cache[key] = output
+        return output
+
+    def stream(self, args: List[str], separator: bytes = b"\n") -> Iterator[bytes]:
+        """
+        Run a git command and yield its output record by record as it is produced.
+        Only one chunk and one partial record are held in memory at a time.
+        The git process is stopped if the caller stops iterating early.
+        Args:
+            args(list[str]): git arguments, without the leading "git"
+            separator(bytes): record separator of the output
+        Yields:
+            bytes: one record, without the separator
+        Raises:
+            subprocess.CalledProcessError: git exited with an error
+        """
+        count_subprocess()
+        process = subprocess.Popen(
+            ["git", *args], cwd=self.work_tree, stdout=subprocess.PIPE
+        )
+        finished = False
+        try:
+            pending = b""
+            while True:
+                chunk = process.stdout.read1(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                records = (pending + chunk).split(separator)
+                pending = records.pop()
+                yield from records
+            if pending.strip():
+                yield pending
+            finished = True
+        finally:
+            if not finished:
+                process.kill()
+            process.stdout.close()
+            returncode = process.wait()
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, ["git", *args])
+
+    def read_object(self, oid: str) -> Tuple[str, bytes]:
+        """
+        Read a git object through the long-lived `git cat-file --batch` process.
+        Args:
+            oid(str): object id
+        Returns:
+            tuple(str, bytes): object type and raw content
+        Raises:
+            KeyError: the object does not exist
+        """
+        if self._cat_file is None:
+            count_subprocess()
+            self._cat_file = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=self.work_tree,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+        instrumentation.count("git.objects")
+        self._cat_file.stdin.write(oid.encode() + b"\n")
+        self._cat_file.stdin.flush()
+        header = self._cat_file.stdout.readline().split()
+        if len(header) != 3:
+            raise KeyError(f"git object {oid} not found")
+        size = int(header[2])
+        data = self._cat_file.stdout.read(size + 1)[:size]
+        return header[1].decode(), data
+
+    def close(self) -> None:
+        """Stop the cat-file process, if one was started"""
+        if self._cat_file is not None:
+            self._cat_file.stdin.close()
+            self._cat_file.wait()
+            self._cat_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- refs ------------------------------------------------------------------
+
+    @property
+    def refs_readable(self) -> bool:
+        """True if refs are stored as files, i.e. not in a reftable"""
+        return self.git_dir is not None and not os.path.isdir(
+            os.path.join(self.common_dir, "reftable")
+        )
+
+    def invalidate_refs(self) -> None:
+        """Forget cached refs, e.g. after a tag was created"""
+        self._ref_cache.clear()
+        self._packed_refs = None
+        self._tags = None
+        self._describe.clear()
+        self._run_cache.clear()
+
+    def packed_refs(self) -> Dict[str, Tuple[str, Optional[str]]]:
+        """
+        Parse the packed-refs file.
+        When the file is written with the "peeled" trait, as git does, every
+        annotated tag has its peeled oid and the other tags are their own.
+        Returns:
+            dict[str, tuple(str, str|None)]: ref name -> (oid, peeled oid)
+        """
+        if self._packed_refs is None:
+            self._packed_refs = {}
+            path = os.path.join(self.common_dir, "packed-refs")
+            if os.path.isfile(path):
+                with open(path) as f:
+                    last = None
+                    peeled_trait = False
+                    for line in f:
+                        if line.startswith("# pack-refs with:"):
+                            peeled_trait = "peeled" in line.split(":", 1)[1].split()
+                            continue
+                        if line.startswith("#"):
+                            continue
+                        if line.startswith("^"):
+                            if last is not None:
+                                oid = self._packed_refs[last][0]
+                                self._packed_refs[last] = (oid, line[1:].strip())
+                            continue
+                        oid, name = line.split()
+                        tag = peeled_trait and name.startswith("refs/tags/")
+                        self._packed_refs[name] = (oid, oid if tag else None)
+                        last = name
+        return self._packed_refs
+
+    def resolve_ref(self, name: str) -> Optional[str]:
+        """
+        Resolve a ref (HEAD, refs/heads/main, refs/tags/v1.0.0) to an object id.
+        Symbolic refs are followed.
+        Returns:
+            str|None: object id, None if the ref does not exist
+        """
+        if name in self._ref_cache:
+            return self._ref_cache[name]
+        oid = None
+        base = self.git_dir if name == "HEAD" else self.common_dir
+        path = os.path.join(base, *name.split("/"))
+        if os.path.isfile(path):
+            with open(path) as f:
+                value = f.read().strip()
+            if value.startswith("ref:"):
+                oid = self.resolve_ref(value[len("ref:") :].strip())
+            else:
+                oid = value
+        elif name in self.packed_refs():
+            oid = self.packed_refs()[name][0]
+        self._ref_cache[name] = oid
+        return oid
+
+    def head(self) -> Optional[str]:
+        """
+        Returns:
+            str|None: commit id of HEAD, None in an empty repository
+        """
+        if not self.refs_readable:
+            try:
+                return self.run(["rev-parse", "--verify", "-q", "HEAD"]) or None
+            except subprocess.CalledProcessError:
+                return None
+        return self.resolve_ref("HEAD")
+
+    def config_files(self) -> List[str]:
+        """
+        Returns:
+            list[str]: the config files git reads, lowest precedence first
+        Raises:
+            ValueError: config is also given on the command line or through
+                GIT_CONFIG, which only git itself can read
+        """
+        if any(
+            key in os.environ
+            for key in ("GIT_CONFIG", "GIT_CONFIG_COUNT", "GIT_CONFIG_PARAMETERS")
+        ):
+            raise ValueError("git config is given in the environment")
+        files = []
+        if not os.environ.get("GIT_CONFIG_NOSYSTEM"):
+            files.append(os.environ.get("GIT_CONFIG_SYSTEM", "/etc/gitconfig"))
+        if "GIT_CONFIG_GLOBAL" in os.environ:
+            files.append(os.environ["GIT_CONFIG_GLOBAL"])
+        else:
+            home = os.path.expanduser("~")
+            xdg = os.environ.get("XDG_CONFIG_HOME") or os.path.join(home, ".config")
+            files.append(os.path.join(xdg, "git", "config"))
+            files.append(os.path.join(home, ".gitconfig"))
+        if self.git_dir is not None:
+            files.append(os.path.join(self.common_dir, "config"))
+            files.append(os.path.join(self.git_dir, "config.worktree"))
+        return files
+
+    def committer_ident(self) -> str:
+        """
+        Get the committer identity of new objects, as `git var GIT_COMMITTER_IDENT`
+        prints it: "Name <email> timestamp +zone".
+        Name and email come from GIT_COMMITTER_NAME/EMAIL or the committer.* and
+        user.* entries of the config files, the date is now. git var is only
+        run when that is not enough: a GIT_COMMITTER_DATE, config includes or
+        config options in the environment, or no configured identity.
+        Returns:
+            str: the identity
+        Raises:
+            subprocess.CalledProcessError: git has no identity either
+        """
+        try:
+            if "GIT_COMMITTER_DATE" in os.environ:
+                raise ValueError("git parses the committer date")
+            config: Dict[str, str] = {}
+            for path in self.config_files():
+                config.update(read_git_config(path))
+            name = os.environ.get("GIT_COMMITTER_NAME") or config.get(
+                "committer.name", config.get("user.name")
+            )
+            email = os.environ.get("GIT_COMMITTER_EMAIL") or config.get(
+                "committer.email", config.get("user.email", os.environ.get("EMAIL"))
+            )
+            if not name or not email:
+                raise ValueError("no identity configured")
+            if any(char in name + email for char in "<>\n"):
+                raise ValueError("git cleans up this identity")
+        except (OSError, UnicodeDecodeError, ValueError):
+            return self.run(["var", "GIT_COMMITTER_IDENT"], cache=False)
+        now = time.time()
+        offset = time.localtime(now).tm_gmtoff // 60
+        sign = "-" if offset < 0 else "+"
+        zone = f"{sign}{abs(offset) // 60:02d}{abs(offset) % 60:02d}"
+        return f"{name} <{email}> {int(now)} {zone}"
+
+    def tags(self) -> Dict[str, str]:
+        """
+        Read every tag in one pass over packed-refs and the loose tag refs.
+        Returns:
+            dict[str, str]: tag name -> object id the tag ref points to
+        """
+        if self._tags is not None:
+            return self._tags
+        tags = {}
+        if self.refs_readable:
+            for name, (oid, peeled) in self.packed_refs().items():
+                if name.startswith("refs/tags/"):
+                    tags[name[len("refs/tags/") :]] = oid
+                    if peeled:
+                        self._peeled[oid] = peeled
+            tags_dir = os.path.join(self.common_dir, "refs", "tags")
+            for root, _, files in os.walk(tags_dir):
+                for file in files:
+                    path = os.path.join(root, file)
+                    name = os.path.relpath(path, tags_dir).replace(os.sep, "/")
+                    with open(path) as f:
+                        tags[name] = f.read().strip()
+        elif self.git_dir is not None:
+            output = self.run(["for-each-ref", "--format=%(objectname) %(refname)"])
+            for line in output.splitlines():
+                oid, name = line.split(" ", 1)
+                if name.startswith("refs/tags/"):
+                    tags[name[len("refs/tags/") :]] = oid
+        self._tags = tags
+        return tags
+
+    # -- objects ---------------------------------------------------------------
+
+    def peel(self, oid: str) -> str:
+        """
+        Follow annotated tag objects down to the object they point to.
+        Returns:
+            str: id of the first non-tag object, usually a commit
+        """
+        if oid in self._peeled:
+            return self._peeled[oid]
+        target = oid
+        object_type, data = self.read_object(target)
+        while object_type == "tag":
+            target = data.split(b"\n", 1)[0].split()[1].decode()
+            object_type, data = self.read_object(target)
+        self._peeled[oid] = target
+        return target
+
+    def commit(self, oid: str) -> Tuple[List[str], int]:
+        """
+        Read a commit header.
+        Returns:
+            tuple(list[str], int): parent ids and committer timestamp
+        """
+        if oid in self._commits:
+            return self._commits[oid]
+        _, data = self.read_object(oid)
+        parents = []
+        timestamp = 0
+        for line in data.split(b"\n"):
+            if not line:
+                break
+            if line.startswith(b"parent "):
+                parents.append(line[len(b"parent ") :].decode())
+            elif line.startswith(b"committer "):
+                timestamp = int(line.rsplit(b" ", 2)[1])
+        self._commits[oid] = (parents, timestamp)
+        return parents, timestamp
+
+    def describe(self, rev: str = "HEAD") -> Optional[str]:
+        """
+        Find the tag nearest to rev, like `git describe --tags --abbrev=0`.
+        While history is linear, commits are followed from the object store up
+        to the first tagged one. Git's distance across merges counts every
+        commit not reachable from the tag, so once a merge is reached, or a
+        commit has several tags, git describe itself is asked. So it is when
+        more than DESCRIBE_WALK_LIMIT commits would be read, or more than
+        DESCRIBE_PEEL_LIMIT tags are not peeled in packed-refs.
+        Args:
+            rev(str): ref to start from
+        Returns:
+            str|None: tag name, None if no tag is reachable
+        """
+        if rev in self._describe:
+            return self._describe[rev]
+        result = None
+        oid = self.head() if rev == "HEAD" else self.resolve_ref(rev)
+        tags = self.tags()
+        unpeeled = sum(tag_oid not in self._peeled for tag_oid in tags.values())
+        if oid is not None and unpeeled > DESCRIBE_PEEL_LIMIT:
+            result = self._git_describe(rev)
+        elif oid is not None and tags:
+            tagged: Dict[str, List[str]] = {}
+            for name, tag_oid in tags.items():
+                tagged.setdefault(self.peel(tag_oid), []).append(name)
+            for _ in range(DESCRIBE_WALK_LIMIT):
+                names = tagged.get(oid, ())
+                parents = self.commit(oid)[0]
+                if len(names) == 1:
+                    result = names[0]
+                    break
+                if names or len(parents) > 1:
+                    result = self._git_describe(rev)
+                    break
+                if not parents:
+                    break
+                oid = parents[0]
+            else:
+                result = self._git_describe(rev)
+        self._describe[rev] = result
+        return result
+
+    def _git_describe(self, rev: str) -> Optional[str]:
+        count_subprocess()
+        try:
+            output = subprocess.check_output(
+                ["git", "describe", "--tags", "--abbrev=0", rev],
+                cwd=self.work_tree,
+                stderr=subprocess.DEVNULL,
+            )
+        except subprocess.CalledProcessError:
+            return None
+        return output.decode().strip() or None
+
+    def has_commits_since(self, tag: Optional[str], reachable: bool = False) -> bool:
+        """
+        Check if HEAD has commits that are not in tag, without listing them.
+        For a tag reachable from HEAD (as returned by describe) this is a
+        constant-time comparison of the tagged commit with HEAD.
+        Otherwise git is asked for at most one commit of tag..HEAD.
+        Args:
+            tag(str|None): tag name, None means "any commit at all"
+            reachable(bool): the caller knows the tag is an ancestor of HEAD
+        Returns:
+            bool: True if there is at least one commit since tag
+        """
+        head = self.head()
+        if head is None:
+            return False
+        if tag is None:
+            return True
+        oid = self.tags().get(tag)
+        if oid is not None and self.peel(oid) == head:
+            return False
+        if oid is not None and reachable:
+            return True
+        output = self.run(["rev-list", "--max-count=1", f"{tag}..HEAD"])
+        return bool(output)
+
+    # -- writing ---------------------------------------------------------------
+
+    def write_objects(self, object_type: str, contents: List[bytes]) -> List[str]:
+        """
+        Write objects into the object database with one `git hash-object` call.
+        Git checks every object, uses the repository's object format and
+        honours core.sharedRepository and alternates.
+        Args:
+            object_type(str): "blob", "tree", "commit" or "tag"
+            contents(list[bytes]): content of every object
+        Returns:
+            list[str]: object ids, in input order
+        Raises:
+            subprocess.CalledProcessError: git rejected an object
+            OSError: the contents could not be handed to git
+        """
+        import tempfile
+
+        if not contents:
+            return []
+        with tempfile.TemporaryDirectory(prefix="bump-version-") as directory:
+            paths = write_object_files(directory, contents)
+            count_subprocess()
+            process = subprocess.run(
+                ["git", "hash-object", "-w", "-t", object_type, "--stdin-paths"],
+                cwd=self.work_tree,
+                input=paths,
+                check=True,
+                capture_output=True,
+            )
+        oids = process.stdout.decode().split()
+        instrumentation.count("git.objects.written", len(oids))
+        return oids
+
+    def create_refs(self, refs: List[Tuple[str, str]]) -> None:
+        """
+        Create refs in one `git update-ref --stdin` transaction: either all of
+        them are created or none, e.g. if one of them already exists.
+        Args:
+            refs(list[tuple(str, str)]): full ref name and object id
+        Raises:
+            subprocess.CalledProcessError: the transaction failed
+        """
+        count_subprocess()
+        try:
+            subprocess.run(
+                ["git", "update-ref", "--stdin"],
+                cwd=self.work_tree,
+                input=ref_transaction(refs),
+                check=True,
+                capture_output=True,
+            )
+        finally:
+            self.invalidate_refs()
@@ -1,4 +1,100 @@
+import atexit
+import os
 import subprocess
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from simplebumpversion.core import instrumentation
+from simplebumpversion.core.git_session import GitSession, get_subprocess_count
+
+if TYPE_CHECKING:
+    from simplebumpversion.core.tag_index import TagIndex
+
+# git log format of one commit: short hash, subject and body, with a record separator
+_LOG_FORMAT = "--format=%h%x1f%s%x1f%b%x1e"
+
+# one session per work tree, kept for the whole run
+_sessions: Dict[str, GitSession] = {}
+# one tag index per work tree, built on first use
+_tag_indexes: Dict[str, "TagIndex"] = {}
+
+
+def get_session(path: Optional[str] = None) -> GitSession:
+    """
+    Get the git session for a work tree, creating it on first use.
+    Args:
+        path(str|None): directory inside the work tree, defaults to the current directory
+    Returns:
+        GitSession: session shared by all git helpers for that directory
+    """
+    key = os.path.abspath(path or os.getcwd())
+    if key not in _sessions:
+        _sessions[key] = GitSession(key)
+    return _sessions[key]
+
+
+def close_sessions() -> None:
+    """Close every open git session and forget cached repository state"""
+    for session in _sessions.values():
+        session.close()
+    _sessions.clear()
+    _tag_indexes.clear()
+
+
+atexit.register(close_sessions)
+
+
+def refresh_sessions() -> None:
+    """
+    Forget cached refs and command output of every session, keeping the
+    cat-file processes and the (immutable) object caches warm.
+    Used by long-running callers before each request.
+    """
+    for session in _sessions.values():
+        session.invalidate_refs()
+    # tag indexes only parse the tags created or deleted in the meantime
+    for index in _tag_indexes.values():
+        index.refresh()
+
+
+def get_tag_index(path: Optional[str] = None) -> "TagIndex":
+    """
+    Get the semantic version tag index of a work tree, building it on first use.
+    Args:
+        path(str|None): directory inside the work tree, defaults to the current directory
+    Returns:
+        TagIndex: index over every tag of the repository
+    """
+    from simplebumpversion.core.tag_index import TagIndex
+
+    session = get_session(path)
+    if session.work_tree not in _tag_indexes:
+        with instrumentation.span("git"):
+            _tag_indexes[session.work_tree] = TagIndex(session)
+    return _tag_indexes[session.work_tree]
+
+
+def get_highest_git_tag(package: str = "") -> Optional[str]:
+    """
+    Get the tag of the highest version, unlike get_latest_git_tag which
+    returns the nearest tag reachable from HEAD.
+    Args:
+        package(str): package name of prefixed tags ("api" for api-1.2.3), "" for plain tags
+    Returns:
+        str|None: tag name, None if there is no version tag
+    """
+    return get_tag_index().latest(package)
+
+
+def is_version_tagged(version: str, package: str = "") -> bool:
+    """
+    Check if a version already has a tag, with or without "v" prefix.
+    Args:
+        version(str): version, e.g. "1.2.3"
+        package(str): package name of prefixed tags, "" for plain tags
+    Returns:
+        bool: True if the version is tagged
+    """
+    return get_tag_index().is_tagged(version, package)
 
 
 def get_git_version() -> str:
@@ -14,54 +110,126 @@ def get_git_version() -> str:
     Raises:
         ValueError: git tag is not found locally
     """
-    try:
-        # Get the most recent tag
-        result = subprocess.run(
-            ["git", "describe", "--tags", "--abbrev=0"],
-            check=True,
-            capture_output=True,
-            text=True,
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError:
+    tag = get_latest_git_tag()
+    if tag is None:
         raise ValueError("Error occured when reading the git tag")
+    return tag
 
 
 def update_git_tag(new_version, msg=None):
+    return create_git_tags([(new_version, msg)])
+
+
+def _tag_message(msg: str) -> str:
+    # the whitespace cleanup `git tag -m` applies
+    lines = [line.rstrip() for line in msg.strip("\n").splitlines()]
+    return "\n".join(lines).strip() + "\n"
+
+
+def tag_objects(
+    target: str, tags: List[Tuple[str, Optional[str]]], tagger: str
+) -> List[bytes]:
+    """
+    Build the content of annotated tag objects, as `git tag -a` writes them.
+    Args:
+        target(str): commit to tag
+        tags(list[tuple(str, str|None)]): tag name and message of every tag,
+            "Tag <name>" if the message is None
+        tagger(str): identity line, see GitSession.committer_ident
+    Returns:
+        list[bytes]: one tag object per tag, in input order
+    """
+    return [
+        (
+            f"object {target}\ntype commit\ntag {name}\n"
+            f"tagger {tagger}\n\n" + _tag_message(f"Tag {name}" if msg is None else msg)
+        ).encode()
+        for name, msg in tags
+    ]
+
+
+def create_git_tags(tags: List[Tuple[str, Optional[str]]]) -> bool:
+    """
+    Create annotated tags on HEAD, all of them or none.
+    The tag objects are written by one `git hash-object` call and the refs
+    are published in one `git update-ref --stdin` transaction, so a release
+    takes two git processes however many tags it has. The tagger identity is
+    read from the environment and config files, see GitSession.committer_ident.
+    Args:
+        tags(list[tuple(str, str|None)]): tag name and message of every tag,
+            "Tag <name>" if the message is None
+    Returns:
+        bool: True if the tags were created
+    """
+    session = get_session()
+    names = [name for name, _ in tags]
     try:
-        if msg is not None:
-            subprocess.run(["git", "tag", "-a", new_version, "-m", msg], check=True)
-        else:
-            subprocess.run(
-                ["git", "tag", "-a", new_version, "-m", f"Tag {new_version}"],
-                check=True,
+        with instrumentation.span("tag"):
+            target = session.head()
+            if target is None:
+                raise ValueError("there is no commit to tag")
+            objects = tag_objects(target, tags, session.committer_ident())
+            oids = session.write_objects("tag", objects)
+            session.create_refs(
+                [(f"refs/tags/{name}", oid) for name, oid in zip(names, oids)]
             )
-        print(f"Tag '{new_version}' created successfully.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error: Failed to create git tag '{new_version}'.")
-        print(e)
+    except (subprocess.CalledProcessError, OSError, ValueError) as e:
+        print(f"Error: Failed to create git tag '{', '.join(names)}'.")
+        stderr = getattr(e, "stderr", None)
+        print(stderr.decode().strip() if stderr else e)
+        return False
+    if session.work_tree in _tag_indexes:
+        for name in names:
+            _tag_indexes[session.work_tree].add(name)
+    for name in names:
+        print(f"Tag '{name}' created successfully.")
+    return True
 
 
 def get_latest_git_tag():
     try:
-        return (
-            subprocess.check_output(["git", "describe", "--tags", "--abbrev=0"])
-            .decode()
-            .strip()
-        )
-    except subprocess.CalledProcessError:
+        with instrumentation.span("git"):
+            return get_session().describe()
+    except (KeyError, OSError, ValueError):
         return None
 
 
+class Commit(NamedTuple):
+    """A commit as read from the git log stream"""
+
+    short_hash: str
+    subject: str
+    body: str
+
+    def oneline(self) -> str:
+        return f"{self.short_hash} {self.subject}"
+
+
+def iter_commits_since_tag(tag, path=None) -> Iterator[Commit]:
+    """
+    Stream the commits made since tag, newest first.
+    The git log output is read incrementally, one commit at a time.
+    Args:
+        tag(str|None): tag to start from, None for the whole history of HEAD
+        path(str|None): only list the commits that touched this path
+    Yields:
+        Commit: short hash, subject and body of each commit
+    Raises:
+        subprocess.CalledProcessError: git log failed
+    """
+    log_range = f"{tag}..HEAD" if tag else "HEAD"
+    command = ["log", log_range, _LOG_FORMAT]
+    if path is not None:
+        command += ["--", path]
+    for record in get_session().stream(command, b"\x1e"):
+        short_hash, subject, body = record.decode(errors="replace").split("\x1f", 2)
+        yield Commit(short_hash.strip(), subject, body.strip())
+
+
 def get_commits_since_tag(tag):
     try:
-        log_range = f"{tag}..HEAD" if tag else "HEAD"
-        output = (
-            subprocess.check_output(["git", "log", log_range, "--oneline"])
-            .decode()
-            .strip()
-        )
-        commits = output.splitlines()
+        with instrumentation.span("git"):
+            commits = [commit.oneline() for commit in iter_commits_since_tag(tag)]
         result = "\n".join(commits) if commits else None
         return result
     except subprocess.CalledProcessError:
@@ -69,9 +237,22 @@ def get_commits_since_tag(tag):
 
 
 def if_any_updates():
+    """
+    Check if there are commits since the latest tag.
+    Compares the tagged commit with HEAD instead of listing the commits,
+    so the cost does not depend on how deep the history is.
+    Returns:
+        bool: True if HEAD is not the tagged commit
+    """
     last_tag = get_latest_git_tag()
-    commits = get_commits_since_tag(last_tag)
-    return True if commits else False
+    try:
+        with instrumentation.span("git"):
+            return get_session().has_commits_since(last_tag, reachable=True)
+    except (KeyError, OSError, ValueError):
+        return False
+    except subprocess.CalledProcessError:
+        print("Error while fetching commits since last tag")
+        return False
 
 
 if __name__ == "__main__":
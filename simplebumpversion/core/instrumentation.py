@@ -0,0 +1,223 @@
+"""
+Per-phase timings and counters.
+Code paths wrap their phases in `span("name")` and report quantities with
+`count("name", amount)`. Nothing is recorded until `enable()` is called
+(the --timings flag) or a hook is added, so the disabled cost is a flag check.
+
+Hooks forward the same data to an external tracer:
+- a span hook is called with the phase name and returns a context manager
+  that is entered around the phase, e.g. an OpenTelemetry tracer's
+  `start_as_current_span`;
+- a counter hook is called with the counter name and the amount.
+
+Phases that run on worker threads (file reads and scans while planning)
+add up the time of every thread, so they can exceed the wall-clock total.
+"""
+
+import sys
+import threading
+import time
+from typing import Callable, ContextManager, Dict, List
+
+# phases in the order they are reported
+PHASES = (
+    "config",
+    "discover",
+    "read",
+    "scan",
+    "git",
+    "write",
+    "changelog",
+    "tag",
+    "total",
+)
+
+SpanHook = Callable[[str], ContextManager]
+CounterHook = Callable[[str, int], None]
+
+_lock = threading.Lock()
+_enabled = False
+# recording is on if enabled or any hook is registered
+_active = False
+# phase name -> [calls, seconds]
+_phases: Dict[str, List[float]] = {}
+_counters: Dict[str, int] = {}
+_span_hooks: List[SpanHook] = []
+_counter_hooks: List[CounterHook] = []
+
+
+def _update_active() -> None:
+    global _active
+    _active = _enabled or bool(_span_hooks) or bool(_counter_hooks)
+
+
+def enable() -> None:
+    """Start recording timings and counters"""
+    global _enabled
+    _enabled = True
+    _update_active()
+
+
+def disable() -> None:
+    """Stop recording; hooks stay registered"""
+    global _enabled
+    _enabled = False
+    _update_active()
+
+
+def reset() -> None:
+    """Forget everything recorded so far"""
+    with _lock:
+        _phases.clear()
+        _counters.clear()
+
+
+def add_span_hook(hook: SpanHook) -> None:
+    """
+    Register a hook entered around every phase.
+    Args:
+        hook(callable): called with the phase name, returns a context manager
+    """
+    _span_hooks.append(hook)
+    _update_active()
+
+
+def remove_span_hook(hook: SpanHook) -> None:
+    _span_hooks.remove(hook)
+    _update_active()
+
+
+def add_counter_hook(hook: CounterHook) -> None:
+    """
+    Register a hook called for every counter update.
+    Args:
+        hook(callable): called with the counter name and the amount added
+    """
+    _counter_hooks.append(hook)
+    _update_active()
+
+
+def remove_counter_hook(hook: CounterHook) -> None:
+    _counter_hooks.remove(hook)
+    _update_active()
+
+
+class _Span:
+    __slots__ = ("name", "start", "hooks")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.hooks = [hook(self.name) for hook in _span_hooks]
+        for hook in self.hooks:
+            hook.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        if _enabled:
+            with _lock:
+                phase = _phases.setdefault(self.name, [0, 0.0])
+                phase[0] += 1
+                phase[1] += elapsed
+        for hook in reversed(self.hooks):
+            hook.__exit__(*exc)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str) -> ContextManager:
+    """
+    Time a phase.
+    Args:
+        name(str): phase name, see PHASES
+    Returns:
+        context manager recording the time spent inside it
+    """
+    if not _active:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """
+    Add to a counter.
+    Args:
+        name(str): counter name, e.g. "bytes.read"
+        amount(int): value to add
+    """
+    if not _active:
+        return
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + amount
+    for hook in _counter_hooks:
+        hook(name, amount)
+
+
+def snapshot() -> dict:
+    """
+    Get everything recorded so far.
+    Returns:
+        dict: {"phases": {name: {"calls": int, "seconds": float}}, "counters": {name: int}}
+    """
+    with _lock:
+        order = {name: i for i, name in enumerate(PHASES)}
+        names = sorted(_phases, key=lambda name: (order.get(name, len(PHASES)), name))
+        return {
+            "phases": {
+                name: {"calls": _phases[name][0], "seconds": _phases[name][1]}
+                for name in names
+            },
+            "counters": dict(sorted(_counters.items())),
+        }
+
+
+def format_table(data: dict) -> str:
+    """
+    Format a snapshot as a plain text table.
+    Args:
+        data(dict): output of snapshot()
+    Returns:
+        str: one line per phase and per counter
+    """
+    lines = [f"{'phase':<12}{'calls':>8}{'ms':>12}"]
+    for name, phase in data["phases"].items():
+        lines.append(f"{name:<12}{phase['calls']:>8}{phase['seconds'] * 1000:>12.2f}")
+    if data["counters"]:
+        lines.append("")
+        lines.append(f"{'counter':<20}{'value':>12}")
+        for name, value in data["counters"].items():
+            lines.append(f"{name:<20}{value:>12}")
+    return "\n".join(lines)
+
+
+def report(output_format: str = "table", stream=None) -> None:
+    """
+    Print everything recorded so far.
+    Args:
+        output_format(str): "table" or "json"
+        stream: file to print to, defaults to stderr so stdout stays clean
+    """
+    data = snapshot()
+    stream = stream or sys.stderr
+    if output_format == "json":
+        import json
+
+        print(json.dumps(data), file=stream)
+    else:
+        print(format_table(data), file=stream)
@@ -0,0 +1,301 @@
+"""
+Format-aware version locators.
+Some files have one canonical version field and many other values that look
+like versions: dependency entries of a lockfile, tool settings in pyproject.toml.
+For those formats a locator walks the file structure with a small streaming
+tokenizer and stops at the canonical field, so only that field is reported
+and updated, and the cost does not depend on what follows it:
+- pyproject.toml: `version` in [project] or [tool.poetry]
+- package.json, package-lock.json, npm-shrinkwrap.json: the top-level "version" key
+- setup.cfg: `version` in [metadata]
+Other files, and files whose locator finds no field, use the generic scanner.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+from simplebumpversion.core import instrumentation
+from simplebumpversion.core.scanner import Buffer, VersionMatch, scan_versions
+
+# TOML tables that hold the package version, by file name
+TOML_TABLES = {"pyproject.toml": ("project", "tool.poetry")}
+# INI sections that hold the package version, by file name
+CFG_SECTIONS = {"setup.cfg": ("metadata",)}
+# JSON files with the package version as top-level key
+JSON_FILES = ("package.json", "package-lock.json", "npm-shrinkwrap.json")
+
+_VALUE = r"[\w\.\-\+]+"
+_SEMANTIC = r"\d+\.\d+\.\d+"
+# table header, [[array tables]] are matched so they end the current table
+_TOML_TABLE = r"[ \t]*\[(?P<array>\[)?[ \t]*(?P<name>[^\[\]\r\n]+?)[ \t]*\]"
+_TOML_VERSION = (
+    r"[ \t]*version[ \t]*=[ \t]*(?P<quote>[\"'])(?P<value>" + _VALUE + r")(?P=quote)"
+)
+_CFG_SECTION = r"\[[ \t]*(?P<name>[^\]\r\n]+?)[ \t]*\]"
+_CFG_VERSION = r"version[ \t]*[=:][ \t]*(?P<value>" + _VALUE + r")[ \t\r]*(?:[#;].*)?$"
+# a JSON string or a structural character; numbers and literals are skipped
+_JSON_TOKEN = r'"(?:[^"\\]|\\.)*"|[{}\[\]:,]'
+
+
+def _compile(pattern: str, binary: bool, flags: int = 0) -> "re.Pattern":
+    return re.compile(pattern.encode() if binary else pattern, flags)
+
+
+def _patterns(binary: bool) -> dict:
+    return {
+        "toml_table": _compile(_TOML_TABLE, binary),
+        "toml_version": _compile(_TOML_VERSION, binary),
+        "cfg_section": _compile(_CFG_SECTION, binary),
+        "cfg_version": _compile(_CFG_VERSION, binary, re.MULTILINE),
+        "json_token": _compile(_JSON_TOKEN, binary),
+        "semantic": _compile(_SEMANTIC, binary),
+        "newline": b"\n" if binary else "\n",
+        "triple_quotes": (b'"""', b"'''") if binary else ('"""', "'''"),
+        "version_key": b'"version"' if binary else '"version"',
+        "json_open": (b"{", b"[") if binary else ("{", "["),
+        "json_close": (b"}", b"]") if binary else ("}", "]"),
+        "json_punctuation": (b"{", b",", b":") if binary else ("{", ",", ":"),
+    }
+
+
+_STR = _patterns(False)
+_BYTES = _patterns(True)
+
+
+def _to_match(match: "re.Match", kind: str, tokens: dict) -> VersionMatch:
+    version = match.group("value")
+    return VersionMatch(
+        version,
+        match.start("value"),
+        match.end("value"),
+        kind,
+        tokens["semantic"].fullmatch(version) is not None,
+    )
+
+
+@lru_cache(maxsize=None)
+def _literal(sub) -> "re.Pattern":
+    return re.compile(re.escape(sub))
+
+
+def _find(content: Buffer, sub, start: int, end: int) -> int:
+    # memoryview has no find; a literal pattern searches it without a copy
+    if isinstance(content, memoryview):
+        match = _literal(sub).search(content, start, end)
+        return -1 if match is None else match.start()
+    return content.find(sub, start, end)
+
+
+def _lines(content: Buffer, start: int, end: int, newline):
+    """Yield (line start, line end) offsets, one line at a time"""
+    position = start
+    while position < end:
+        line_end = _find(content, newline, position, end)
+        if line_end == -1:
+            line_end = end
+        yield position, line_end
+        position = line_end + 1
+
+
+def count_occurrences(content: Buffer, sub, start: int, end: int) -> int:
+    """
+    Count the non-overlapping occurrences of sub in content[start:end].
+    Works on bytes, str, mmap and memoryview; mmap has find but no count.
+    """
+    found = 0
+    position = _find(content, sub, start, end)
+    while position != -1:
+        found += 1
+        position = _find(content, sub, position + len(sub), end)
+    return found
+
+
+def _table_name(name) -> str:
+    if not isinstance(name, str):
+        name = name.decode(errors="replace")
+    # tool . "poetry" -> tool.poetry
+    return ".".join(part.strip().strip("\"'") for part in name.split("."))
+
+
+def locate_toml_version(
+    content: Buffer, tables, start: int = 0, end: Optional[int] = None
+) -> Optional[VersionMatch]:
+    """
+    Find the version key of the first of the given TOML tables that has one.
+    Lines inside multi-line strings are skipped.
+    Args:
+        content(str|bytes|memoryview|mmap): TOML document
+        tables(tuple[str]): dotted table names, e.g. ("project", "tool.poetry")
+        start(int): offset to start at
+        end(int|None): offset to stop at, defaults to the end of the buffer
+    Returns:
+        VersionMatch|None: the version field, None if none of the tables has one
+    """
+    tokens = _STR if isinstance(content, str) else _BYTES
+    end = len(content) if end is None else end
+    in_table = False
+    open_quotes = None
+    for line_start, line_end in _lines(content, start, end, tokens["newline"]):
+        if open_quotes is not None:
+            if _find(content, open_quotes, line_start, line_end) != -1:
+                open_quotes = None
+            continue
+        header = tokens["toml_table"].match(content, line_start, line_end)
+        if header is not None:
+            in_table = not header.group("array") and (
+                _table_name(header.group("name")) in tables
+            )
+            continue
+        if in_table:
+            match = tokens["toml_version"].match(content, line_start, line_end)
+            if match is not None:
+                return _to_match(match, "toml", tokens)
+        for quotes in tokens["triple_quotes"]:
+            # an odd number of triple quotes opens a multi-line string
+            if count_occurrences(content, quotes, line_start, line_end) % 2:
+                open_quotes = quotes
+                break
+    return None
+
+
+def locate_cfg_version(
+    content: Buffer, sections, start: int = 0, end: Optional[int] = None
+) -> Optional[VersionMatch]:
+    """
+    Find a literal version in the given sections of an INI file (setup.cfg).
+    Indirect values such as `attr: package.__version__` are not versions.
+    Args:
+        content(str|bytes|memoryview|mmap): INI document
+        sections(tuple[str]): section names, e.g. ("metadata",)
+        start(int): offset to start at
+        end(int|None): offset to stop at, defaults to the end of the buffer
+    Returns:
+        VersionMatch|None: the version field, None if there is no literal version
+    """
+    tokens = _STR if isinstance(content, str) else _BYTES
+    end = len(content) if end is None else end
+    in_section = False
+    for line_start, line_end in _lines(content, start, end, tokens["newline"]):
+        header = tokens["cfg_section"].match(content, line_start, line_end)
+        if header is not None:
+            in_section = _table_name(header.group("name")) in sections
+            continue
+        if in_section:
+            match = tokens["cfg_version"].match(content, line_start, line_end)
+            if match is not None:
+                return _to_match(match, "cfg", tokens)
+    return None
+
+
+def locate_json_version(
+    content: Buffer, start: int = 0, end: Optional[int] = None
+) -> Optional[VersionMatch]:
+    """
+    Find the "version" key of the top-level JSON object.
+    Nested objects and arrays are skipped token by token without being parsed,
+    and the walk stops at the top-level key.
+    Args:
+        content(str|bytes|memoryview|mmap): JSON document
+        start(int): offset to start at
+        end(int|None): offset to stop at, defaults to the end of the buffer
+    Returns:
+        VersionMatch|None: the version field, None if there is no top-level version string
+    """
+    tokens = _STR if isinstance(content, str) else _BYTES
+    end = len(content) if end is None else end
+    open_brace, comma, colon = tokens["json_punctuation"]
+    depth = 0
+    # what comes next in the top-level object: a "key", a "colon" or a "value"
+    expecting = None
+    is_version = False
+    for token in tokens["json_token"].finditer(content, start, end):
+        text = token.group()
+        if text in tokens["json_open"]:
+            if depth == 0 and text != open_brace:
+                # the document is not an object
+                return None
+            depth += 1
+            expecting = "key" if depth == 1 else None
+        elif text in tokens["json_close"]:
+            depth -= 1
+            if depth == 0:
+                return None
+        elif depth == 0:
+            return None
+        elif depth == 1:
+            if text == comma:
+                expecting = "key"
+            elif text == colon:
+                expecting = "value" if expecting == "colon" else None
+            elif expecting == "key":
+                is_version = text == tokens["version_key"]
+                expecting = "colon"
+            elif expecting == "value":
+                if is_version:
+                    value = text[1:-1]
+                    return VersionMatch(
+                        value,
+                        token.start() + 1,
+                        token.end() - 1,
+                        "json",
+                        tokens["semantic"].fullmatch(value) is not None,
+                    )
+                expecting = None
+    return None
+
+
+Locator = Callable[..., Optional[VersionMatch]]
+
+
+def locator_for(file_path: str) -> Optional[Locator]:
+    """
+    Get the structured locator for a file, chosen by file name.
+    Args:
+        file_path(str): path to the file
+    Returns:
+        callable|None: locator taking (content, start, end), None for other files
+    """
+    name = os.path.basename(file_path)
+    if name in TOML_TABLES:
+        tables = TOML_TABLES[name]
+        return lambda content, start=0, end=None: locate_toml_version(
+            content, tables, start, end
+        )
+    if name in CFG_SECTIONS:
+        sections = CFG_SECTIONS[name]
+        return lambda content, start=0, end=None: locate_cfg_version(
+            content, sections, start, end
+        )
+    if name in JSON_FILES:
+        return locate_json_version
+    return None
+
+
+def locate_versions(
+    file_path: str,
+    content: Buffer,
+    start: int = 0,
+    end: Optional[int] = None,
+    scan_end: Optional[int] = None,
+) -> List[VersionMatch]:
+    """
+    Find the version of a file: the canonical field if the file has a
+    structured locator, otherwise every match of the generic scanner.
+    Args:
+        file_path(str): path of the file the content was read from
+        content(str|bytes|memoryview|mmap): file content
+        start(int): offset to start at
+        end(int|None): offset the locator stops at, defaults to the end of the buffer
+        scan_end(int|None): offset the generic scanner stops at, defaults to end
+    Returns:
+        list[VersionMatch]: matches in the order they appear in the buffer
+    """
+    locator = locator_for(file_path)
+    if locator is not None:
+        with instrumentation.span("scan"):
+            match = locator(content, start, end)
+        if match is not None:
+            return [match]
+    return scan_versions(content, start, scan_end if scan_end is not None else end)
@@ -0,0 +1,164 @@
+"""
+Changed-package detection for monorepos.
+Each package of a config (see config_handler.PackageSpec) has a version file,
+a root directory and a tag prefix. Its base tag is the highest tag of its
+prefix; packages are grouped by base tag, so there is one
+`git diff --name-only <tag>..HEAD` per distinct base tag, and the changed
+paths are matched against a trie of the package roots of that group.
+Only packages with a changed path under their root are bumped.
+"""
+
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from simplebumpversion.core import instrumentation
+from simplebumpversion.core.config_handler import PackageSpec
+from simplebumpversion.core.git_session import GitSession
+from simplebumpversion.core.tag_index import TagIndex, split_tag
+
+# a package name and a separator, then an optional "v", e.g. "api-" or "web/v"
+_PREFIX_PATTERN = re.compile(r"(?:(?P<package>.+)[-/@_])?v?")
+
+
+class PackageState(NamedTuple):
+    """A package and whether it changed since its base tag"""
+
+    package: PackageSpec
+    # highest tag of the package's tag prefix, None if it was never tagged
+    base_tag: Optional[str]
+    changed: bool
+
+
+def _components(path: str) -> List[str]:
+    path = os.path.normpath(path).replace(os.sep, "/")
+    return [] if path == "." else path.split("/")
+
+
+class PathTrie:
+    """
+    Prefix trie over path components.
+    Matching a path walks its components once and collects the values of
+    every inserted prefix on the way, e.g. "packages/api" matches
+    "packages/api/src/app.py" but not "packages/api2/app.py".
+    """
+
+    __slots__ = ("children", "values")
+
+    def __init__(self):
+        self.children: Dict[str, "PathTrie"] = {}
+        self.values: list = []
+
+    def insert(self, path: str, value) -> None:
+        node = self
+        for component in _components(path):
+            node = node.children.setdefault(component, PathTrie())
+        node.values.append(value)
+
+    def match(self, path: str) -> list:
+        """
+        Returns:
+            list: values of every inserted prefix of path, outermost first
+        """
+        node = self
+        found = list(node.values)
+        for component in path.split("/"):
+            node = node.children.get(component)
+            if node is None:
+                break
+            found.extend(node.values)
+        return found
+
+
+def package_name(tag_prefix: str) -> str:
+    """
+    Get the tag index package of a tag prefix.
+    Args:
+        tag_prefix(str): prefix of the package's tags, e.g. "api-" or "api/v"
+    Returns:
+        str: package name used by TagIndex, "" for unprefixed tags
+    Raises:
+        ValueError: the prefix does not end with a separator (- / @ _),
+        optionally followed by "v", so its tags would not split back into it
+    """
+    match = _PREFIX_PATTERN.fullmatch(tag_prefix)
+    package = (match.group("package") or "") if match else None
+    if package is None or split_tag(f"{tag_prefix}0.0.0") != (package, (0, 0, 0)):
+        raise ValueError(f"Invalid tag prefix: {tag_prefix!r}")
+    return package
+
+
+def package_tag(package: PackageSpec, version: str) -> str:
+    """Tag name of a version of a package, e.g. api-1.2.3"""
+    return f"{package.tag_prefix}{version}"
+
+
+def changed_paths(session: GitSession, tag: str) -> List[str]:
+    """
+    Paths changed between tag and HEAD, relative to the session's directory.
+    Raises:
+        subprocess.CalledProcessError: git diff failed, e.g. unknown tag
+    """
+    output = session.run(["diff", "--name-only", "--relative", f"{tag}..HEAD"])
+    return output.splitlines()
+
+
+def detect_changes(
+    packages: Iterable[PackageSpec], session: GitSession, index: TagIndex
+) -> List[PackageState]:
+    """
+    Find the packages that changed since their base tag.
+    Args:
+        packages(list[PackageSpec]): packages of the config
+        session(GitSession): session of the repository
+        index(TagIndex): tag index of the repository
+    Returns:
+        list[PackageState]: state of every package, in input order; packages
+        without a base tag count as changed
+    Raises:
+        ValueError: invalid tag prefix, or two packages share a tag package name
+        subprocess.CalledProcessError: git diff failed
+    """
+    packages = list(packages)
+    names = [package_name(p.tag_prefix) for p in packages]
+    for position, name in enumerate(names):
+        if name in names[:position]:
+            raise ValueError(
+                f"Tag prefixes {packages[names.index(name)].tag_prefix!r} and"
+                f" {packages[position].tag_prefix!r} claim the same tags"
+            )
+    base_tags = [index.latest(name) for name in names]
+    changed = [tag is None for tag in base_tags]
+    groups: Dict[str, List[int]] = {}
+    for position, tag in enumerate(base_tags):
+        if tag is not None:
+            groups.setdefault(tag, []).append(position)
+
+    with instrumentation.span("git"):
+        for tag, positions in groups.items():
+            trie = PathTrie()
+            for position in positions:
+                trie.insert(packages[position].root, position)
+            remaining = len(positions)
+            for path in changed_paths(session, tag):
+                for position in trie.match(path):
+                    if not changed[position]:
+                        changed[position] = True
+                        remaining -= 1
+                if not remaining:
+                    break
+    return [
+        PackageState(package, tag, is_changed)
+        for package, tag, is_changed in zip(packages, base_tags, changed)
+    ]
+
+
+def commits_since(session: GitSession, tag: Optional[str], root: str) -> Optional[str]:
+    """
+    Commit log of a package: the commits since tag that touched its root.
+    Returns:
+        str|None: one "<short hash> <subject>" line per commit, None if there are none
+    """
+    log_range = f"{tag}..HEAD" if tag else "HEAD"
+    output = session.run(["log", log_range, "--format=%h %s", "--", root])
+    return output or None
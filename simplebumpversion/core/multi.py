@@ -0,0 +1,212 @@
+"""
+Multi-repository mode.
+`bump-version multi <dir-or-manifest>` runs the bump command in many
+repositories on a process pool and reports every outcome in one JSON summary.
+
+Repositories are either the git checkouts directly inside a directory, or
+listed in a YAML manifest:
+
+    args: ["--config", "bump_config.yml"]   # default arguments of every repo
+    repos:
+      - services/api                         # relative to the manifest
+      - path: services/web
+        args: ["package.json", "--minor"]
+
+Each repository runs with its own arguments, the arguments given after `--`
+on the command line, or `--config bump_config.yml` if it has that file.
+"""
+
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+# config file used by a repository that has no arguments of its own
+DEFAULT_CONFIG_FILE = "bump_config.yml"
+REPORT_FORMAT = 1
+NO_UPDATES = "No Updates since last version!"
+# outcome of one repository
+BUMPED = "bumped"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+class RepoJob(NamedTuple):
+    """A repository and the bump command arguments it runs with"""
+
+    path: str
+    args: List[str]
+
+
+def is_repository(path: str) -> bool:
+    # .git is a directory, or a file in worktrees and submodules
+    return os.path.exists(os.path.join(path, ".git"))
+
+
+def discover_repos(directory: str) -> List[str]:
+    """
+    Find the git repositories directly inside a directory.
+    Args:
+        directory(str): directory with repositories checked out side by side
+    Returns:
+        list[str]: absolute repository paths, sorted; the directory itself if it
+        is a repository without repositories inside
+    """
+    directory = os.path.abspath(directory)
+    with os.scandir(directory) as entries:
+        repos = sorted(
+            entry.path
+            for entry in entries
+            if entry.is_dir() and is_repository(entry.path)
+        )
+    if not repos and is_repository(directory):
+        return [directory]
+    return repos
+
+
+def load_manifest(
+    manifest_path: str, default_args: Sequence[str] = ()
+) -> List[RepoJob]:
+    """
+    Read the repositories listed in a manifest file.
+    Args:
+        manifest_path(str): YAML manifest, see the module docstring
+        default_args(list[str]): arguments of repositories without their own,
+            taking precedence over the manifest's top-level `args`
+    Returns:
+        list[RepoJob]: repositories in manifest order
+    Raises:
+        ValueError: the manifest is malformed
+    """
+    import yaml
+
+    with open(manifest_path) as f:
+        manifest = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("repos"), list):
+        raise ValueError(f"Manifest {manifest_path} needs a 'repos' list")
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    shared = list(default_args) or _string_list(manifest.get("args", []), "args")
+    jobs = []
+    for entry in manifest["repos"]:
+        if isinstance(entry, str):
+            entry = {"path": entry}
+        if not isinstance(entry, dict) or not isinstance(entry.get("path"), str):
+            raise ValueError(f"Invalid manifest entry: {entry!r}")
+        path = os.path.join(base, os.path.expanduser(entry["path"]))
+        args = _string_list(entry.get("args", []), f"args of {entry['path']}")
+        jobs.append(RepoJob(os.path.normpath(path), args or shared))
+    return jobs
+
+
+def _string_list(value, where: str) -> List[str]:
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"{where} must be a list of strings")
+    return value
+
+
+def resolve_jobs(target: str, default_args: Sequence[str] = ()) -> List[RepoJob]:
+    """
+    Turn a directory or a manifest file into repository jobs.
+    Raises:
+        FileNotFoundError: the target does not exist
+        ValueError: the manifest is malformed
+    """
+    if os.path.isdir(target):
+        return [RepoJob(repo, list(default_args)) for repo in discover_repos(target)]
+    if not os.path.isfile(target):
+        raise FileNotFoundError(f"'{target}' is neither a directory nor a file")
+    return load_manifest(target, default_args)
+
+
+def run_repo(job: RepoJob) -> Dict[str, object]:
+    """
+    Run the bump command in one repository, capturing its output.
+    Runs in a worker process; the result is plain data so it can be pickled back.
+    Returns:
+        dict: repo, outcome (bumped, skipped or failed), exit code, duration and output
+    """
+    from simplebumpversion.core.server import handle_request
+    from simplebumpversion.main import main
+
+    args = job.args
+    if not args and os.path.isfile(os.path.join(job.path, DEFAULT_CONFIG_FILE)):
+        args = ["--config", DEFAULT_CONFIG_FILE]
+    if not os.path.isdir(job.path):
+        response = {"status": 1, "output": "Error: repository not found\n"}
+    elif not args:
+        response = {
+            "status": 1,
+            "output": f"Error: no arguments and no {DEFAULT_CONFIG_FILE}\n",
+        }
+    else:
+        response = handle_request({"cwd": job.path, "argv": args}, main)
+
+    if response["status"]:
+        outcome = FAILED
+    elif NO_UPDATES in response["output"]:
+        outcome = SKIPPED
+    else:
+        outcome = BUMPED
+    return {
+        "repo": job.path,
+        "outcome": outcome,
+        "exit_code": response["status"],
+        "duration_ms": response.get("duration_ms", 0.0),
+        "output": response["output"],
+    }
+
+
+def run_jobs(jobs: List[RepoJob], processes: Optional[int] = None) -> List[dict]:
+    """
+    Run every job on a process pool.
+    Args:
+        jobs(list[RepoJob]): repositories to bump
+        processes(int|None): worker processes, defaults to the number of cores
+    Returns:
+        list[dict]: output of run_repo for every job, in input order
+    """
+    processes = max(1, min(processes or os.cpu_count() or 1, len(jobs) or 1))
+    if processes == 1:
+        return [run_repo(job) for job in jobs]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(run_repo, jobs))
+
+
+def build_report(target: str, results: List[dict], seconds: float) -> dict:
+    """
+    Consolidate the results into one machine-readable summary.
+    Returns:
+        dict: format, target, counts per outcome, duration_ms and the results
+    """
+    counts = {BUMPED: 0, SKIPPED: 0, FAILED: 0}
+    for result in results:
+        counts[result["outcome"]] += 1
+    return {
+        "format": REPORT_FORMAT,
+        "target": os.path.abspath(target),
+        "counts": counts,
+        "duration_ms": round(seconds * 1000, 3),
+        "results": results,
+    }
+
+
+def run_multi(
+    target: str, default_args: Sequence[str] = (), processes: Optional[int] = None
+) -> dict:
+    """
+    Bump every repository of a directory or manifest.
+    Args:
+        target(str): directory of repositories or manifest file
+        default_args(list[str]): bump arguments of repositories without their own
+        processes(int|None): worker processes, defaults to the number of cores
+    Returns:
+        dict: report, see build_report
+    Raises:
+        FileNotFoundError: the target does not exist
+        ValueError: the manifest is malformed
+    """
+    started = time.perf_counter()
+    jobs = resolve_jobs(target, default_args)
+    results = run_jobs(jobs, processes)
+    return build_report(target, results, time.perf_counter() - started)
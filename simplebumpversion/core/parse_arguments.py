@@ -1,7 +1,7 @@
 import warnings
 import argparse
-from simplebumpversion.core.config_handler import parse_config_arguments
 from simplebumpversion.core.exceptions import ArgumentsNotFound
+from simplebumpversion.core import instrumentation
 
 
 def parse_cli_arguments(
@@ -27,14 +27,26 @@ def parse_arguments(
 ) -> tuple[list, bool, bool, bool, bool]:
     """
     Wrapper function to parse arguments from various sources.
+    Glob patterns among the file names are expanded, see discovery.py.
     Args:
         args(argparse.Namespace):
     Returns:
         tuple(list, bool, bool, bool, bool):
         tuple containing parsed arguments with file names and bump type flags
     Raises
-        FileNotFoundError: if config path is given but file not found
+        FileNotFoundError: if config path is given but file not found,
+            or a glob pattern matches no file
     """
+    from simplebumpversion.core.discovery import expand_files
+
+    files, is_major, is_minor, is_patch, is_dry_run = _parse_arguments(args)
+    files = expand_files(files, args.jobs, use_cache=not args.no_cache)
+    return files, is_major, is_minor, is_patch, is_dry_run
+
+
+def _parse_arguments(
+    args: argparse.Namespace,
+) -> tuple[list, bool, bool, bool, bool]:
     # check if config is given
     if args.config:
         if args.file or args.minor or args.patch:
@@ -42,7 +54,13 @@ def parse_arguments(
                 "Only one of config file or \
                         cli arguments are needed. Ignoring cli arguments."
             )
-        return parse_config_arguments(args.config)
+        # yaml is only imported when a config file is used
+        from simplebumpversion.core.config_handler import parse_config_arguments
+
+        with instrumentation.span("config"):
+            return parse_config_arguments(
+                args.config, args.profile, use_cache=not args.no_cache
+            )
 
     ## if config is not given, use arguments
     else:
@@ -0,0 +1,273 @@
+"""
+Plan files.
+`bump-version plan` does all the reading, scanning and git queries of a bump
+and saves the result: for every file its content hash, the byte spans of the
+version and the old and new version, plus the changelog entries and tags.
+`bump-version apply <plan>` checks that the files are unchanged and splices
+the new version into the recorded spans, without scanning or asking git again.
+
+Paths in a plan are relative to the directory the plan was made in;
+apply it from the same directory.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from simplebumpversion.core.batch import PlannedBump
+from simplebumpversion.core.file_handler import (
+    commit_staged,
+    discard_staged,
+    map_file,
+    stage_patched_copy,
+)
+from simplebumpversion.core.locators import count_occurrences
+
+PLAN_FORMAT = 1
+DEFAULT_PLAN_FILE = "bump-plan.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(file_path: str) -> Tuple[str, int]:
+    """
+    Returns:
+        tuple(str, int): sha256 hex digest and size of a file
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def plan_file_entry(plan: PlannedBump) -> dict:
+    """
+    Record a planned file change with the byte spans of the version in the file
+    as it is on disk.
+    """
+    digest, size = file_digest(plan.file_path)
+    return {
+        "path": plan.file_path,
+        "sha256": digest,
+        "size": size,
+        "spans": [list(span) for span in plan.spans],
+        "old_version": plan.current_version,
+        "new_version": plan.new_version,
+    }
+
+
+def build_plan(
+    plans: List[PlannedBump],
+    changelog: List[Tuple[str, str, Optional[int]]],
+    tags: List[Tuple[str, str]],
+    head: Optional[str],
+) -> dict:
+    """
+    Build a plan.
+    Args:
+        plans(list[PlannedBump]): output of plan_bumps, every file updated
+        changelog(list[tuple(str, str, int|None)]): changelog path, formatted
+            entry and archive size of every changelog entry
+        tags(list[tuple(str, str)]): name and message of every tag
+        head(str|None): commit the plan was made at
+    Returns:
+        dict: the plan, JSON serializable
+    """
+    from datetime import datetime, timezone
+
+    return {
+        "format": PLAN_FORMAT,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "head": head,
+        "files": [plan_file_entry(plan) for plan in plans],
+        "changelog": [
+            {"path": path, "entry": entry, "archive_size": archive_size}
+            for path, entry, archive_size in changelog
+        ],
+        "tags": [{"name": name, "message": message} for name, message in tags],
+    }
+
+
+def write_plan(plan_path: str, plan: dict) -> None:
+    with open(plan_path, "w") as f:
+        json.dump(plan, f, indent=2)
+        f.write("\n")
+
+
+def read_plan(plan_path: str) -> dict:
+    """
+    Raises:
+        FileNotFoundError: the plan file does not exist
+        ValueError: not a plan file, or written by an incompatible version
+    """
+    if not os.path.isfile(plan_path):
+        raise FileNotFoundError(f"Error: Plan file '{plan_path}' not found")
+    with open(plan_path) as f:
+        try:
+            plan = json.load(f)
+        except ValueError:
+            raise ValueError(f"{plan_path} is not a plan file")
+    if not isinstance(plan, dict) or plan.get("format") != PLAN_FORMAT:
+        raise ValueError(f"{plan_path} is not a plan file of format {PLAN_FORMAT}")
+    return plan
+
+
+def check_plan(plan: dict, head: Optional[str] = None) -> List[str]:
+    """
+    Check that a plan still applies: HEAD has not moved and every file has the
+    recorded hash and the old version at the recorded spans.
+    Args:
+        plan(dict): output of read_plan
+        head(str|None): current HEAD, not checked if None
+    Returns:
+        list[str]: one message per problem, empty if the plan applies
+    """
+    errors = []
+    if head is not None and plan.get("head") not in (None, head):
+        errors.append(f"HEAD moved since the plan was made ({plan['head'][:12]})")
+    for entry in plan["files"]:
+        path = entry["path"]
+        try:
+            digest, size = file_digest(path)
+        except OSError as e:
+            errors.append(f"{path}: {e.strerror or e}")
+            continue
+        if (digest, size) != (entry["sha256"], entry["size"]):
+            errors.append(f"{path}: changed since the plan was made")
+            continue
+        old = entry["old_version"].encode()
+        with map_file(path) as mapped:
+            if any(mapped[start:end] != old for start, end in entry["spans"]):
+                errors.append(f"{path}: version {entry['old_version']} not at its span")
+    return errors
+
+
+def apply_plan(plan: dict) -> None:
+    """
+    Write the new versions and the changelog entries of a checked plan.
+    Files and changelogs are staged and renamed together, or patched in place
+    when the version keeps its length, as in batch.apply_bumps, so a failure
+    leaves neither the files nor the changelogs half written.
+    Tags are left to the caller.
+    Args:
+        plan(dict): output of read_plan that passed check_plan
+    """
+    from simplebumpversion.core.change_logger import stage_changelog_entry
+
+    staged = []
+    patches = []
+    try:
+        for path, entry, archive_size in _changelog_entries(plan):
+            staged.extend(stage_changelog_entry(path, entry, archive_size))
+        for entry in plan["files"]:
+            spans = [tuple(span) for span in entry["spans"]]
+            old = entry["old_version"].encode()
+            new = entry["new_version"].encode()
+            if len(old) == len(new):
+                patches.append((entry["path"], spans, old, new))
+            else:
+                staged.append(
+                    (stage_patched_copy(entry["path"], spans, new), entry["path"])
+                )
+    except BaseException:
+        discard_staged(staged)
+        raise
+    commit_staged(staged, patches)
+
+
+def _changelog_entries(plan: dict) -> List[Tuple[str, str, Optional[int]]]:
+    # entries for the same changelog are staged as one, the last one on top,
+    # as if they were prepended one after the other
+    merged: Dict[str, list] = {}
+    for item in plan["changelog"]:
+        if item["path"] in merged:
+            merged[item["path"]][1] = item["entry"] + merged[item["path"]][1]
+        else:
+            merged[item["path"]] = [item["path"], item["entry"], item["archive_size"]]
+    return [tuple(entry) for entry in merged.values()]
+
+
+def _changed_lines(data, spans: List[Tuple[int, int]]) -> List[list]:
+    # [line number, line start, line end, spans] of every line with a span
+    lines: List[list] = []
+    number = 1
+    counted = 0
+    for start, end in spans:
+        line_start = data.rfind(b"\n", 0, start) + 1
+        if lines and lines[-1][1] == line_start:
+            lines[-1][3].append((start, end))
+            continue
+        number += count_occurrences(data, b"\n", counted, line_start)
+        counted = line_start
+        line_end = data.find(b"\n", end)
+        line_end = len(data) if line_end == -1 else line_end
+        lines.append([number, line_start, line_end, [(start, end)]])
+    return lines
+
+
+def _file_diff(entry: dict, context: int) -> List[str]:
+    old = entry["old_version"].encode()
+    new = entry["new_version"].encode()
+    spans = sorted(tuple(span) for span in entry["spans"])
+    output = [f"--- a/{entry['path']}", f"+++ b/{entry['path']}"]
+    with map_file(entry["path"]) as data:
+        changed = _changed_lines(data, spans)
+        groups: List[List[list]] = []
+        for line in changed:
+            if groups and line[0] - groups[-1][-1][0] <= 2 * context:
+                groups[-1].append(line)
+            else:
+                groups.append([line])
+        for group in groups:
+            by_start: Dict[int, list] = {line[1]: line for line in group}
+            # walk back to the first context line
+            position = group[0][1]
+            before = 0
+            while before < context and position > 0:
+                position = data.rfind(b"\n", 0, position - 1) + 1
+                before += 1
+            first = group[0][0] - before
+            body = []
+            last = group[-1][1]
+            after = 0
+            while position < len(data) and (position <= last or after < context):
+                line_end = data.find(b"\n", position)
+                line_end = len(data) if line_end == -1 else line_end
+                text = data[position:line_end]
+                line = by_start.get(position)
+                if line is None:
+                    body.append(" " + text.decode(errors="replace"))
+                    if position > last:
+                        after += 1
+                else:
+                    for start, end in reversed(line[3]):
+                        if data[start:end] == old:
+                            text = (
+                                text[: start - position] + new + text[end - position :]
+                            )
+                    body.append("-" + data[position:line_end].decode(errors="replace"))
+                    body.append("+" + text.decode(errors="replace"))
+                position = line_end + 1
+            length = len(body) - len(group)
+            output.append(f"@@ -{first},{length} +{first},{length} @@")
+            output.extend(body)
+    return output
+
+
+def plan_diff(plan: dict, context: int = 3) -> str:
+    """
+    Unified diff of the file changes of a plan, built from the recorded spans.
+    Only the lines around the spans are read, so large files are cheap.
+    Args:
+        plan(dict): plan made for the current files
+        context(int): unchanged lines shown around every change
+    Returns:
+        str: the diff
+    """
+    lines = []
+    for entry in plan["files"]:
+        lines.extend(_file_diff(entry, context))
+    return "\n".join(lines)
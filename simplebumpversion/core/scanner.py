@@ -0,0 +1,151 @@
+"""
+Single-pass version scanner.
+The supported version patterns are compiled once, grouped by key spelling.
+Every group starts with a literal ("version" or "VERSION"), which lets the regex
+engine skip ahead with a fast substring search instead of trying each position.
+A buffer is read once and swept once per key spelling to find every version key,
+its span and its kind; updates replace the recorded spans, see buffer_api.py.
+The same engine works on text (str) and binary (bytes, bytearray, memoryview, mmap) buffers.
+"""
+
+import heapq
+import re
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+from simplebumpversion.core import instrumentation
+
+Buffer = Union[str, bytes, bytearray, memoryview]
+
+# kinds in order of precedence, same order as the former pattern lists.
+# "toml" and "cfg" are only reported by the structured locators, see locators.py
+KINDS = ("version", "VERSION", "__version__", "json", "toml", "cfg")
+
+# version = "1.2.3", __version__ = "1.2.3" and "version": "1.2.3"
+_LOWER_PATTERN = (
+    r"version(?:(?P<dunder>__)?\s*=\s*[\"'](?P<value>[\w\.\-\+]+)[\"']"
+    r'|"\s*:\s*"(?P<json>[\w\.\-\+]+)")'
+)
+# VERSION = "1.2.3"
+_UPPER_PATTERN = r"VERSION\s*=\s*[\"'](?P<value>[\w\.\-\+]+)[\"']"
+_SEMANTIC_PATTERN = r"\d+\.\d+\.\d+"
+
+
+def _compile(pattern: str, binary: bool) -> "re.Pattern":
+    return re.compile(pattern.encode() if binary else pattern)
+
+
+_STR_PATTERNS = (_compile(_LOWER_PATTERN, False), _compile(_UPPER_PATTERN, False))
+_BYTES_PATTERNS = (_compile(_LOWER_PATTERN, True), _compile(_UPPER_PATTERN, True))
+_STR_SEMANTIC = _compile(_SEMANTIC_PATTERN, False)
+_BYTES_SEMANTIC = _compile(_SEMANTIC_PATTERN, True)
+
+
+class VersionMatch(NamedTuple):
+    """A version string found in a buffer. start and end delimit the version value only"""
+
+    version: Union[str, bytes]
+    start: int
+    end: int
+    kind: str
+    semantic: bool
+
+    @property
+    def rank(self) -> Tuple[int, int]:
+        """Precedence of the match, lower wins: semantic versions first, then by kind"""
+        return (0 if self.semantic else 1, KINDS.index(self.kind))
+
+
+def _patterns(content: Buffer):
+    if isinstance(content, str):
+        return _STR_PATTERNS, _STR_SEMANTIC, "__", '"'
+    return _BYTES_PATTERNS, _BYTES_SEMANTIC, b"__", b'"'
+
+
+def _lower_matches(content, pattern, semantic, dunder, quote, start, end):
+    for match in pattern.finditer(content, start, end):
+        key_start = match.start()
+        if match.group("json") is not None:
+            # "version": requires the opening quote of the key
+            if content[key_start - 1 : key_start] != quote:
+                continue
+            group, kind = "json", "json"
+        elif match.group("dunder") is not None:
+            # version__ = requires the leading underscores of __version__
+            if content[max(key_start - 2, 0) : key_start] != dunder:
+                continue
+            group, kind = "value", "__version__"
+        else:
+            group, kind = "value", "version"
+        yield _to_match(match, group, kind, semantic)
+
+
+def _upper_matches(content, pattern, semantic, start, end):
+    for match in pattern.finditer(content, start, end):
+        yield _to_match(match, "value", "VERSION", semantic)
+
+
+def _to_match(
+    match: "re.Match", group: str, kind: str, semantic_pattern: "re.Pattern"
+) -> VersionMatch:
+    version = match.group(group)
+    return VersionMatch(
+        version,
+        match.start(group),
+        match.end(group),
+        kind,
+        semantic_pattern.fullmatch(version) is not None,
+    )
+
+
+def scan_versions(
+    content: Buffer, start: int = 0, end: Optional[int] = None
+) -> List[VersionMatch]:
+    """
+    Find every version key in the buffer in one pass.
+    Args:
+        content(str|bytes|memoryview): buffer to scan
+        start(int): offset to start scanning at
+        end(int|None): offset to stop scanning at, defaults to the end of the buffer
+    Returns:
+        list[VersionMatch]: matches in the order they appear in the buffer
+    """
+    (lower, upper), semantic, dunder, quote = _patterns(content)
+    if end is None:
+        end = len(content)
+    instrumentation.count("regex.passes", len(_STR_PATTERNS))
+    with instrumentation.span("scan"):
+        return list(
+            heapq.merge(
+                _lower_matches(content, lower, semantic, dunder, quote, start, end),
+                _upper_matches(content, upper, semantic, start, end),
+                key=lambda match: match.start,
+            )
+        )
+
+
+def best_match(matches: List[VersionMatch]) -> Optional[VersionMatch]:
+    """
+    Pick the match that the version lookup reports.
+    Semantic versions win over flexible ones (e.g. git describe output),
+    then kinds win in the order of KINDS, then the earliest position.
+    Args:
+        matches(list[VersionMatch]): output of scan_versions
+    Returns:
+        VersionMatch|None: the winning match, None if the list is empty
+    """
+    best = None
+    for match in matches:
+        if best is None or match.rank < best.rank:
+            best = match
+    return best
+
+
+def find_version(
+    content: Buffer, start: int = 0, end: Optional[int] = None
+) -> Optional[VersionMatch]:
+    """
+    Find the version in the buffer with a single scan.
+    Returns:
+        VersionMatch|None: the winning match, None if no version key is found
+    """
+    return best_match(scan_versions(content, start, end))
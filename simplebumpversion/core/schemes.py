@@ -0,0 +1,361 @@
+"""
+Version scheme engine.
+A scheme parses a version string into a ParsedVersion, bumps one of its parts
+and formats it back. Every scheme compiles its parser once; parse results are
+memoized in a bounded LRU cache, so batch runs over many files and tags never
+parse the same string twice.
+
+Schemes, selected by name (see get_scheme):
+- "semver": MAJOR.MINOR.PATCH with optional -pre.release and +build.metadata
+- "0ver": like semver, but the major version stays 0 (https://0ver.org)
+- "calver" or "calver:<format>": calendar versions (https://calver.org),
+  the default format is YYYY.0M.MICRO
+Bump parts: "major", "minor", "patch", "prerelease" and "build".
+"""
+
+import abc
+import re
+from functools import lru_cache
+from typing import Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+# bounded, so long-running servers do not grow without limit
+PARSE_CACHE_SIZE = 8192
+DEFAULT_SCHEME = "semver"
+DEFAULT_CALVER_FORMAT = "YYYY.0M.MICRO"
+DEFAULT_PRERELEASE_LABEL = "rc"
+PARTS = ("major", "minor", "patch", "prerelease", "build")
+
+_IDENTIFIERS = r"[0-9A-Za-z\-]+(?:\.[0-9A-Za-z\-]+)*"
+_SUFFIX = rf"(?:-(?P<prerelease>{_IDENTIFIERS}))?(?:\+(?P<build>{_IDENTIFIERS}))?"
+
+Identifier = Union[int, str]
+
+
+class ParsedVersion(NamedTuple):
+    """A version split into its parts"""
+
+    # "v" or ""
+    prefix: str
+    # numeric release components, e.g. (1, 2, 3)
+    release: Tuple[int, ...]
+    # pre-release identifiers, e.g. ("rc", 4); numeric identifiers are ints
+    prerelease: Tuple[Identifier, ...] = ()
+    # build metadata identifiers, e.g. ("build", 7)
+    build: Tuple[Identifier, ...] = ()
+
+
+def _identifiers(text: Optional[str]) -> Tuple[Identifier, ...]:
+    if not text:
+        return ()
+    return tuple(int(part) if part.isdigit() else part for part in text.split("."))
+
+
+def _join(identifiers: Tuple[Identifier, ...]) -> str:
+    return ".".join(str(part) for part in identifiers)
+
+
+def _increment(identifiers: Tuple[Identifier, ...]) -> Tuple[Identifier, ...]:
+    # rc.4 -> rc.5, rc -> rc.1
+    for position in range(len(identifiers) - 1, -1, -1):
+        if isinstance(identifiers[position], int):
+            return (
+                identifiers[:position]
+                + (identifiers[position] + 1,)
+                + identifiers[position + 1 :]
+            )
+    return identifiers + (1,)
+
+
+class Scheme(abc.ABC):
+    """
+    Base class of version schemes.
+    Subclasses set `name` and `pattern` (with a "release" group or their own
+    parse) and implement bump_release.
+    """
+
+    name = ""
+    pattern: "re.Pattern"
+
+    def parse(self, version: str) -> ParsedVersion:
+        """
+        Raises:
+            ValueError: the version does not follow the scheme
+        """
+        match = self.pattern.fullmatch(version)
+        if match is None:
+            raise ValueError(f"Invalid {self.name} version: {version}")
+        return ParsedVersion(
+            match.group("prefix") or "",
+            tuple(int(part) for part in match.group("release").split(".")),
+            _identifiers(match.group("prerelease")),
+            _identifiers(match.group("build")),
+        )
+
+    def format(self, version: ParsedVersion) -> str:
+        text = version.prefix + ".".join(str(part) for part in version.release)
+        if version.prerelease:
+            text += "-" + _join(version.prerelease)
+        if version.build:
+            text += "+" + _join(version.build)
+        return text
+
+    @abc.abstractmethod
+    def bump_release(self, version: ParsedVersion, part: str) -> ParsedVersion:
+        """
+        Bump the release part of a version; the prerelease and build are
+        handled by bump.
+        Raises:
+            ValueError: part cannot be bumped in this scheme
+        """
+
+    def bump(
+        self, version: ParsedVersion, part: str, label: Optional[str] = None
+    ) -> ParsedVersion:
+        """
+        Bump one part of a version.
+        Args:
+            version(ParsedVersion): output of parse
+            part(str): one of PARTS
+            label(str|None): pre-release label for "prerelease" bumps; switching
+                labels (beta -> rc) restarts the count. Defaults to the current
+                label, or DEFAULT_PRERELEASE_LABEL for a release version
+        Returns:
+            ParsedVersion: the bumped version
+        Raises:
+            ValueError: unknown part, or the scheme does not allow the bump
+        """
+        if part == "prerelease":
+            if not version.prerelease:
+                # the pre-release of the next patch version
+                release = self.bump_release(version, "patch")
+                label = label or DEFAULT_PRERELEASE_LABEL
+                return release._replace(prerelease=(label, 1))
+            if label is not None and version.prerelease[0] != label:
+                return version._replace(prerelease=(label, 1), build=())
+            return version._replace(prerelease=_increment(version.prerelease), build=())
+        if part == "build":
+            return version._replace(build=_increment(version.build or ("build",)))
+        if part not in PARTS:
+            raise ValueError(f"Unknown version part: {part}")
+        return self.bump_release(version, part)
+
+
+class SemVer(Scheme):
+    """Semantic versioning, https://semver.org"""
+
+    name = "semver"
+    pattern = re.compile(rf"(?P<prefix>v)?(?P<release>\d+\.\d+\.\d+){_SUFFIX}")
+
+    def bump_release(self, version: ParsedVersion, part: str) -> ParsedVersion:
+        major, minor, patch = version.release
+        if version.prerelease:
+            # a pre-release is finalized by the bump it leads up to:
+            # 1.3.0-rc.1 --minor -> 1.3.0, but --major -> 2.0.0
+            if (
+                part == "patch"
+                or (part == "minor" and patch == 0)
+                or (part == "major" and minor == patch == 0)
+            ):
+                return version._replace(prerelease=(), build=())
+        if part == "major":
+            release = (major + 1, 0, 0)
+        elif part == "minor":
+            release = (major, minor + 1, 0)
+        else:
+            release = (major, minor, patch + 1)
+        return ParsedVersion(version.prefix, release)
+
+
+class ZeroVer(SemVer):
+    """0ver, https://0ver.org: semantic versions that never leave major version 0"""
+
+    name = "0ver"
+    pattern = re.compile(rf"(?P<prefix>v)?(?P<release>0\.\d+\.\d+){_SUFFIX}")
+
+    def bump_release(self, version: ParsedVersion, part: str) -> ParsedVersion:
+        if part == "major":
+            raise ValueError("0ver versions never bump the major version")
+        return super().bump_release(version, part)
+
+
+# calver format token -> (regex, date field or counter)
+_CALVER_TOKENS = {
+    "YYYY": (r"\d{4}", "year"),
+    "YY": (r"\d{1,3}", "short_year"),
+    "0Y": (r"\d{2,3}", "short_year"),
+    "MM": (r"\d{1,2}", "month"),
+    "0M": (r"\d{2}", "month"),
+    "WW": (r"\d{1,2}", "week"),
+    "0W": (r"\d{2}", "week"),
+    "DD": (r"\d{1,2}", "day"),
+    "0D": (r"\d{2}", "day"),
+    "MAJOR": (r"\d+", "major"),
+    "MINOR": (r"\d+", "minor"),
+    "MICRO": (r"\d+", "patch"),
+}
+
+
+class CalVer(Scheme):
+    """
+    Calendar versioning, https://calver.org.
+    Date components are set to today on every bump; the counters (MAJOR, MINOR,
+    MICRO) count releases within the same date and restart at 0 on a new date.
+    """
+
+    name = "calver"
+
+    def __init__(self, version_format: str = DEFAULT_CALVER_FORMAT, today=None):
+        self.version_format = version_format
+        self.tokens = version_format.split(".")
+        unknown = [token for token in self.tokens if token not in _CALVER_TOKENS]
+        if unknown:
+            raise ValueError(f"Unknown calver tokens: {', '.join(unknown)}")
+        release = r"\.".join(f"({_CALVER_TOKENS[token][0]})" for token in self.tokens)
+        self.pattern = re.compile(rf"(?P<prefix>v)?(?P<release>{release}){_SUFFIX}")
+        # date source, replaceable for tests
+        self.today = today
+
+    def format(self, version: ParsedVersion) -> str:
+        parts = [
+            f"{value:02d}" if token.startswith("0") else str(value)
+            for token, value in zip(self.tokens, version.release)
+        ]
+        text = version.prefix + ".".join(parts)
+        if version.prerelease:
+            text += "-" + _join(version.prerelease)
+        if version.build:
+            text += "+" + _join(version.build)
+        return text
+
+    def _date_fields(self) -> Dict[str, int]:
+        if self.today is not None:
+            today = self.today()
+        else:
+            from datetime import date
+
+            today = date.today()
+        return {
+            "year": today.year,
+            "short_year": today.year - 2000,
+            "month": today.month,
+            "week": today.isocalendar()[1],
+            "day": today.day,
+        }
+
+    def bump_release(self, version: ParsedVersion, part: str) -> ParsedVersion:
+        fields = self._date_fields()
+        fields_of = [_CALVER_TOKENS[token][1] for token in self.tokens]
+        new_date = [fields[field] if field in fields else None for field in fields_of]
+        old_date = [
+            value if field in fields else None
+            for field, value in zip(fields_of, version.release)
+        ]
+        counters = [field for field in fields_of if field not in fields]
+        if new_date == old_date and counters:
+            # same date: count up the counter of the bumped part, or the last one
+            target = part if part in counters else counters[-1]
+            reset = False
+            release = []
+            for field, value in zip(fields_of, version.release):
+                if field == target:
+                    release.append(value + 1)
+                    reset = True
+                elif field in counters and reset:
+                    release.append(0)
+                else:
+                    release.append(value)
+        else:
+            release = [fields[field] if field in fields else 0 for field in fields_of]
+        if tuple(release) == version.release and not version.prerelease:
+            raise ValueError(
+                f"Version {self.format(version)} was already released today and "
+                f"the format {self.version_format} has no counter"
+            )
+        return ParsedVersion(version.prefix, tuple(release))
+
+
+_SCHEMES: Dict[str, Callable[..., Scheme]] = {
+    "semver": SemVer,
+    "0ver": ZeroVer,
+    "calver": CalVer,
+}
+
+
+def register_scheme(name: str, factory: Callable[..., Scheme]) -> None:
+    """
+    Make a scheme available by name.
+    Args:
+        name(str): scheme name
+        factory(callable): called with the option after ":" in the scheme
+            specification, if any, and returns a Scheme
+    """
+    _SCHEMES[name] = factory
+    get_scheme.cache_clear()
+    parse_version.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_scheme(spec: str = DEFAULT_SCHEME) -> Scheme:
+    """
+    Get a scheme by its specification, compiled once per specification.
+    Args:
+        spec(str): scheme name with an optional option, e.g. "calver:YYYY.MM.MICRO"
+    Returns:
+        Scheme: the scheme
+    Raises:
+        ValueError: unknown scheme or invalid option
+    """
+    name, _, option = spec.partition(":")
+    if name not in _SCHEMES:
+        available = ", ".join(sorted(_SCHEMES))
+        raise ValueError(f"Unknown version scheme '{name}'. Available: {available}")
+    return _SCHEMES[name](option) if option else _SCHEMES[name]()
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_version(version: str, scheme: str = DEFAULT_SCHEME) -> ParsedVersion:
+    """
+    Parse a version with a scheme, memoized.
+    Args:
+        version(str): version string
+        scheme(str): scheme specification, see get_scheme
+    Returns:
+        ParsedVersion: the parsed version
+    Raises:
+        ValueError: the version does not follow the scheme
+    """
+    return get_scheme(scheme).parse(version)
+
+
+def bump_version(
+    version: str,
+    part: str = "patch",
+    scheme: str = DEFAULT_SCHEME,
+    label: Optional[str] = None,
+) -> str:
+    """
+    Bump a version string with a scheme.
+    Args:
+        version(str): current version, e.g. "1.2.3-rc.4"
+        part(str): one of PARTS
+        scheme(str): scheme specification, see get_scheme
+        label(str|None): pre-release label for "prerelease" bumps
+    Returns:
+        str: the new version, e.g. "1.2.3-rc.5"
+    Raises:
+        ValueError: the version does not follow the scheme or cannot be bumped
+    """
+    engine = get_scheme(scheme)
+    return engine.format(engine.bump(parse_version(version, scheme), part, label))
+
+
+def make_bumper(
+    part: str, scheme: str = DEFAULT_SCHEME, label: Optional[str] = None
+) -> Callable[[str], str]:
+    """
+    Build a function that bumps versions with fixed settings, e.g. for a batch run.
+    Raises:
+        ValueError: unknown scheme
+    """
+    get_scheme(scheme)
+    return lambda version: bump_version(version, part, scheme, label)
@@ -0,0 +1,211 @@
+"""
+Long-running server mode.
+`bump-version serve` listens on a unix socket and answers JSON requests that are
+equivalent to a CLI invocation. Parsed configs, compiled patterns, imported
+modules and git sessions stay warm between requests, so a request only pays
+for the work it actually does.
+
+Protocol: one JSON object per line, answered by one JSON object per line.
+Request keys:
+    cwd(str): directory to run in, defaults to the server's directory
+    files(list[str]): files to bump
+    bump_type(str): major, minor or patch
+    dry_run(bool), conventional(bool), batch(bool), no_cache(bool)
+    changelog(str), change_msg(str), change_msg_file(str), config(str)
+    profile(str): named profile of the config file
+    scheme(str): version scheme, e.g. "calver" or "0ver"
+    argv(list[str]): raw CLI arguments, appended after the keys above
+    command(str): "ping" or "shutdown" instead of a bump
+Response keys: status(int), output(str), duration_ms(float)
+"""
+
+import io
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Callable, List, Optional
+
+from simplebumpversion.core.git_tools import refresh_sessions
+
+# request keys that map to a CLI flag with a value
+_VALUE_FLAGS = {
+    "changelog": "--changelog",
+    "change_msg": "--change_msg",
+    "change_msg_file": "--change_msg_file",
+    "config": "--config",
+    "profile": "--profile",
+    "scheme": "--scheme",
+    "jobs": "--jobs",
+}
+# request keys that map to a CLI switch
+_SWITCH_FLAGS = {
+    "dry_run": "--dry-run",
+    "conventional": "--conventional",
+    "batch": "--batch",
+    "no_cache": "--no-cache",
+}
+
+
+def default_socket_path() -> str:
+    """
+    Returns:
+        str: $XDG_RUNTIME_DIR/bump-version.sock, or a per-user path in the temp dir
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "bump-version.sock")
+    return os.path.join(tempfile.gettempdir(), f"bump-version-{os.getuid()}.sock")
+
+
+def request_to_argv(request: dict) -> List[str]:
+    """
+    Translate a JSON request into CLI arguments.
+    Args:
+        request(dict): decoded request
+    Returns:
+        list[str]: arguments for the bump command
+    Raises:
+        ValueError: unknown bump type or malformed field
+    """
+    argv = [str(file) for file in request.get("files", [])]
+    bump_type = request.get("bump_type")
+    if bump_type is not None:
+        if bump_type not in ("major", "minor", "patch"):
+            raise ValueError(f"Unknown bump type: {bump_type}")
+        argv.append(f"--{bump_type}")
+    for key, flag in _VALUE_FLAGS.items():
+        if request.get(key) is not None:
+            argv.extend([flag, str(request[key])])
+    for key, flag in _SWITCH_FLAGS.items():
+        if request.get(key):
+            argv.append(flag)
+    extra = request.get("argv", [])
+    if not isinstance(extra, list):
+        raise ValueError("argv must be a list of strings")
+    argv.extend(str(arg) for arg in extra)
+    return argv
+
+
+def handle_request(request: dict, run_argv: Callable[[List[str]], Optional[int]]):
+    """
+    Run one request in its working directory and capture its output.
+    Args:
+        request(dict): decoded request
+        run_argv(callable): runs CLI arguments and returns an exit status
+    Returns:
+        dict: response with status, output and duration_ms
+    """
+    started = time.perf_counter()
+    output = io.StringIO()
+    previous_cwd = os.getcwd()
+    try:
+        argv = request_to_argv(request)
+        os.chdir(request.get("cwd") or previous_cwd)
+        # refs may have moved since the last request, objects have not
+        refresh_sessions()
+        with redirect_stdout(output), redirect_stderr(output):
+            status = run_argv(argv) or 0
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else 1
+    except Exception as e:
+        output.write(f"Error: {e}\n")
+        status = 1
+    finally:
+        os.chdir(previous_cwd)
+    return {
+        "status": status,
+        "output": output.getvalue(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                response = {"status": 1, "output": f"Error: {e}\n"}
+            else:
+                command = request.get("command")
+                if command == "ping":
+                    response = {"status": 0, "output": "pong\n"}
+                elif command == "shutdown":
+                    response = {"status": 0, "output": "shutting down\n"}
+                    # shutdown() waits for serve_forever, which is running this handler
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                else:
+                    response = handle_request(request, self.server.run_argv)
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class BumpServer(socketserver.UnixStreamServer):
+    """
+    Unix socket server answering bump requests one at a time.
+    Requests are serialized because each one runs in its own working directory.
+    """
+
+    def __init__(self, socket_path: str, run_argv: Callable):
+        self.run_argv = run_argv
+        super().__init__(socket_path, _RequestHandler)
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.remove(socket_path)
+    else:
+        raise OSError(f"Another server is listening on {socket_path}")
+    finally:
+        probe.close()
+
+
+def serve(socket_path: str, run_argv: Callable[[List[str]], Optional[int]]) -> int:
+    """
+    Serve bump requests until a shutdown request or Ctrl+C.
+    Args:
+        socket_path(str): path of the unix socket to listen on
+        run_argv(callable): runs CLI arguments and returns an exit status
+    Returns:
+        int: exit status
+    """
+    _remove_stale_socket(socket_path)
+    with BumpServer(socket_path, run_argv) as server:
+        print(f"Listening on {socket_path}")
+        try:
+            server.serve_forever(poll_interval=0.1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(socket_path)
+    return 0
+
+
+def send_request(request: dict, socket_path: Optional[str] = None) -> dict:
+    """
+    Send one request to a running server and wait for the response.
+    Args:
+        request(dict): request, see the module docstring
+        socket_path(str|None): server socket, defaults to default_socket_path()
+    Returns:
+        dict: decoded response
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path or default_socket_path())
+        client.sendall(json.dumps(request).encode() + b"\n")
+        with client.makefile("rb") as reader:
+            return json.loads(reader.readline())
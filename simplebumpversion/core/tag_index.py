@@ -0,0 +1,265 @@
+"""
+Semantic version tag index.
+All tags are listed in one read of packed-refs and the loose tag refs, parsed
+once and kept per package in a sorted array of packed versions. The highest
+version of a package and "is this version tagged" are then a lookup and a
+binary search instead of a git command per question.
+
+Tag names are split into a package prefix and a version:
+"1.2.3" and "v1.2.3" belong to the root package (""), "api-1.2.3", "api/v1.2.3"
+and "api@1.2.3" to the package "api".
+"""
+
+import re
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set, Tuple
+
+from simplebumpversion.core.bump_version import parse_semantic_version
+from simplebumpversion.core.git_session import GitSession
+
+# bits per version component in a packed version
+COMPONENT_BITS = 21
+COMPONENT_LIMIT = 1 << COMPONENT_BITS
+
+Version = Tuple[int, int, int]
+
+_TAG_PATTERN = re.compile(r"(?:(?P<package>.*?)[-/@_])?(?P<version>v?\d+\.\d+\.\d+)")
+# separators between the package and the version of a tag name
+_SEPARATORS = ("-", "/", "@", "_")
+
+
+def pack_version(version: Version) -> int:
+    """
+    Pack a version into one integer that sorts like the version.
+    Raises:
+        ValueError: a component does not fit into COMPONENT_BITS
+    """
+    major, minor, patch = version
+    if max(version) >= COMPONENT_LIMIT:
+        raise ValueError(f"Version component too large: {version}")
+    return (major << 2 * COMPONENT_BITS) | (minor << COMPONENT_BITS) | patch
+
+
+def unpack_version(packed: int) -> Version:
+    mask = COMPONENT_LIMIT - 1
+    return (
+        packed >> 2 * COMPONENT_BITS,
+        (packed >> COMPONENT_BITS) & mask,
+        packed & mask,
+    )
+
+
+def split_tag(name: str) -> Optional[Tuple[str, Version]]:
+    """
+    Split a tag name into its package and semantic version.
+    Args:
+        name(str): tag name, e.g. "api-v1.2.3"
+    Returns:
+        tuple(str, tuple(int, int, int))|None: package ("" for the root package)
+        and version, None if the tag is not a semantic version tag
+    """
+    match = _TAG_PATTERN.fullmatch(name)
+    if match is None:
+        return None
+    version = parse_semantic_version(match.group("version"))
+    return match.group("package") or "", version
+
+
+def tag_names(version: str, package: str = "") -> List[str]:
+    """
+    List the tag names a version of a package can have.
+    Args:
+        version(str): version, e.g. "1.2.3-rc.1" or "v1.2.3-rc.1"
+        package(str): package name, "" for the root package
+    Returns:
+        list[str]: names with and without "v" prefix, with every separator
+    """
+    plain = version[1:] if version.startswith("v") else version
+    forms = [plain, f"v{plain}"]
+    if not package:
+        return forms
+    return [
+        f"{package}{separator}{form}" for separator in _SEPARATORS for form in forms
+    ]
+
+
+def _parse_tag(name: str) -> Optional[Tuple[str, int]]:
+    # package and packed version of a tag, None if it is not indexed
+    try:
+        split = split_tag(name)
+        if split is None:
+            return None
+        return split[0], pack_version(split[1])
+    except ValueError:
+        return None
+
+
+class _PackageTags:
+    """Sorted packed versions of one package, with the tag names of each"""
+
+    __slots__ = ("versions", "names")
+
+    def __init__(self):
+        self.versions = array("Q")
+        # packed version -> tag names, e.g. both "1.2.3" and "v1.2.3"
+        self.names: Dict[int, List[str]] = {}
+
+    def add(self, packed: int, name: str) -> None:
+        if packed not in self.names:
+            insort(self.versions, packed)
+            self.names[packed] = []
+        self.names[packed].append(name)
+
+    def remove(self, packed: int, name: str) -> None:
+        names = self.names[packed]
+        names.remove(name)
+        if not names:
+            del self.names[packed]
+            del self.versions[bisect_left(self.versions, packed)]
+
+
+class TagIndex:
+    """
+    Index of the semantic version tags of a repository.
+    Not thread-safe: build and refresh it from one thread.
+    """
+
+    def __init__(self, session: GitSession):
+        self.session = session
+        self._packages: Dict[str, _PackageTags] = {}
+        # tag name -> (package, packed version) of every indexed tag
+        self._tags: Dict[str, Tuple[str, int]] = {}
+        # tags that are not semantic version tags, so they are not parsed again
+        self._ignored: Set[str] = set()
+        self._sync()
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def refresh(self) -> None:
+        """
+        Re-read the tag list and index only the tags that changed since the last read.
+        """
+        self.session.invalidate_refs()
+        self._sync()
+
+    def _sync(self) -> None:
+        current = self.session.tags()
+        for name in [name for name in self._tags if name not in current]:
+            self.remove(name)
+        self._ignored.intersection_update(current)
+        added = [
+            name
+            for name in current
+            if name not in self._tags and name not in self._ignored
+        ]
+        if len(added) <= len(self._tags):
+            for name in added:
+                self.add(name)
+            return
+        # first read or mostly new tags: parse them all, then sort once per package
+        entries: Dict[str, List[Tuple[int, str]]] = {}
+        for name in added:
+            parsed = _parse_tag(name)
+            if parsed is None:
+                self._ignored.add(name)
+                continue
+            package, packed = parsed
+            entries.setdefault(package, []).append((packed, name))
+            self._tags[name] = parsed
+        for package, package_entries in entries.items():
+            tags = self._packages.setdefault(package, _PackageTags())
+            for packed, name in package_entries:
+                tags.names.setdefault(packed, []).append(name)
+            tags.versions = array("Q", sorted(tags.names))
+
+    def add(self, name: str) -> bool:
+        """
+        Index a tag, e.g. right after creating it.
+        Args:
+            name(str): tag name
+        Returns:
+            bool: False if the tag is not a semantic version tag
+        """
+        if name in self._tags:
+            return True
+        parsed = _parse_tag(name)
+        if parsed is None:
+            self._ignored.add(name)
+            return False
+        package, packed = parsed
+        self._packages.setdefault(package, _PackageTags()).add(packed, name)
+        self._tags[name] = (package, packed)
+        return True
+
+    def remove(self, name: str) -> None:
+        """Drop a tag from the index"""
+        if name not in self._tags:
+            return
+        package, packed = self._tags.pop(name)
+        self._packages[package].remove(packed, name)
+        if not self._packages[package].versions:
+            del self._packages[package]
+
+    def packages(self) -> List[str]:
+        """
+        Returns:
+            list[str]: names of the packages with at least one tag, "" is the root package
+        """
+        return sorted(self._packages)
+
+    def versions(self, package: str = "") -> List[Version]:
+        """
+        Returns:
+            list[tuple(int, int, int)]: tagged versions of a package, ascending
+        """
+        tags = self._packages.get(package)
+        if tags is None:
+            return []
+        return [unpack_version(packed) for packed in tags.versions]
+
+    def latest_version(self, package: str = "") -> Optional[Version]:
+        """
+        Returns:
+            tuple(int, int, int)|None: highest tagged version of a package
+        """
+        tags = self._packages.get(package)
+        if tags is None:
+            return None
+        return unpack_version(tags.versions[-1])
+
+    def latest(self, package: str = "") -> Optional[str]:
+        """
+        Get the tag of the highest version of a package, regardless of
+        whether it is reachable from HEAD.
+        Args:
+            package(str): package name, "" for the root package
+        Returns:
+            str|None: tag name, None if the package has no version tags
+        """
+        tags = self._packages.get(package)
+        if tags is None:
+            return None
+        return max(tags.names[tags.versions[-1]])
+
+    def is_tagged(self, version: str, package: str = "") -> bool:
+        """
+        Check if a version of a package already has a tag.
+        Args:
+            version(str): version, e.g. "1.2.3" or "v1.2.3"
+            package(str): package name, "" for the root package
+        Returns:
+            bool: True if a tag of that version exists, with or without "v" prefix
+        """
+        try:
+            packed = pack_version(parse_semantic_version(version))
+        except ValueError:
+            # pre-release and build versions are not indexed, look the names up
+            tags = self.session.tags()
+            return any(name in tags for name in tag_names(version, package))
+        tags = self._packages.get(package)
+        if tags is None:
+            return False
+        position = bisect_left(tags.versions, packed)
+        return position < len(tags.versions) and tags.versions[position] == packed
@@ -0,0 +1,245 @@
+"""
+Persistent version-location index.
+For every scanned file it records the mtime, size, a hash of the first bytes,
+the byte spans of the version and the kind of key that matched.
+When a file is unchanged, later runs verify a small window around the known
+offset instead of reading and scanning the whole file.
+"""
+
+import os
+import tempfile
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from simplebumpversion.core import instrumentation
+from simplebumpversion.core.git_session import find_git_dir
+from simplebumpversion.core.scanner import scan_versions
+
+INDEX_FORMAT = 1
+INDEX_FILE_NAME = "index.json"
+# number of bytes at the top of a file covered by the content hash
+HASH_PREFIX_BYTES = 4096
+# bytes read before and after the known offset to verify a hit
+VERIFY_CONTEXT = 64
+# kinds of version fields without quotes, verified by comparing the bytes
+UNQUOTED_KINDS = ("cfg",)
+
+
+class IndexedVersion(NamedTuple):
+    """A version location read from the index"""
+
+    version: str
+    kind: str
+    # byte span of the reported match
+    span: Tuple[int, int]
+    # byte spans of every occurrence of the version, in ascending order
+    spans: List[Tuple[int, int]]
+
+
+def default_index_dir(path: str = ".") -> str:
+    """
+    Get the directory the index is kept in: .git/bump_version inside a repository,
+    otherwise the user cache directory.
+    Args:
+        path(str): directory inside the work tree
+    Returns:
+        str: directory path, not necessarily existing yet
+    """
+    _, common_dir = find_git_dir(path)
+    if common_dir is not None:
+        return os.path.join(common_dir, "bump_version")
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "simplebumpversion")
+
+
+def _hash_prefix(f) -> str:
+    import hashlib
+
+    f.seek(0)
+    return hashlib.blake2b(f.read(HASH_PREFIX_BYTES), digest_size=8).hexdigest()
+
+
+def shift_spans(
+    spans: List[Tuple[int, int]], old_length: int, new_length: int
+) -> List[Tuple[int, int]]:
+    """
+    Compute where ascending spans end up after each one was replaced
+    by a value of new_length bytes.
+    Args:
+        spans(list[tuple(int, int)]): spans of old_length bytes each
+        old_length(int): length of the replaced value
+        new_length(int): length of the replacement
+    Returns:
+        list[tuple(int, int)]: spans of the replacements
+    """
+    delta = new_length - old_length
+    return [
+        (start + i * delta, start + i * delta + new_length)
+        for i, (start, _) in enumerate(spans)
+    ]
+
+
+class VersionIndex:
+    """
+    On-disk index of version locations keyed by absolute file path.
+    Safe to use from several threads.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None):
+        self.index_dir = index_dir or default_index_dir()
+        self.path = os.path.join(self.index_dir, INDEX_FILE_NAME)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._entries: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        import json
+
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("format") != INDEX_FORMAT:
+            return {}
+        return data.get("files", {})
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, file_path: str) -> Optional[IndexedVersion]:
+        """
+        Get the version of a file from the index if the file is unchanged.
+        Args:
+            file_path(str): path to the file
+        Returns:
+            IndexedVersion|None: the known version location, None on a miss
+        """
+        key = os.path.abspath(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(key)
+            if stat.st_mtime_ns != entry["mtime_ns"] or stat.st_size != entry["size"]:
+                return None
+            start, end = entry["span"]
+            with open(key, "rb") as f:
+                if _hash_prefix(f) != entry["hash"]:
+                    return None
+                window_start = max(0, start - VERIFY_CONTEXT)
+                f.seek(window_start)
+                window = f.read(end + VERIFY_CONTEXT - window_start)
+            instrumentation.count(
+                "bytes.read", min(HASH_PREFIX_BYTES, stat.st_size) + len(window)
+            )
+        except (OSError, KeyError, ValueError, TypeError):
+            return None
+
+        version = entry["version"].encode()
+        offset = start - window_start
+        if entry["kind"] in UNQUOTED_KINDS:
+            # the generic scanner does not see unquoted values, compare the bytes
+            found = window[offset : offset + len(version)] == version
+        else:
+            found = any(
+                match.start == offset and match.version == version
+                for match in scan_versions(window)
+            )
+        if not found:
+            return None
+        spans = [tuple(span) for span in entry["spans"]]
+        return IndexedVersion(entry["version"], entry["kind"], (start, end), spans)
+
+    def record(
+        self,
+        file_path: str,
+        version: str,
+        kind: str,
+        span: Tuple[int, int],
+        spans: List[Tuple[int, int]],
+    ) -> None:
+        """
+        Store the version location of a file in its current state on disk.
+        Args:
+            file_path(str): path to the file
+            version(str): the version of the file
+            kind(str): kind of key that matched, see scanner.KINDS
+            span(tuple(int, int)): byte span of the reported match
+            spans(list[tuple(int, int)]): byte spans of every occurrence
+                of the version, in ascending order
+        """
+        key = os.path.abspath(file_path)
+        try:
+            stat = os.stat(key)
+            with open(key, "rb") as f:
+                content_hash = _hash_prefix(f)
+        except OSError:
+            return
+        entry = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "hash": content_hash,
+            "kind": kind,
+            "version": version,
+            "span": list(span),
+            "spans": [list(s) for s in spans],
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty = True
+
+    def forget(self, file_path: str) -> None:
+        """Drop the entry of one file"""
+        with self._lock:
+            if self._entries.pop(os.path.abspath(file_path), None) is not None:
+                self._dirty = True
+
+    def prune(self) -> int:
+        """
+        Evict entries of files that no longer exist.
+        Returns:
+            int: number of evicted entries
+        """
+        with self._lock:
+            missing = [key for key in self._entries if not os.path.exists(key)]
+            for key in missing:
+                del self._entries[key]
+            self._dirty = self._dirty or bool(missing)
+        return len(missing)
+
+    def invalidate(self) -> None:
+        """Drop every entry and delete the index file"""
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def save(self) -> None:
+        """
+        Write the index to disk atomically, if anything changed.
+        The index is only a cache: if it cannot be written, it is skipped.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            import json
+
+            data = {"format": INDEX_FORMAT, "files": self._entries}
+            try:
+                os.makedirs(self.index_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix=".tmp")
+            except OSError:
+                return
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            self._dirty = False
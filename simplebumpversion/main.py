@@ -1,37 +1,372 @@
-import os
 import sys
 import argparse
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# Only argparse is imported up front. Core modules (and through them yaml,
+# subprocess, datetime, ...) are imported by the code path that needs them,
+# so --help, subcommands and simple bumps start quickly.
 
-from simplebumpversion.core.parse_arguments import parse_arguments
-from simplebumpversion.core.bump_version import (
-    find_version_in_file,
-    bump_semantic_version,
-    update_version_in_file,
-)
-from simplebumpversion.core.exceptions import NoValidVersionStr
-from simplebumpversion.core.git_tools import (
-    get_latest_git_tag,
-    get_commits_since_tag,
-    update_git_tag,
-    if_any_updates,
-)
-from simplebumpversion.core.change_logger import write_changelog
 
+def get_update_type(is_major: bool, is_minor: bool, is_patch: bool):
+    """Map bump flags to the update type written to the changelog"""
+    if is_major:
+        return "major"
+    elif is_minor:
+        return "minor"
+    elif is_patch:
+        return "patch"
+    return None
 
-def main():
-    parser = argparse.ArgumentParser(description="Bump version in a file")
+
+def get_bump_part(args: argparse.Namespace, is_major, is_minor, is_patch):
+    """Pick the version part to bump: --prerelease and --build win over the flags"""
+    if args.prerelease is not None:
+        return "prerelease"
+    if args.build:
+        return "build"
+    return get_update_type(is_major, is_minor, is_patch)
+
+
+def make_version_bumper(args: argparse.Namespace, part):
+    """
+    Build the version bump function for --scheme, --prerelease and --build.
+    Plain semver bumps go through the scheme as well, so that a major, minor
+    or patch bump of a pre-release (1.2.3-rc.5 -> 1.2.3) is accepted.
+    Returns:
+        callable: maps the current version to the new one
+    Raises:
+        ValueError: unknown scheme
+    """
+    from simplebumpversion.core.schemes import make_bumper
+
+    return make_bumper(part or "patch", args.scheme, args.prerelease or None)
+
+
+def read_change_msg(args: argparse.Namespace, default_msg):
+    """
+    Pick the changelog message: --change_msg_file, then --change_msg, then the default.
+    Raises:
+        FileNotFoundError: --change_msg_file does not exist
+    """
+    if args.change_msg_file:
+        print("Using message from --change_msg_file")
+        try:
+            with open(args.change_msg_file, "r") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Error: File '{args.change_msg_file}' not found.")
+    elif args.change_msg:
+        print("Using message from --change_msg")
+        return args.change_msg.strip()
+    return default_msg
+
+
+def open_version_index(args: argparse.Namespace):
+    """
+    Open the version-location index unless --no-cache is given.
+    --clear-cache drops it first; entries of deleted files are evicted.
+    """
+    if args.no_cache:
+        return None
+    from simplebumpversion.core.version_index import VersionIndex
+
+    index = VersionIndex()
+    if args.clear_cache:
+        index.invalidate()
+    index.prune()
+    return index
+
+
+def run_bump(
+    args, target_files, is_major, is_minor, is_patch, is_dry_run, default_msg=None
+):
+    """
+    Bump pipeline.
+    Resolves git state once, plans every file concurrently, then writes
+    all files or none of them. A single changelog entry and git tag are
+    created per new version.
+    """
+    from simplebumpversion.core.exceptions import NoValidVersionStr
+    from simplebumpversion.core.git_tools import is_version_tagged
+    from simplebumpversion.core.batch import (
+        resolve_repo_state,
+        plan_bumps,
+        apply_bumps,
+        distinct_versions,
+    )
+
+    state = resolve_repo_state()
+    if not state.has_updates:
+        print("No Updates since last version!")
+        return
+
+    update_type = get_bump_part(args, is_major, is_minor, is_patch)
+    index = open_version_index(args)
+    try:
+        bump = make_version_bumper(args, update_type)
+        plans = plan_bumps(
+            target_files, is_major, is_minor, is_patch, args.jobs, index, bump
+        )
+        tagged = [v for v in distinct_versions(plans) if is_version_tagged(v)]
+        if tagged:
+            print(f"Error: version {', '.join(tagged)} is already tagged")
+            print("No files were changed")
+            return 1
+        msg = read_change_msg(args, default_msg or state.commits)
+        if args.plan_output:
+            failed = [plan.file_path for plan in plans if not plan.updated]
+        else:
+            failed = apply_bumps(plans, is_dry_run, index)
+    except (FileNotFoundError, NoValidVersionStr) as e:
+        print(f"{str(e)}")
+        return 1
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        return 1
+    finally:
+        if index is not None:
+            index.save()
+
+    if failed:
+        for file in failed:
+            print(f"Error: Failed to update version in '{file}'")
+        print("No files were changed")
+        return 1
+
+    change_log_file = args.changelog or "CHANGELOG.md"
+    releases = [(version, change_log_file, msg) for version in distinct_versions(plans)]
+    # only the conventional changelog has section headings
+    grouped = bool(default_msg) and msg == default_msg
+    if args.plan_output:
+        return save_plan(args, plans, releases, update_type, grouped)
+    return publish_releases(args, releases, update_type, is_dry_run, grouped)
+
+
+def publish_releases(args, releases, update_type, is_dry_run, grouped=False):
+    """
+    Write the changelog entry and create the tag of every new version.
+    Args:
+        releases(list[tuple(str, str, str|None)]): tag, changelog path and
+            changelog message of every new version
+        grouped(bool): the messages are conventional changelogs
+    Returns:
+        int|None: 1 if the tags could not be created
+    """
+    from simplebumpversion.core.git_tools import create_git_tags
+    from simplebumpversion.core.change_logger import write_changelog
+
+    for tag, change_log_file, msg in releases:
+        # Only write changelog if message exists
+        if msg:
+            changelog_message = write_changelog(
+                tag,
+                change_log_file,
+                msg,
+                update_type,
+                is_dry_run,
+                args.changelog_archive_size,
+                grouped,
+            )
+            print(f"Changelog updated with: \n {changelog_message}")
+    if not is_dry_run:
+        # every tag of the release in one transaction
+        if not create_git_tags([(tag, None) for tag, _, _ in releases]):
+            return 1
+
+
+def save_plan(args, plans, releases, update_type, grouped=False):
+    """
+    Save planned file changes, changelog entries and tags as a plan file
+    (bump-version plan), see publish_releases for releases.
+    """
+    from simplebumpversion.core.change_logger import write_changelog
+    from simplebumpversion.core.git_tools import get_session
+    from simplebumpversion.core.plan import build_plan, plan_diff, write_plan
+
+    changelog = [
+        (
+            change_log_file,
+            write_changelog(
+                tag, change_log_file, msg, update_type, True, grouped=grouped
+            ),
+            args.changelog_archive_size,
+        )
+        for tag, change_log_file, msg in releases
+        if msg
+    ]
+    tags = [(tag, f"Tag {tag}") for tag, _, _ in releases]
+    plan = build_plan(plans, changelog, tags, get_session().head())
+    write_plan(args.plan_output, plan)
+    if args.diff:
+        print(plan_diff(plan))
+    print(
+        f"Plan written to {args.plan_output}: {len(plans)} file(s),"
+        f" tags {', '.join(tag for tag, _ in tags)}"
+    )
+
+
+def run_package_bump(args, profile, is_major, is_minor, is_patch, is_dry_run):
+    """
+    Monorepo bump pipeline.
+    Only the packages of the config that changed since their own base tag are
+    bumped; each gets its own changelog entry and prefixed tag. With
+    --conventional the entry is the conventional changelog of the commits that
+    touched the package.
+    """
+    import subprocess
+    from simplebumpversion.core.exceptions import NoValidVersionStr
+    from simplebumpversion.core.batch import plan_bumps, apply_bumps
+    from simplebumpversion.core.git_tools import (
+        get_session,
+        get_tag_index,
+        is_version_tagged,
+        iter_commits_since_tag,
+    )
+    from simplebumpversion.core.change_logger import build_conventional_changelog
+    from simplebumpversion.core.monorepo import (
+        commits_since,
+        detect_changes,
+        package_name,
+        package_tag,
+    )
+
+    session = get_session()
+    try:
+        states = detect_changes(profile.packages, session, get_tag_index())
+    except subprocess.CalledProcessError:
+        print("Error while fetching changed paths since last tag")
+        return 1
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        return 1
+    unchanged = [state.package.root for state in states if not state.changed]
+    if unchanged:
+        print(f"Unchanged packages: {', '.join(unchanged)}")
+    states = [state for state in states if state.changed]
+    if not states:
+        print("No Updates since last version!")
+        return
+
+    update_type = get_bump_part(args, is_major, is_minor, is_patch)
+    index = open_version_index(args)
+    try:
+        bump = make_version_bumper(args, update_type)
+        plans = plan_bumps(
+            [state.package.file for state in states],
+            is_major,
+            is_minor,
+            is_patch,
+            args.jobs,
+            index,
+            bump,
+        )
+        new_versions = {plan.file_path: plan.new_version for plan in plans}
+        tagged = [
+            package_tag(state.package, new_versions[state.package.file])
+            for state in states
+            if is_version_tagged(
+                new_versions[state.package.file],
+                package_name(state.package.tag_prefix),
+            )
+        ]
+        if tagged:
+            print(f"Error: version {', '.join(tagged)} is already tagged")
+            print("No files were changed")
+            return 1
+        msg = read_change_msg(args, None)
+        if args.plan_output:
+            failed = [plan.file_path for plan in plans if not plan.updated]
+        else:
+            failed = apply_bumps(plans, is_dry_run, index)
+    except (FileNotFoundError, NoValidVersionStr) as e:
+        print(f"{str(e)}")
+        return 1
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        return 1
+    finally:
+        if index is not None:
+            index.save()
+
+    if failed:
+        for file in failed:
+            print(f"Error: Failed to update version in '{file}'")
+        print("No files were changed")
+        return 1
+
+    def package_msg(state):
+        if msg:
+            return msg
+        if args.conventional:
+            commits = iter_commits_since_tag(state.base_tag, state.package.root)
+            changelog, _ = build_conventional_changelog(
+                commits, args.max_changelog_entries
+            )
+            return changelog or None
+        return commits_since(session, state.base_tag, state.package.root)
+
+    try:
+        releases = [
+            (
+                package_tag(state.package, new_versions[state.package.file]),
+                state.package.change_log_file
+                or profile.change_log_file
+                or args.changelog
+                or "CHANGELOG.md",
+                package_msg(state),
+            )
+            for state in states
+        ]
+    except subprocess.CalledProcessError:
+        print("Error while fetching commits since last tag")
+        return 1
+    grouped = args.conventional and not msg
+    if args.plan_output:
+        return save_plan(args, plans, releases, update_type, grouped)
+    return publish_releases(args, releases, update_type, is_dry_run, grouped)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the bump command"""
+    parser = argparse.ArgumentParser(
+        prog="bump-version",
+        description="Bump version in a file",
+        epilog="Other commands: bump-version check --help, bump-version plan --help,"
+        " bump-version apply --help, bump-version serve --help,"
+        " bump-version multi --help",
+    )
     parser.add_argument(
         "file", nargs="*", help="Path to the file(s) containing version"
     )
     parser.add_argument("--major", action="store_true", help="Bump major version")
     parser.add_argument("--minor", action="store_true", help="Bump minor version")
     parser.add_argument("--patch", action="store_true", help="Bump patch version")
+    parser.add_argument(
+        "--prerelease",
+        nargs="?",
+        const="",
+        metavar="LABEL",
+        help="Bump the pre-release (1.2.3-rc.4 -> 1.2.3-rc.5); a release version"
+        " becomes the first pre-release of the next patch. LABEL switches the label",
+    )
+    parser.add_argument(
+        "--build",
+        action="store_true",
+        help="Bump the build metadata (1.2.3+build.7 -> 1.2.3+build.8)",
+    )
+    parser.add_argument(
+        "--scheme",
+        default="semver",
+        help="Version scheme: semver (default), 0ver, calver or calver:FORMAT,"
+        " e.g. calver:YYYY.0M.MICRO",
+    )
 
     parser.add_argument(
         "--config", help="Load settings from a config file. Overrides cli arguments"
     )
+    parser.add_argument(
+        "--profile",
+        help="Use a named profile of the config file instead of its top-level settings",
+    )
 
     parser.add_argument(
         "--change_msg", help="Change description string (can be multiline)"
@@ -45,97 +380,443 @@ def main():
         "--changelog", default="CHANGELOG.md", help="Path to changelog file"
     )
 
+    parser.add_argument(
+        "--changelog_archive_size",
+        type=int,
+        help="Move older changelog entries to an archive file once the changelog "
+        "reaches this many bytes",
+    )
+
+    parser.add_argument(
+        "--conventional",
+        action="store_true",
+        help="Group the changelog by conventional commit type and derive the bump "
+        "type from the commits when no bump flag is given",
+    )
+
+    parser.add_argument(
+        "--max_changelog_entries",
+        type=int,
+        default=50,
+        help="Maximum entries per changelog section with --conventional",
+    )
+
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="Doesn't change the version file, prints what will happen",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Report the number of git subprocesses spawned",
+    )
 
-    if len(sys.argv) == 1:
-        # print help message when no args are provided
-        parser.print_help(sys.stderr)
-        sys.exit(1)
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the version-location index or the config cache,"
+        " scan every file and parse the config file",
+    )
+
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Drop the version-location index before running",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of threads used to read and scan the files",
+    )
+    parser.add_argument(
+        "--timings",
+        nargs="?",
+        const="table",
+        choices=["table", "json"],
+        help="Report the time spent in each phase and counters (bytes read and"
+        " written, git subprocesses, regex passes) on stderr, as a table or json",
+    )
+    # set by bump-version plan
+    parser.set_defaults(plan_output=None, diff=False)
+
+    return parser
+
+
+def run(args: argparse.Namespace):
+    """
+    Run the bump command with parsed arguments.
+    With --timings, the time of every phase and the counters are reported at the end.
+    Returns:
+        int|None: exit status, None on success
+    """
+    if not args.timings:
+        return run_command(args)
+
+    from simplebumpversion.core import instrumentation
+
+    instrumentation.reset()
+    instrumentation.enable()
+    try:
+        with instrumentation.span("total"):
+            return run_command(args)
+    finally:
+        instrumentation.disable()
+        instrumentation.report(args.timings)
+
+
+def run_command(args: argparse.Namespace):
+    """
+    Bump command: resolve the target files, derive the change message and
+    bump type from the commits if asked to, then run the bump pipeline.
+    Returns:
+        int|None: exit status, None on success
+    """
+    from simplebumpversion.core import instrumentation
+    from simplebumpversion.core.parse_arguments import parse_arguments
 
-    target_files, is_major, is_minor, is_patch, is_dry_run = parse_arguments(args)
+    try:
+        target_files, is_major, is_minor, is_patch, is_dry_run = parse_arguments(args)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        return 1
 
     if is_dry_run:
         print("# DRY RUN MODE - no changes will be made")
 
-    # iterate the target files, check if they exist
-    for file in target_files:
-        # if yes, bump their version
-        if not os.path.exists(file):
-            print(f"Error: File '{file}' not found")
-            return 1
+    profile = None
+    if args.config:
+        from simplebumpversion.core.config_handler import load_config
+
+        # already loaded and validated by parse_arguments, this is a cache hit
+        profile = load_config(args.config, args.profile, use_cache=not args.no_cache)
+
+    conventional_msg = None
+    if args.conventional:
+        import subprocess
+        from simplebumpversion.core.git_tools import (
+            get_latest_git_tag,
+            iter_commits_since_tag,
+        )
+        from simplebumpversion.core.change_logger import build_conventional_changelog
 
         try:
-            current_version = find_version_in_file(file)
-
-            try:
-                if not if_any_updates():
-                    print("No Updates since last version!")
-                    return
-                new_version = bump_semantic_version(
-                    current_version, major=is_major, minor=is_minor, patch=is_patch
-                )
-                if is_major:
-                    update_type = "major"
-                elif is_minor:
-                    update_type = "minor"
-                elif is_patch:
-                    update_type = "patch"
-                else:
-                    update_type = None
-
-                updated = update_version_in_file(
-                    file, current_version, new_version, is_dry_run
+            with instrumentation.span("git"):
+                conventional_msg, derived_type = build_conventional_changelog(
+                    iter_commits_since_tag(get_latest_git_tag()),
+                    args.max_changelog_entries,
                 )
+        except subprocess.CalledProcessError:
+            print("Error while fetching commits since last tag")
+            return 1
+        if derived_type and not (is_major or is_minor or is_patch):
+            print(f"Bump type derived from commits: {derived_type}")
+            is_major = derived_type == "major"
+            is_minor = derived_type == "minor"
+            is_patch = derived_type == "patch"
+
+    if profile is not None and profile.packages:
+        # each package gets the commits that touched it, not the whole log;
+        # the conventional changelog is built per package as well
+        code = run_package_bump(args, profile, is_major, is_minor, is_patch, is_dry_run)
+    else:
+        code = run_bump(
+            args,
+            target_files,
+            is_major,
+            is_minor,
+            is_patch,
+            is_dry_run,
+            conventional_msg,
+        )
+    if args.batch:
+        from simplebumpversion.core.git_tools import get_subprocess_count
+
+        print(f"Git subprocesses spawned: {get_subprocess_count()}")
+    return code
+
+
+def serve_command(argv: list):
+    """bump-version serve: answer bump requests over a unix socket"""
+    from simplebumpversion.core.server import default_socket_path, serve
+
+    parser = argparse.ArgumentParser(
+        prog="bump-version serve",
+        description="Keep configs, compiled patterns and git state warm and answer "
+        "JSON bump requests over a unix socket",
+    )
+    parser.add_argument(
+        "--socket", default=default_socket_path(), help="Path of the unix socket"
+    )
+    args = parser.parse_args(argv)
+    return serve(args.socket, main)
+
+
+def multi_command(argv: list):
+    """bump-version multi: bump many repositories on a process pool"""
+    parser = argparse.ArgumentParser(
+        prog="bump-version multi",
+        description="Run the bump command in every repository of a directory or "
+        "manifest file and print one JSON summary",
+        epilog="Arguments after -- are passed to the bump command of every "
+        "repository without its own, e.g. -- --config bump_config.yml --minor",
+    )
+    parser.add_argument(
+        "target", help="Directory with repositories, or a YAML manifest file"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Number of worker processes, defaults to the number of cores",
+    )
+    parser.add_argument(
+        "--report", help="Write the JSON summary to this file instead of stdout"
+    )
+    bump_args = []
+    if "--" in argv:
+        position = argv.index("--")
+        argv, bump_args = argv[:position], argv[position + 1 :]
+    args = parser.parse_args(argv)
+
+    import json
+    from simplebumpversion.core.multi import FAILED, run_multi
+
+    try:
+        report = run_multi(args.target, bump_args, args.processes)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        return 1
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        counts = ", ".join(f"{n} {outcome}" for outcome, n in report["counts"].items())
+        print(f"{len(report['results'])} repositories: {counts}")
+    else:
+        print(json.dumps(report, indent=2))
+    return 1 if report["counts"][FAILED] else 0
+
+
+def plan_command(argv: list):
+    """bump-version plan: save a bump as a plan file instead of applying it"""
+    from simplebumpversion.core.plan import DEFAULT_PLAN_FILE
+
+    parser = build_parser()
+    parser.prog = "bump-version plan"
+    parser.description = (
+        "Work out a bump without changing anything and save the file changes,"
+        " changelog entries and tags to a plan file for bump-version apply"
+    )
+    parser.epilog = None
+    parser.add_argument(
+        "--output",
+        "-o",
+        dest="plan_output",
+        help=f"Path of the plan file, defaults to {DEFAULT_PLAN_FILE}",
+    )
+    parser.add_argument(
+        "--diff", action="store_true", help="Print the planned changes as a diff"
+    )
+    parser.set_defaults(plan_output=DEFAULT_PLAN_FILE)
+    args = parser.parse_args(argv)
+    return run(args)
+
+
+def apply_command(argv: list):
+    """bump-version apply: apply a plan file made by bump-version plan"""
+    from simplebumpversion.core.plan import DEFAULT_PLAN_FILE
+
+    parser = argparse.ArgumentParser(
+        prog="bump-version apply",
+        description="Check that the files of a plan are unchanged, then write the"
+        " new versions and changelog entries and create the tags",
+    )
+    parser.add_argument(
+        "plan", nargs="?", default=DEFAULT_PLAN_FILE, help="Path of the plan file"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only check the plan, change nothing",
+    )
+    parser.add_argument(
+        "--diff", action="store_true", help="Print the changes as a diff"
+    )
+    args = parser.parse_args(argv)
 
-                if updated:
-                    print(f"Version bumped from {current_version} to {new_version}")
-                    tag = get_latest_git_tag()
-                    msg = get_commits_since_tag(tag)
-                    if args.change_msg_file:
-                        print("Using message from --change_msg_file")
-                        try:
-                            with open(args.change_msg_file, "r") as f:
-                                msg = f.read().strip()
-                        except FileNotFoundError:
-                            print(f"Error: File '{args.change_msg_file}' not found.")
-                            return 1
-                    elif args.change_msg:
-                        print("Using message from --change_msg")
-                        msg = args.change_msg.strip()
-
-                    # Only write changelog if message exists
-                    change_log_file = (
-                        args.changelog if args.changelog else "CHANGELOG.md"
-                    )
-                    if msg:
-                        changelog_message = write_changelog(
-                            new_version,
-                            change_log_file or "CHANGELOG.md",
-                            msg,
-                            update_type,
-                            is_dry_run,
-                        )
-                        print(f"Changelog updated with: \n {changelog_message}")
-                    if not is_dry_run:
-                        update_git_tag(new_version)
-                else:
-                    print(f"Error: Failed to update version in '{file}'")
-                    return 1
-
-            except ValueError as e:
-                print(f"Error: {str(e)}")
-                return 1
-
-        except NoValidVersionStr as e:
-            print(f"{str(e)}")
+    from simplebumpversion.core.git_tools import create_git_tags, get_session
+    from simplebumpversion.core.plan import apply_plan, check_plan, plan_diff, read_plan
+
+    try:
+        plan = read_plan(args.plan)
+    except FileNotFoundError as e:
+        print(f"{str(e)}")
+        return 1
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        return 1
+
+    session = get_session()
+    errors = check_plan(plan, session.head())
+    existing = session.tags()
+    errors.extend(
+        f"tag {tag['name']} already exists"
+        for tag in plan["tags"]
+        if tag["name"] in existing
+    )
+    if errors:
+        print("Error: the plan no longer applies")
+        for error in errors:
+            print(f"  {error}")
+        print("No files were changed")
+        return 1
+    if args.diff:
+        print(plan_diff(plan))
+    if args.dry_run:
+        print("# DRY RUN MODE - no changes will be made")
+        print(f"Plan {args.plan} applies: {len(plan['files'])} file(s)")
+        return
+
+    try:
+        apply_plan(plan)
+    except OSError as e:
+        print(f"Error: {str(e)}")
+        return 1
+    for entry in plan["files"]:
+        print(
+            f"Version bumped from {entry['old_version']} to {entry['new_version']}"
+            f" in '{entry['path']}'"
+        )
+    for item in plan["changelog"]:
+        print(f"Changelog updated with: \n {item['entry']}")
+    if plan["tags"]:
+        if not create_git_tags([(t["name"], t["message"]) for t in plan["tags"]]):
             return 1
 
 
+def check_command(argv: list):
+    """bump-version check: verify that the version files agree, without changing them"""
+    parser = argparse.ArgumentParser(
+        prog="bump-version check",
+        description="Check that every file carries the same well-formed version"
+        " and that the version is not tagged yet. Changes nothing",
+    )
+    parser.add_argument(
+        "file", nargs="*", help="Path to the file(s) containing version"
+    )
+    parser.add_argument("--config", help="Check the files of a config file")
+    parser.add_argument("--profile", help="Profile of the config file")
+    parser.add_argument(
+        "--scheme", default="semver", help="Version scheme the version must follow"
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop at the first file without a version or with a different version",
+    )
+    parser.add_argument("--no-tags", action="store_true", help="Do not check the tags")
+    parser.add_argument(
+        "--jobs", type=int, help="Number of threads used to read the files"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the version-location index, scan every file",
+    )
+    parser.set_defaults(clear_cache=False)
+    args = parser.parse_args(argv)
+    if not args.file and not args.config:
+        parser.error("give the files to check or --config")
+
+    from simplebumpversion.core.check import check_versions, scan_versions
+    from simplebumpversion.core.discovery import expand_files
+
+    # groups of files that must agree, with the tag prefix of their version
+    groups = []
+    try:
+        if args.config:
+            from simplebumpversion.core.config_handler import load_config
+
+            profile = load_config(args.config, args.profile, not args.no_cache)
+            if profile.files:
+                files = expand_files(profile.files, args.jobs, not args.no_cache)
+                groups.append((files, ""))
+            groups += [
+                ([package.file], package.tag_prefix) for package in profile.packages
+            ]
+        else:
+            groups.append((expand_files(args.file, args.jobs, not args.no_cache), ""))
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        return 1
+
+    index = open_version_index(args)
+    group_of = {
+        file: str(position)
+        for position, (files, _) in enumerate(groups)
+        for file in files
+    }
+    try:
+        results = scan_versions(
+            list(group_of), args.jobs, index, args.fail_fast, group_of
+        )
+    finally:
+        if index is not None:
+            index.save()
+    tags = None
+    if not args.no_tags:
+        from simplebumpversion.core.git_tools import get_session
+
+        # one read of packed-refs and the loose tag refs
+        tags = get_session().tags()
+
+    by_file = {result.file_path: result for result in results}
+    failed = False
+    for files, tag_prefix in groups:
+        group = [by_file[file] for file in files if file in by_file]
+        errors = check_versions(group, tags, tag_prefix, args.scheme)
+        for error in errors:
+            print(error if error.startswith("Error:") else f"Error: {error}")
+        if errors or len(group) < len(files):
+            failed = True
+            if args.fail_fast:
+                break
+        elif group:
+            print(f"{tag_prefix}{group[0].version}: {len(group)} file(s) agree")
+    return 1 if failed else None
+
+
+# subcommands, selected by the first argument
+COMMANDS = {
+    "check": check_command,
+    "plan": plan_command,
+    "apply": apply_command,
+    "serve": serve_command,
+    "multi": multi_command,
+}
+
+
+def main(argv: list = None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if not argv:
+        # print help message when no args are provided
+        parser.print_help(sys.stderr)
+        sys.exit(1)
+
+    return run(args)
+
+
 if __name__ == "__main__":
+    import os
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
     sys.exit(main())
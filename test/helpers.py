@@ -0,0 +1,78 @@
+"""Helpers shared by the test modules: git repositories, temporary directories and CLI runs"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import io
+import subprocess
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from simplebumpversion import main as main_module
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+def git(repo, *args):
+    env = dict(os.environ, **GIT_ENV)
+    return subprocess.run(
+        ["git", *args], cwd=repo, env=env, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def temp_dir(test):
+    """Create a temporary directory that is removed when test finishes"""
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    return directory.name
+
+
+def make_repo(test, n_files, repo=None):
+    """
+    Create a repo with a tagged commit, a later commit and n version files.
+    The repo is a temporary directory removed when test finishes, unless a
+    repo path is given.
+    """
+    if repo is None:
+        repo = temp_dir(test)
+    os.makedirs(repo, exist_ok=True)
+    git(repo, "init", "-q")
+    files = []
+    for i in range(n_files):
+        path = os.path.join(repo, f"version_{i}.py")
+        with open(path, "w") as f:
+            f.write('__version__ = "1.2.3"\n')
+        files.append(path)
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "initial")
+    git(repo, "tag", "-a", "1.2.3", "-m", "Tag 1.2.3")
+    with open(os.path.join(repo, "README"), "w") as f:
+        f.write("change\n")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "second")
+    return repo, files
+
+
+class MainTestCase(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._env = patch.dict(os.environ, GIT_ENV)
+        self._env.start()
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._env.stop()
+
+    def run_main(self, argv):
+        out = io.StringIO()
+        with patch.object(sys, "argv", ["bump-version", *argv]), redirect_stdout(out):
+            code = main_module.main()
+        return code, out.getvalue()
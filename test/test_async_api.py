@@ -0,0 +1,94 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import asyncio
+import subprocess
+import unittest
+
+from simplebumpversion.core import git_session
+from simplebumpversion.core.async_api import BumpRequest, bump, bump_many, create_tags
+from simplebumpversion.core.exceptions import NoValidVersionStr
+from helpers import MainTestCase, git, make_repo
+
+
+class TestAsyncBump(MainTestCase):
+    def test_bump(self):
+        repo, files = make_repo(self, 2)
+        result = asyncio.run(bump(repo, [os.path.basename(f) for f in files], "minor"))
+        self.assertEqual(result.tags, ["1.3.0"])
+        self.assertEqual([plan.new_version for plan in result.plans], ["1.3.0"] * 2)
+        for path in files:
+            with open(path) as f:
+                self.assertIn("1.3.0", f.read())
+        with open(os.path.join(repo, "CHANGELOG.md")) as f:
+            changelog = f.read()
+        self.assertIn("## 1.3.0", changelog)
+        self.assertIn("second", changelog)
+        self.assertIn("1.3.0", git(repo, "tag", "--list"))
+
+    def test_no_updates(self):
+        repo, files = make_repo(self, 1)
+        git(repo, "tag", "-a", "1.2.4", "-m", "Tag 1.2.4")
+        result = asyncio.run(bump(repo, files))
+        self.assertFalse(result.has_updates)
+        with open(files[0]) as f:
+            self.assertIn("1.2.3", f.read())
+
+    def test_dry_run(self):
+        repo, files = make_repo(self, 1)
+        result = asyncio.run(bump(repo, files, dry_run=True, changelog=None))
+        self.assertEqual(result.tags, [])
+        self.assertEqual(result.plans[0].new_version, "1.2.4")
+        with open(files[0]) as f:
+            self.assertIn("1.2.3", f.read())
+
+    def test_already_tagged(self):
+        repo, files = make_repo(self, 1)
+        git(repo, "tag", "v1.2.4", "HEAD~1")
+        with self.assertRaises(ValueError):
+            asyncio.run(bump(repo, files))
+        with open(files[0]) as f:
+            self.assertIn("1.2.3", f.read())
+
+    def test_bump_many(self):
+        repos = [make_repo(self, 1) for _ in range(6)]
+        requests = [BumpRequest(repo, files, changelog=None) for repo, files in repos]
+        missing = BumpRequest(make_repo(self, 1)[0], ["missing.py"])
+        results = asyncio.run(bump_many([*requests, missing], concurrency=2))
+        for result, (repo, _) in zip(results, repos):
+            self.assertEqual(result.tags, ["1.2.4"])
+            self.assertEqual(git(repo, "tag", "--list"), "1.2.3\n1.2.4")
+        self.assertIsInstance(results[-1], FileNotFoundError)
+
+    def test_tags_all_or_nothing(self):
+        repo, files = make_repo(self, 2)
+        with open(files[1], "w") as f:
+            f.write('__version__ = "2.0.0"\n')
+        # refs/tags/2.0.1/old blocks refs/tags/2.0.1, so the transaction fails
+        git(repo, "tag", "2.0.1/old", "HEAD~1")
+        with self.assertRaises(subprocess.CalledProcessError):
+            asyncio.run(bump(repo, files, changelog=None))
+        self.assertEqual(git(repo, "tag", "--list"), "1.2.3\n2.0.1/old")
+
+    def test_create_tags_two_processes(self):
+        repo, _ = make_repo(self, 1)
+        before = git_session.get_subprocess_count()
+        asyncio.run(create_tags(repo, ["2.0.0", "api-2.0.0"]))
+        self.assertEqual(git_session.get_subprocess_count() - before, 2)
+        self.assertEqual(git(repo, "tag", "--list"), "1.2.3\n2.0.0\napi-2.0.0")
+        self.assertEqual(
+            git(repo, "tag", "-l", "--format=%(contents)", "api-2.0.0"), "Tag api-2.0.0"
+        )
+        git(repo, "fsck", "--strict")
+
+    def test_no_version(self):
+        repo, files = make_repo(self, 1)
+        with open(files[0], "w") as f:
+            f.write("nothing here\n")
+        with self.assertRaises(NoValidVersionStr):
+            asyncio.run(bump(repo, files))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import unittest
+
+from simplebumpversion.core.buffer_api import (
+    Edit,
+    apply_edits,
+    find_version_in_buffer,
+    version_edits,
+)
+from simplebumpversion.core.bump_version import (
+    find_version_in_file,
+    update_version_in_file,
+)
+from simplebumpversion.core.exceptions import NoValidVersionStr
+from helpers import MainTestCase, make_repo, temp_dir
+
+UNICODE_SOURCE = '# Ünïcødé — 版本\r\n__version__ = "1.2.3"\r\nname = "ça"\r\n'.encode()
+
+PYPROJECT = b"""[tool.ruff]
+target-version = "py38"
+
+[project]
+name = "caf\xc3\xa9"
+description = \"\"\"
+version = "0.0.1"
+\"\"\"
+version = "1.2.3"
+"""
+
+
+class TestBufferApi(unittest.TestCase):
+    def test_find(self):
+        match = find_version_in_buffer(UNICODE_SOURCE)
+        self.assertEqual(match.version, b"1.2.3")
+        self.assertEqual(UNICODE_SOURCE[match.start : match.end], b"1.2.3")
+        with self.assertRaises(NoValidVersionStr):
+            find_version_in_buffer(b"nothing here", "notes.txt")
+        with self.assertRaises(TypeError):
+            find_version_in_buffer(UNICODE_SOURCE.decode())
+
+    def test_memoryview(self):
+        # the structured locator walks the view without a copy
+        view = memoryview(bytearray(PYPROJECT))
+        match = find_version_in_buffer(view, "pyproject.toml")
+        self.assertEqual(match.kind, "toml")
+        self.assertEqual(PYPROJECT[match.start : match.end], b"1.2.3")
+        edits = version_edits(view, "1.2.3", "1.3.0", "pyproject.toml")
+        self.assertEqual(edits, [Edit(match.start, match.end, b"1.3.0")])
+        self.assertEqual(
+            apply_edits(view, edits), PYPROJECT.replace(b'= "1.2.3"', b'= "1.3.0"')
+        )
+        # the buffer itself is left as it was
+        self.assertEqual(view.tobytes(), PYPROJECT)
+
+    def test_no_edits(self):
+        self.assertEqual(version_edits(UNICODE_SOURCE, "9.9.9", "9.9.10"), [])
+        self.assertEqual(apply_edits(UNICODE_SOURCE, []), UNICODE_SOURCE)
+
+
+class TestFileWrappers(unittest.TestCase):
+    def test_unicode_file(self):
+        directory = temp_dir(self)
+        path = os.path.join(directory, "version.py")
+        with open(path, "wb") as f:
+            f.write(UNICODE_SOURCE)
+        self.assertEqual(find_version_in_file(path), "1.2.3")
+        self.assertTrue(update_version_in_file(path, "1.2.3", "1.2.10", False))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), UNICODE_SOURCE.replace(b"1.2.3", b"1.2.10"))
+        self.assertFalse(update_version_in_file(path, "1.2.3", "1.2.4", False))
+
+
+class TestMainBytes(MainTestCase):
+    def test_crlf_unicode_round_trip(self):
+        repo, files = make_repo(self, 2)
+        source = UNICODE_SOURCE.replace("ça".encode(), "café".encode())
+        with open(files[0], "wb") as f:
+            f.write(source)
+        os.chdir(repo)
+        code, out = self.run_main([*files, "--patch", "--no-cache"])
+        self.assertIsNone(code, out)
+        with open(files[0], "rb") as f:
+            self.assertEqual(f.read(), source.replace(b"1.2.3", b"1.2.4"))
+
+
+if __name__ == "__main__":
+    unittest.main()
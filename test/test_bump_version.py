@@ -14,7 +14,9 @@ from simplebumpversion.core.bump_version import (
     is_git_tag_version,
 )
 
+from simplebumpversion.core.buffer_api import apply_edits, version_edits
 from simplebumpversion.core.exceptions import NoValidVersionStr
+from simplebumpversion.core.scanner import find_version
 
 
 class TestBumpVersion(unittest.TestCase):
@@ -100,5 +102,31 @@ class TestBumpVersion(unittest.TestCase):
             self.assertFalse(updated)
 
 
+class TestScanner(unittest.TestCase):
+    def test_semantic_version_wins_over_flexible(self):
+        content = 'version = "v0.9-19-g7e2d"\n"version": "1.2.3"\n'
+        match = find_version(content)
+        self.assertEqual(match.version, "1.2.3")
+        self.assertEqual(match.kind, "json")
+        self.assertEqual(content[match.start : match.end], "1.2.3")
+
+    def test_kind_precedence(self):
+        content = '__version__ = "2.0.0"\nversion = "1.0.0"\n'
+        self.assertEqual(find_version(content).version, "1.0.0")
+
+    def test_bytes_buffer(self):
+        match = find_version(memoryview(b'VERSION = "3.4.5"'))
+        self.assertEqual((match.version, match.kind), (b"3.4.5", "VERSION"))
+
+    def test_edits_keep_formatting(self):
+        content = b"version='1.2.3'\n__version__ = \"1.2.3\"\nother = '1.2.3'\n"
+        edits = version_edits(content, "1.2.3", "1.2.4")
+        self.assertEqual(len(edits), 2)
+        self.assertEqual(
+            apply_edits(content, edits),
+            b"version='1.2.4'\n__version__ = \"1.2.4\"\nother = '1.2.3'\n",
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
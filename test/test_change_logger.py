@@ -0,0 +1,127 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import unittest
+from unittest.mock import patch
+
+from simplebumpversion.core import change_logger, file_handler
+from simplebumpversion.core.change_logger import (
+    write_changelog,
+    build_conventional_changelog,
+)
+from simplebumpversion.core.git_tools import Commit
+from helpers import temp_dir
+
+
+class TestWriteChangelog(unittest.TestCase):
+    def setUp(self):
+        self.dir = temp_dir(self)
+        self.path = os.path.join(self.dir, "CHANGELOG.md")
+
+    def read(self, name="CHANGELOG.md"):
+        with open(os.path.join(self.dir, name)) as f:
+            return f.read()
+
+    def test_prepends_and_creates(self):
+        write_changelog("1.0.0", self.path, "first", "patch", False)
+        entry = write_changelog("1.0.1", self.path, "a\nb", "patch", False)
+        content = self.read()
+        self.assertTrue(content.startswith(entry))
+        self.assertIn("- a\n- b\n", entry)
+        self.assertTrue(content.endswith("- first\n\n"))
+        self.assertEqual(os.listdir(self.dir), ["CHANGELOG.md"])
+
+    def test_plain_message_lines_are_bullets(self):
+        entry = write_changelog("1.0.0", self.path, "### a\n\nb", "patch", False)
+        self.assertTrue(entry.endswith("]\n\n- ### a\n- \n- b\n\n"))
+
+    def test_permissions(self):
+        old_mask = os.umask(0o027)
+        self.addCleanup(os.umask, old_mask)
+        write_changelog("1.0.0", self.path, "first", "patch", False)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o640)
+        os.chmod(self.path, 0o604)
+        write_changelog("1.0.1", self.path, "second", "patch", False)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o604)
+
+    def test_chunked_fallback_copy(self):
+        old = "x" * 10000
+        with open(self.path, "w") as f:
+            f.write(old)
+        with patch.object(file_handler, "CHUNK_SIZE", 100), patch.object(
+            file_handler, "_copy_file_range", side_effect=OSError
+        ), patch.object(file_handler, "_sendfile", side_effect=OSError):
+            entry = write_changelog("1.0.1", self.path, "msg", "patch", False)
+        self.assertEqual(self.read(), entry + old)
+
+    def test_dry_run_does_not_write(self):
+        write_changelog("1.0.0", self.path, "first", "patch", True)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_archive_rollover(self):
+        write_changelog("1.0.0", self.path, "first", "patch", False)
+        write_changelog("1.0.1", self.path, "second", "patch", False, archive_size=10)
+        self.assertIn("- first", self.read("CHANGELOG.1.md"))
+        hot = self.read()
+        self.assertIn("- second", hot)
+        self.assertNotIn("- first", hot)
+        self.assertIn("CHANGELOG.1.md", hot)
+        write_changelog("1.0.2", self.path, "third", "patch", False, archive_size=10)
+        self.assertIn("- second", self.read("CHANGELOG.2.md"))
+
+    def test_failed_archive_keeps_changelog(self):
+        write_changelog("1.0.0", self.path, "first", "patch", False)
+        before = self.read()
+        stage = change_logger._stage_file
+        calls = []
+
+        def fail_second(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise OSError("disk full")
+            return stage(*args)
+
+        with patch.object(change_logger, "_stage_file", side_effect=fail_second):
+            with self.assertRaises(OSError):
+                write_changelog("1.0.1", self.path, "x", "patch", False, archive_size=1)
+        self.assertEqual(self.read(), before)
+        self.assertEqual(os.listdir(self.dir), ["CHANGELOG.md"])
+
+
+class TestConventionalChangelog(unittest.TestCase):
+    def commits(self, *subjects):
+        return (Commit(f"{i:07x}", subject, "") for i, subject in enumerate(subjects))
+
+    def test_groups_and_bump_type(self):
+        msg, bump_type = build_conventional_changelog(
+            self.commits("fix(cli): crash", "feat: new flag", "chore: tidy", "docs")
+        )
+        self.assertEqual(bump_type, "minor")
+        self.assertEqual(
+            msg,
+            "### Features\nnew flag (0000001)\n\n"
+            "### Bug fixes\ncli: crash (0000000)\n\n"
+            "### Other changes\nchore: tidy (0000002)\ndocs (0000003)",
+        )
+
+    def test_breaking_and_cap(self):
+        commits = self.commits("feat!: drop py2", *["fix: bug"] * 10)
+        msg, bump_type = build_conventional_changelog(commits, max_entries=3)
+        self.assertEqual(bump_type, "major")
+        self.assertIn("### Breaking changes\ndrop py2 (0000000)", msg)
+        self.assertEqual(msg.count("bug ("), 3)
+        self.assertIn("... and 7 more", msg)
+        body = Commit("abc", "refactor: x", "BREAKING CHANGE: y")
+        self.assertEqual(build_conventional_changelog([body])[1], "major")
+        self.assertEqual(build_conventional_changelog([]), ("", None))
+
+    def test_sections_in_changelog(self):
+        path = os.path.join(temp_dir(self), "CHANGELOG.md")
+        msg, _ = build_conventional_changelog(self.commits("feat: a", "fix: b"))
+        entry = write_changelog("1.1.0", path, msg, "minor", False, grouped=True)
+        self.assertIn("### Features\n\n- a (0000000)\n\n### Bug fixes\n", entry)
+
+
+if __name__ == "__main__":
+    unittest.main()
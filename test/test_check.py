@@ -0,0 +1,100 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import unittest
+
+from simplebumpversion.core.check import (
+    FileVersion,
+    check_versions,
+    scan_versions,
+)
+from helpers import MainTestCase, git, make_repo, temp_dir
+
+
+def make_files(test, *versions):
+    directory = temp_dir(test)
+    paths = []
+    for i, version in enumerate(versions):
+        path = os.path.join(directory, f"version_{i}.py")
+        with open(path, "w") as f:
+            f.write(f'__version__ = "{version}"\n' if version else "nothing\n")
+        paths.append(path)
+    return paths
+
+
+class TestScanVersions(unittest.TestCase):
+    def test_scan_in_order(self):
+        paths = make_files(self, *["1.2.3"] * 8)
+        results = scan_versions(paths, jobs=4)
+        self.assertEqual([r.file_path for r in results], paths)
+        self.assertEqual({r.version for r in results}, {"1.2.3"})
+
+    def test_errors(self):
+        paths = make_files(self, "1.2.3", None)
+        results = scan_versions([*paths, "missing.py"])
+        self.assertIsNone(results[1].version)
+        self.assertIn("No version found", results[1].error)
+        self.assertIn("not found", results[2].error)
+
+    def test_fail_fast(self):
+        paths = make_files(self, "1.2.3", "1.2.4", *["1.2.3"] * 4)
+        results = scan_versions(paths, jobs=1, fail_fast=True)
+        self.assertEqual([r.version for r in results], ["1.2.3", "1.2.4"])
+        # different versions in different groups are fine
+        groups = {path: str(i) for i, path in enumerate(paths)}
+        results = scan_versions(paths, jobs=1, fail_fast=True, groups=groups)
+        self.assertEqual(len(results), 6)
+
+
+class TestCheckVersions(unittest.TestCase):
+    def test_consistent(self):
+        results = [FileVersion("a", "1.2.3"), FileVersion("b", "1.2.3")]
+        self.assertEqual(check_versions(results, {"1.2.2": "x"}), [])
+
+    def test_problems(self):
+        results = [FileVersion("a", "1.2.3"), FileVersion("b", "1.2")]
+        errors = check_versions(results)
+        self.assertIn("Versions differ: 1.2.3 in a; 1.2 in b", errors)
+        self.assertIn("Invalid semver version: 1.2", errors)
+
+    def test_tagged(self):
+        results = [FileVersion("a", "1.2.3")]
+        self.assertEqual(
+            check_versions(results, {"api-v1.2.3": "x"}, "api-"),
+            ["Version 1.2.3 is already tagged (api-v1.2.3)"],
+        )
+        self.assertEqual(check_versions(results, {"api-v1.2.3": "x"}), [])
+
+
+class TestCheckCommand(MainTestCase):
+    def test_check(self):
+        repo, _ = make_repo(self, 2)
+        os.chdir(repo)
+        git(repo, "tag", "-d", "1.2.3")
+        code, out = self.run_main(["check", "version_0.py", "version_1.py"])
+        self.assertIsNone(code, out)
+        self.assertIn("1.2.3: 2 file(s) agree", out)
+
+    def test_tagged_and_mismatch(self):
+        repo, files = make_repo(self, 2)
+        os.chdir(repo)
+        git(repo, "tag", "-d", "1.2.3")
+        git(repo, "tag", "v1.2.3")
+        code, out = self.run_main(["check", "version_*.py"])
+        self.assertEqual(code, 1)
+        self.assertIn("Error: Version 1.2.3 is already tagged (v1.2.3)", out)
+        self.assertIsNone(self.run_main(["check", "--no-tags", "version_*.py"])[0])
+
+        with open(files[1], "w") as f:
+            f.write('__version__ = "1.3.0"\n')
+        code, out = self.run_main(["check", "--no-tags", "--fail-fast", "version_*.py"])
+        self.assertEqual(code, 1)
+        self.assertIn("Versions differ", out)
+        # nothing was changed
+        with open(files[0]) as f:
+            self.assertEqual(f.read(), '__version__ = "1.2.3"\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
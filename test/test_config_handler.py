@@ -0,0 +1,128 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import unittest
+from unittest.mock import patch
+
+from simplebumpversion.core import config_handler
+from simplebumpversion.core.config_handler import (
+    config_errors,
+    load_config,
+    parse_config_arguments,
+)
+from helpers import temp_dir
+
+CONFIG = """
+name: 'Monorepo'
+settings:
+  bump_type: patch
+  files:
+    - setup.py
+  change_log_file: CHANGELOG.md
+profiles:
+  docs:
+    description: 'docs only'
+    settings:
+      files:
+        - docs/conf.py
+  release:
+    settings:
+      bump_type: minor
+"""
+
+
+class TestConfigHandler(unittest.TestCase):
+    def setUp(self):
+        self.dir = temp_dir(self)
+        self.path = os.path.join(self.dir, "bump.yml")
+        self.write(CONFIG)
+        self._env = patch.dict(os.environ, {"XDG_CACHE_HOME": self.dir})
+        self._env.start()
+        config_handler._config_cache.clear()
+
+    def tearDown(self):
+        self._env.stop()
+        config_handler._config_cache.clear()
+
+    def write(self, content):
+        with open(self.path, "w") as f:
+            f.write(content)
+
+    def test_profiles_merge_over_settings(self):
+        self.assertEqual(load_config(self.path).files, ("setup.py",))
+        docs = load_config(self.path, "docs")
+        self.assertEqual(docs.files, ("docs/conf.py",))
+        self.assertEqual(docs.bump_type, "patch")
+        self.assertEqual(docs.change_log_file, "CHANGELOG.md")
+        self.assertEqual(docs.name, "Monorepo")
+        self.assertEqual(docs.description, "docs only")
+        files, is_major, is_minor, is_patch, _ = parse_config_arguments(
+            self.path, "release"
+        )
+        flags = (is_major, is_minor, is_patch)
+        self.assertEqual((files, flags), (["setup.py"], (False, True, False)))
+
+    def test_unknown_profile(self):
+        with self.assertRaisesRegex(ValueError, "Available profiles: default, docs"):
+            load_config(self.path, "missing")
+
+    def test_profiles_only(self):
+        # top-level settings without files are only a base for the profiles
+        self.write(
+            "settings:\n  bump_type: minor\n"
+            "profiles:\n  docs:\n    settings:\n      files: [docs/conf.py]\n"
+        )
+        self.assertEqual(load_config(self.path, "docs").bump_type, "minor")
+        with self.assertRaisesRegex(ValueError, "Profile 'default' not found"):
+            load_config(self.path)
+        self.write(CONFIG.replace("  files:\n    - setup.py\n", "", 1))
+        with self.assertRaisesRegex(ValueError, "profiles.release.settings: missing"):
+            load_config(self.path)
+
+    def test_validation_lists_every_problem(self):
+        config = {
+            "settings": {"bump_type": "huge", "file": ["a.py"]},
+            "profiles": {"docs": {"settings": {"files": []}}},
+        }
+        self.assertEqual(
+            config_errors(config),
+            [
+                "settings: unknown key 'file'",
+                "settings: 'bump_type' must be one of major, minor, patch",
+                "profiles.docs.settings: 'files' must not be empty",
+            ],
+        )
+        del config["profiles"]
+        self.assertIn("settings: missing 'files'", config_errors(config))
+        self.assertEqual(config_errors(["a.py"]), ["config must be a mapping"])
+        self.write("settings:\n  files: setup.py\n")
+        with self.assertRaisesRegex(ValueError, "'files' must be a list"):
+            load_config(self.path)
+
+    def test_parsed_once(self):
+        with patch.object(
+            config_handler, "open_config_file", wraps=config_handler.open_config_file
+        ) as opened:
+            load_config(self.path)
+            load_config(self.path, "docs")
+            config_handler.get_change_log_file(self.path)
+            self.assertEqual(opened.call_count, 1)
+
+            # a new process starts with an empty memory cache: the pickle is used
+            config_handler._config_cache.clear()
+            self.assertEqual(load_config(self.path, "docs").files, ("docs/conf.py",))
+            self.assertEqual(opened.call_count, 1)
+
+            # a changed file is parsed again
+            self.write(CONFIG.replace("setup.py", "pyproject.toml"))
+            self.assertEqual(load_config(self.path).files, ("pyproject.toml",))
+            self.assertEqual(opened.call_count, 2)
+
+    def test_set_change_log_file(self):
+        config_handler.set_change_log_file(self.path, "HISTORY.md")
+        self.assertEqual(config_handler.get_change_log_file(self.path), "HISTORY.md")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import unittest
+from unittest.mock import patch
+
+from simplebumpversion.core import discovery
+from simplebumpversion.core.discovery import (
+    DirectoryWalker,
+    FilePattern,
+    expand_files,
+    is_ignored,
+    parse_ignore_file,
+)
+from helpers import MainTestCase, git, temp_dir
+
+
+def write(root, path, content=""):
+    path = os.path.join(root, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def make_tree(test):
+    """A repository with packages, ignored and vendored trees"""
+    root = temp_dir(test)
+    git(root, "init", "-q")
+    for path in (
+        "pyproject.toml",
+        "packages/api/pyproject.toml",
+        "packages/api/package.json",
+        "packages/web/package.json",
+        "packages/web/nested/deep/pyproject.toml",
+        "packages/web/node_modules/left-pad/package.json",
+        "build/pyproject.toml",
+        "docs/keep/pyproject.toml",
+        "docs/drop/pyproject.toml",
+    ):
+        write(root, path, '{"version": "1.0.0"}\n')
+    write(root, ".gitignore", "build/\n# comment\n")
+    write(root, "docs/.gitignore", "*/pyproject.toml\n!keep/pyproject.toml\n")
+    return root
+
+
+class TestPatterns(unittest.TestCase):
+    def test_file_pattern(self):
+        pattern = FilePattern("packages/*/package.json")
+        self.assertEqual(pattern.base, "packages")
+        self.assertTrue(pattern.matches("api/package.json"))
+        self.assertFalse(pattern.matches("api/x/package.json"))
+        self.assertTrue(pattern.enters("api", 0))
+        self.assertFalse(pattern.enters("x", 1))
+
+        pattern = FilePattern("**/pyproject.toml")
+        self.assertEqual(pattern.base, "")
+        self.assertTrue(pattern.matches("pyproject.toml"))
+        self.assertTrue(pattern.matches("a/b/pyproject.toml"))
+        self.assertTrue(pattern.enters("anything", 7))
+
+    def test_ignore_rules(self):
+        chain = (("", tuple(parse_ignore_file("*.log\n/dist\nout/\n!keep.log\n"))),)
+        self.assertTrue(is_ignored(chain, "a/b.log", False))
+        self.assertFalse(is_ignored(chain, "keep.log", False))
+        self.assertTrue(is_ignored(chain, "dist", True))
+        self.assertFalse(is_ignored(chain, "src/dist", True))
+        self.assertTrue(is_ignored(chain, "src/out", True))
+        self.assertFalse(is_ignored(chain, "src/out", False))
+
+
+class TestExpandFiles(unittest.TestCase):
+    def setUp(self):
+        self.root = make_tree(self)
+
+    def expand(self, *patterns, **kwargs):
+        return expand_files(list(patterns), root=self.root, **kwargs)
+
+    def test_recursive(self):
+        self.assertEqual(
+            self.expand("**/pyproject.toml"),
+            [
+                os.path.join("docs", "keep", "pyproject.toml"),
+                os.path.join("packages", "api", "pyproject.toml"),
+                os.path.join("packages", "web", "nested", "deep", "pyproject.toml"),
+                "pyproject.toml",
+            ],
+        )
+
+    def test_single_level(self):
+        self.assertEqual(
+            self.expand("packages/*/package.json", "README.md"),
+            [
+                os.path.join("packages", "api", "package.json"),
+                os.path.join("packages", "web", "package.json"),
+                "README.md",
+            ],
+        )
+
+    def test_parent_gitignore(self):
+        # the walk starts in docs/, rules of the top-level .gitignore still apply
+        write(self.root, ".gitignore", "keep/\n")
+        write(self.root, "docs/other/settings.toml")
+        self.assertEqual(
+            self.expand("docs/**/*.toml"),
+            [os.path.join("docs", "other", "settings.toml")],
+        )
+
+    def test_duplicates_and_no_match(self):
+        self.assertEqual(
+            self.expand("packages/api/*.json", "packages/*/package.json")[0],
+            os.path.join("packages", "api", "package.json"),
+        )
+        self.assertEqual(len(self.expand("packages/**/package.json", "**/*.json")), 2)
+        with self.assertRaises(FileNotFoundError):
+            self.expand("**/setup.py")
+
+    def test_listing_cache(self):
+        cache_path = os.path.join(self.root, ".git", "listings.pickle")
+        with patch.object(discovery, "RACY_SECONDS", -60):
+            walker = DirectoryWalker(cache_path=cache_path)
+            walker.walk(self.root, FilePattern("**/package.json"))
+            walker.save()
+            self.assertTrue(os.path.exists(cache_path))
+
+            walker = DirectoryWalker(cache_path=cache_path)
+            path = os.path.join(self.root, "packages", "api")
+            with patch("os.scandir", side_effect=AssertionError("listed")):
+                self.assertEqual(len(walker.list_dir(path)[0]), 2)
+            # a new file changes the directory's modification time
+            write(self.root, "packages/api/extra/package.json")
+            os.utime(path, ns=(0, 10**18))
+            found = walker.walk(self.root, FilePattern("**/package.json"))
+            self.assertIn("packages/api/extra/package.json", found)
+
+
+class TestMainGlob(MainTestCase):
+    def test_bump_with_pattern(self):
+        root = make_tree(self)
+        git(root, "add", ".")
+        git(root, "commit", "-q", "-m", "initial")
+        os.chdir(root)
+        code, out = self.run_main(["packages/*/package.json", "--no-cache"])
+        self.assertIsNone(code, out)
+        self.assertIn("in 'packages/web/package.json'", out)
+        with open(os.path.join(root, "packages", "api", "package.json")) as f:
+            self.assertIn("1.0.1", f.read())
+
+        code, out = self.run_main(["**/setup.py"])
+        self.assertEqual(code, 1)
+        self.assertIn("No files match '**/setup.py'", out)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from simplebumpversion.core import file_handler
+from simplebumpversion.core.batch import apply_bumps, plan_bumps
+from simplebumpversion.core.file_handler import (
+    patch_file_bytes,
+    read_file,
+    write_to_file,
+)
+from simplebumpversion.core.bump_version import (
+    find_version_in_file,
+    update_version_in_file,
+)
+
+
+class TestPatchFileBytes(unittest.TestCase):
+    def setUp(self):
+        self.head = b'{"name": "x", "version": "1.2.3",\n'
+        self.tail = bytes(range(256)) * 50
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(self.head + self.tail)
+        self.path = tmp.name
+        self.start = self.head.index(b"1.2.3")
+        self.addCleanup(os.remove, self.path)
+
+    def read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def patched(self, replacement):
+        expected = (
+            self.head[: self.start] + replacement + self.head[self.start + 5 :]
+        ) + self.tail
+        with patch.object(file_handler, "CHUNK_SIZE", 1000):
+            patch_file_bytes(self.path, self.start, self.start + 5, replacement)
+        self.assertEqual(self.read(), expected)
+
+    def test_same_length_in_place(self):
+        self.patched(b"1.2.4")
+
+    def test_longer_shifts_tail(self):
+        self.patched(b"1.2.10")
+
+    def test_shorter_shifts_tail(self):
+        self.patched(b"2.0")
+
+
+class TestTextWrappers(unittest.TestCase):
+    def test_round_trip_keeps_bytes(self):
+        content = '# café\r\n__version__ = "1.2.3"\r\n'.encode()
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(content)
+        self.addCleanup(os.remove, tmp.name)
+        text = read_file(tmp.name)
+        self.assertEqual(text, content.decode())
+        write_to_file(tmp.name, text.replace("1.2.3", "1.2.4"))
+        with open(tmp.name, "rb") as f:
+            self.assertEqual(f.read(), content.replace(b"1.2.3", b"1.2.4"))
+        with self.assertRaises(FileNotFoundError):
+            read_file(tmp.name + ".missing")
+
+
+class TestLargeFiles(unittest.TestCase):
+    def test_large_file_round_trip(self):
+        with tempfile.NamedTemporaryFile(delete=False, mode="w") as tmp:
+            tmp.write('{\n  "version": "9.9.9",\n')
+            tmp.write('  "dep": {"version": "9.9.9"},\n' * 2000)
+            tmp.write("}\n")
+        self.addCleanup(os.remove, tmp.name)
+        with patch.object(file_handler, "MMAP_THRESHOLD", 1024), patch(
+            "simplebumpversion.core.bump_version.HEAD_WINDOW", 32
+        ):
+            self.assertEqual(find_version_in_file(tmp.name), "9.9.9")
+            self.assertTrue(
+                update_version_in_file(tmp.name, "9.9.9", "9.9.10", is_dry_run=False)
+            )
+        with open(tmp.name) as f:
+            content = f.read()
+        # every occurrence is patched, as in a small file, not only the head window
+        self.assertTrue(content.startswith('{\n  "version": "9.9.10",\n'))
+        self.assertEqual(content.count('"9.9.10"'), 2001)
+        self.assertNotIn('"9.9.9"', content)
+
+    def test_version_past_head_window(self):
+        with tempfile.NamedTemporaryFile(delete=False, mode="w", suffix=".js") as tmp:
+            tmp.write("// bundle\n" * 500)
+            tmp.write('version = "1.9.9"\n')
+        self.addCleanup(os.remove, tmp.name)
+        with patch.object(file_handler, "MMAP_THRESHOLD", 1024), patch(
+            "simplebumpversion.core.bump_version.HEAD_WINDOW", 32
+        ):
+            self.assertEqual(find_version_in_file(tmp.name), "1.9.9")
+            plans = plan_bumps([tmp.name], False, True, False)
+            self.assertEqual(apply_bumps(plans, False, verbose=False), [])
+        with open(tmp.name) as f:
+            self.assertTrue(f.read().endswith('version = "1.10.0"\n'))
+
+    def large_files(self, count):
+        paths = []
+        for _ in range(count):
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".js") as tmp:
+                tmp.write(b'var version = "1.2.3";\n' + b"x" * 4096)
+            self.addCleanup(os.remove, tmp.name)
+            paths.append(tmp.name)
+        return paths
+
+    def test_same_length_bump_in_place(self):
+        (path,) = self.large_files(1)
+        inode = os.stat(path).st_ino
+        with patch.object(file_handler, "MMAP_THRESHOLD", 1024), patch.object(
+            file_handler, "copy_file_contents", side_effect=AssertionError
+        ):
+            plans = plan_bumps([path], False, False, True)
+            self.assertEqual(apply_bumps(plans, False, verbose=False), [])
+        self.assertEqual(os.stat(path).st_ino, inode)
+        with open(path, "rb") as f:
+            self.assertTrue(f.read().startswith(b'var version = "1.2.4";'))
+
+    def test_failed_in_place_patch_is_undone(self):
+        paths = self.large_files(2)
+        real_patch = file_handler.patch_file_spans
+
+        def patch_spans(file_path, spans, replacement):
+            if file_path == paths[1] and replacement == b"1.2.4":
+                raise PermissionError(file_path)
+            real_patch(file_path, spans, replacement)
+
+        with patch.object(file_handler, "MMAP_THRESHOLD", 1024), patch.object(
+            file_handler, "patch_file_spans", side_effect=patch_spans
+        ):
+            plans = plan_bumps(paths, False, False, True)
+            with self.assertRaises(PermissionError):
+                apply_bumps(plans, False, verbose=False)
+        for path in paths:
+            with open(path, "rb") as f:
+                self.assertTrue(f.read().startswith(b'var version = "1.2.3";'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,236 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import io
+import subprocess
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from simplebumpversion.core import git_session
+from simplebumpversion.core.git_session import GitSession
+from simplebumpversion.core.git_tools import (
+    iter_commits_since_tag,
+    get_commits_since_tag,
+    close_sessions,
+    create_git_tags,
+)
+
+from helpers import MainTestCase, git, make_repo, temp_dir
+
+
+class TestGitSession(unittest.TestCase):
+    def setUp(self):
+        self.repo, _ = make_repo(self, 1)
+
+    def commit(self, message):
+        git(self.repo, "commit", "-q", "--allow-empty", "-m", message)
+
+    def assert_matches_git(self, session):
+        self.assertEqual(session.head(), git(self.repo, "rev-parse", "HEAD"))
+        self.assertEqual(
+            session.describe(), git(self.repo, "describe", "--tags", "--abbrev=0")
+        )
+
+    def test_loose_refs(self):
+        git(self.repo, "tag", "lightweight")
+        self.commit("third")
+        with GitSession(self.repo) as session:
+            self.assertEqual(set(session.tags()), {"1.2.3", "lightweight"})
+            self.assert_matches_git(session)
+
+    def test_packed_refs_and_merges(self):
+        git(self.repo, "checkout", "-q", "-b", "feature")
+        self.commit("feature work")
+        git(self.repo, "tag", "-a", "2.0.0", "-m", "Tag 2.0.0")
+        git(self.repo, "checkout", "-q", "-")
+        self.commit("main work")
+        git(self.repo, "merge", "-q", "--no-ff", "feature", "-m", "merge")
+        git(self.repo, "pack-refs", "--all")
+        with GitSession(self.repo) as session:
+            self.assert_matches_git(session)
+
+    def test_merge_distance(self):
+        # vS is one hop from the merge, but the 20 mainline commits are not in vS
+        git(self.repo, "checkout", "-q", "-b", "side")
+        self.commit("side")
+        git(self.repo, "tag", "vS")
+        git(self.repo, "checkout", "-q", "-")
+        for i in range(20):
+            self.commit(f"main {i}")
+        git(self.repo, "tag", "vB")
+        self.commit("main again")
+        git(self.repo, "merge", "-q", "--no-ff", "side", "-m", "merge")
+        with GitSession(self.repo) as session:
+            self.assertEqual(session.describe(), "vB")
+            self.assert_matches_git(session)
+
+    def test_packed_tags_are_not_peeled(self):
+        # tags on an unrelated root commit, peeled in packed-refs
+        tree = git(self.repo, "rev-parse", "HEAD^{tree}")
+        orphan = git(self.repo, "commit-tree", tree, "-m", "orphan")
+        for i in range(10):
+            git(self.repo, "tag", "-a", f"other-{i}", orphan, "-m", "other")
+            git(self.repo, "tag", f"light-{i}", orphan)
+        git(self.repo, "pack-refs", "--all")
+        with GitSession(self.repo) as session, patch.object(
+            GitSession, "read_object", autospec=True, side_effect=GitSession.read_object
+        ) as read_object:
+            self.assertEqual(session.describe(), "1.2.3")
+        # HEAD and its parent, no tag object
+        self.assertEqual(read_object.call_count, 2)
+
+    def test_walk_limit(self):
+        for i in range(5):
+            self.commit(f"commit {i}")
+        before = git_session.get_subprocess_count()
+        with patch.object(git_session, "DESCRIBE_WALK_LIMIT", 3), GitSession(
+            self.repo
+        ) as session:
+            self.assert_matches_git(session)
+        # cat-file, then git describe once the limit is reached
+        self.assertEqual(git_session.get_subprocess_count() - before, 2)
+
+    def test_peel_limit(self):
+        for i in range(10):
+            git(self.repo, "tag", "-a", f"other-{i}", "HEAD~1", "-m", "other")
+        before = git_session.get_subprocess_count()
+        with patch.object(git_session, "DESCRIBE_PEEL_LIMIT", 5), GitSession(
+            self.repo
+        ) as session:
+            self.assertEqual(
+                session.describe(), git(self.repo, "describe", "--tags", "--abbrev=0")
+            )
+        # loose tags are not peeled one by one, git describe is asked at once
+        self.assertEqual(git_session.get_subprocess_count() - before, 1)
+
+    def test_single_cat_file_process(self):
+        for i in range(5):
+            self.commit(f"commit {i}")
+        before = git_session.get_subprocess_count()
+        with GitSession(self.repo) as session:
+            self.assertEqual(session.describe(), "1.2.3")
+            self.assertEqual(session.describe(), "1.2.3")
+        self.assertEqual(git_session.get_subprocess_count() - before, 1)
+
+    def test_no_tags_spawns_nothing(self):
+        repo, _ = make_repo(self, 1)
+        git(repo, "tag", "-d", "1.2.3")
+        before = git_session.get_subprocess_count()
+        with GitSession(repo) as session:
+            self.assertIsNone(session.describe())
+        self.assertEqual(git_session.get_subprocess_count(), before)
+
+
+class TestCommitStream(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self.repo, _ = make_repo(self, 1)
+        git(self.repo, "commit", "-q", "--allow-empty", "-m", "feat: x", "-m", "body")
+        os.chdir(self.repo)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        close_sessions()
+
+    def test_iter_commits(self):
+        commits = list(iter_commits_since_tag("1.2.3"))
+        self.assertEqual(
+            [(c.subject, c.body) for c in commits],
+            [("feat: x", "body"), ("second", "")],
+        )
+        self.assertEqual(
+            get_commits_since_tag("1.2.3"),
+            git(self.repo, "log", "1.2.3..HEAD", "--oneline"),
+        )
+
+    def test_stops_early(self):
+        stream = iter_commits_since_tag(None)
+        self.assertEqual(next(stream).subject, "feat: x")
+        stream.close()
+
+
+class TestAnyUpdates(unittest.TestCase):
+    def test_has_commits_since(self):
+        repo, _ = make_repo(self, 1)
+        with GitSession(repo) as session:
+            self.assertTrue(session.has_commits_since("1.2.3", reachable=True))
+            self.assertTrue(session.has_commits_since("1.2.3"))
+            self.assertTrue(session.has_commits_since(None))
+        git(repo, "tag", "head-tag")
+        with GitSession(repo) as session:
+            self.assertFalse(session.has_commits_since("head-tag", reachable=True))
+
+    def test_untagged_check_spawns_nothing(self):
+        repo, _ = make_repo(self, 1)
+        git(repo, "tag", "-d", "1.2.3")
+        before = git_session.get_subprocess_count()
+        with GitSession(repo) as session:
+            self.assertTrue(session.has_commits_since(session.describe()))
+        self.assertEqual(git_session.get_subprocess_count(), before)
+
+
+class TestCreateTags(MainTestCase):
+    def setUp(self):
+        super().setUp()
+        self.repo, _ = make_repo(self, 1)
+        os.chdir(self.repo)
+
+    def test_many_tags_two_processes(self):
+        tags = [(f"pkg{i}-1.0.0", None) for i in range(50)] + [("2.0.0", "Notes  \n")]
+        before = git_session.get_subprocess_count()
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(create_git_tags(tags))
+        self.assertEqual(git_session.get_subprocess_count() - before, 2)
+        self.assertEqual(len(git(self.repo, "tag", "--list").split()), 52)
+        git(self.repo, "fsck", "--strict")
+        message = git(self.repo, "tag", "-l", "--format=%(contents)", "2.0.0")
+        self.assertEqual(message, "Notes")
+        self.assertEqual(
+            git(self.repo, "rev-parse", "pkg7-1.0.0^{commit}"),
+            git(self.repo, "rev-parse", "HEAD"),
+        )
+        self.assertEqual(git(self.repo, "describe"), "2.0.0")
+
+    def assert_ident_matches_git(self):
+        expected = subprocess.check_output(
+            ["git", "var", "GIT_COMMITTER_IDENT"], cwd=self.repo, text=True
+        ).rsplit(" ", 2)[0]
+        with GitSession(self.repo) as session:
+            ident, timestamp, zone = session.committer_ident().rsplit(" ", 2)
+        self.assertEqual(ident, expected)
+        self.assertRegex(f"{timestamp} {zone}", r"^\d+ [+-]\d{4}$")
+
+    def test_ident_from_config(self):
+        config = os.path.join(temp_dir(self), "gitconfig")
+        with open(config, "w") as f:
+            f.write(
+                '[user]\n\tname = "Global User" ; comment\n\temail = g@example.com\n'
+            )
+        git(self.repo, "config", "user.email", "local@example.com")
+        environment = {"GIT_CONFIG_GLOBAL": config, "GIT_CONFIG_NOSYSTEM": "1"}
+        with patch.dict(os.environ, environment):
+            for key in ("GIT_COMMITTER_NAME", "GIT_COMMITTER_EMAIL"):
+                del os.environ[key]
+            self.assert_ident_matches_git()
+            self.assertIn("Global User <local@example.com>", self.tagger_of_new_tag())
+
+    def tagger_of_new_tag(self):
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(create_git_tags([("3.0.0", None)]))
+        return git(self.repo, "tag", "-l", "--format=%(taggername) %(taggeremail)")
+
+    def test_ident_from_environment(self):
+        self.assert_ident_matches_git()
+
+    def test_all_or_nothing(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertFalse(create_git_tags([("1.3.0", None), ("1.2.3", None)]))
+        self.assertIn("Error: Failed to create git tag '1.3.0, 1.2.3'", out.getvalue())
+        self.assertEqual(git(self.repo, "tag", "--list"), "1.2.3")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import io
+import json
+import unittest
+from contextlib import contextmanager, redirect_stderr
+
+from simplebumpversion.core import instrumentation
+from helpers import MainTestCase, make_repo
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled_records_nothing(self):
+        with instrumentation.span("scan"):
+            instrumentation.count("bytes.read", 10)
+        self.assertEqual(instrumentation.snapshot(), {"phases": {}, "counters": {}})
+
+    def test_spans_and_counters(self):
+        instrumentation.enable()
+        for _ in range(3):
+            with instrumentation.span("read"):
+                instrumentation.count("bytes.read", 10)
+        with instrumentation.span("total"):
+            pass
+        data = instrumentation.snapshot()
+        self.assertEqual(list(data["phases"]), ["read", "total"])
+        self.assertEqual(data["phases"]["read"]["calls"], 3)
+        self.assertEqual(data["counters"], {"bytes.read": 30})
+        self.assertIn("bytes.read", instrumentation.format_table(data))
+
+    def test_hooks(self):
+        events = []
+
+        @contextmanager
+        def span_hook(name):
+            events.append(("start", name))
+            yield
+            events.append(("end", name))
+
+        def counter_hook(name, amount):
+            events.append((name, amount))
+
+        instrumentation.add_span_hook(span_hook)
+        instrumentation.add_counter_hook(counter_hook)
+        try:
+            with instrumentation.span("git"):
+                instrumentation.count("git.subprocesses")
+        finally:
+            instrumentation.remove_span_hook(span_hook)
+            instrumentation.remove_counter_hook(counter_hook)
+        expected = [("start", "git"), ("git.subprocesses", 1), ("end", "git")]
+        self.assertEqual(events, expected)
+        # hooks alone do not record into the report
+        self.assertEqual(instrumentation.snapshot()["phases"], {})
+
+
+class TestTimingsFlag(MainTestCase):
+    def test_json_report(self):
+        repo, files = make_repo(self, 2)
+        os.chdir(repo)
+        err = io.StringIO()
+        with redirect_stderr(err):
+            code, out = self.run_main(
+                [*files, "--change_msg", "x", "--timings", "json"]
+            )
+        self.assertIsNone(code)
+        self.assertIn("Version bumped from 1.2.3 to 1.2.4", out)
+        data = json.loads(err.getvalue())
+        for phase in ("read", "scan", "git", "write", "changelog", "tag", "total"):
+            self.assertIn(phase, data["phases"])
+        self.assertEqual(data["phases"]["read"]["calls"], 2)
+        self.assertEqual(data["counters"]["regex.passes"], 4)
+        self.assertGreater(data["counters"]["bytes.written"], 0)
+        self.assertGreater(data["counters"]["git.subprocesses"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
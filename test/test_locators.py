@@ -0,0 +1,150 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import json
+import unittest
+from unittest.mock import patch
+
+from simplebumpversion.core import file_handler
+from simplebumpversion.core.batch import apply_bumps, plan_bumps
+from simplebumpversion.core.bump_version import (
+    find_version_in_file,
+    update_version_in_file,
+)
+from simplebumpversion.core.locators import (
+    locate_cfg_version,
+    locate_json_version,
+    locate_toml_version,
+    locate_versions,
+)
+from simplebumpversion.core.version_index import VersionIndex
+from helpers import temp_dir
+
+PYPROJECT = '''[build-system]
+requires = ["setuptools"]
+
+[tool.commitizen]
+version = "0.1.0"
+description = """
+[project]
+version = "9.9.9"
+"""
+
+[[tool.mypy.overrides]]
+version = "8.8.8"
+
+[ project ]
+name = "demo"
+version = "1.2.3"
+
+[tool.poetry]
+version = "2.0.0"
+'''
+
+SETUP_CFG = """[options]
+version = 0.0.1
+
+[metadata]
+name = demo
+version = 1.2.3
+"""
+
+
+def lockfile(dependencies):
+    packages = {
+        f"node_modules/dep-{i}": {"version": "1.2.3"} for i in range(dependencies)
+    }
+    # the top-level version comes last, behind every dependency
+    document = {"name": "demo", "lockfileVersion": 3, "packages": packages}
+    return json.dumps({**document, "version": "1.2.3"}, indent=2)
+
+
+class TestLocators(unittest.TestCase):
+    def test_toml(self):
+        tables = ("project", "tool.poetry")
+        for content in (PYPROJECT, PYPROJECT.encode()):
+            match = locate_toml_version(content, tables)
+            self.assertEqual(match.kind, "toml")
+            self.assertEqual(content[match.start : match.end], match.version)
+            self.assertEqual(match.start, PYPROJECT.index('"1.2.3"') + 1)
+        self.assertIsNone(locate_toml_version('[project]\nname = "x"\n', tables))
+
+    def test_json_skips_nested_values(self):
+        content = lockfile(3)
+        match = locate_json_version(content)
+        self.assertEqual(match.version, "1.2.3")
+        self.assertEqual(match.start, content.rindex('"1.2.3"') + 1)
+        self.assertEqual(locate_json_version(content.encode()).start, match.start)
+        self.assertIsNone(locate_json_version('[{"version": "1.2.3"}]'))
+        self.assertIsNone(locate_json_version('{"a": "version", "b": "1.2.3"}'))
+        self.assertIsNone(locate_json_version('{"a": {"version": "1.2.3"}}'))
+
+    def test_cfg(self):
+        match = locate_cfg_version(SETUP_CFG, ("metadata",))
+        self.assertEqual((match.version, match.kind), ("1.2.3", "cfg"))
+        indirect = "[metadata]\nversion = attr: demo.__version__\n"
+        self.assertIsNone(locate_cfg_version(indirect, ("metadata",)))
+
+    def test_other_files_use_the_scanner(self):
+        content = 'version = "1.2.3"\nother_version = "1.2.3"\n'
+        self.assertEqual(len(locate_versions("version.py", content)), 2)
+        # a structured file without its field falls back to the scanner
+        content = '[tool.bumpversion]\ncurrent_version = "1.2.3"\n'
+        self.assertEqual(len(locate_versions("pyproject.toml", content)), 1)
+
+
+class TestStructuredFiles(unittest.TestCase):
+    def setUp(self):
+        self.dir = temp_dir(self)
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_update_only_canonical_field(self):
+        path = self.write("pyproject.toml", PYPROJECT)
+        self.assertEqual(find_version_in_file(path), "1.2.3")
+        self.assertTrue(update_version_in_file(path, "1.2.3", "1.2.4", False))
+        self.assertEqual(self.read(path), PYPROJECT.replace('"1.2.3"', '"1.2.4"'))
+
+        path = self.write("setup.cfg", SETUP_CFG)
+        self.assertTrue(update_version_in_file(path, "1.2.3", "1.3.0", False))
+        self.assertEqual(self.read(path), SETUP_CFG.replace("1.2.3", "1.3.0"))
+
+    def test_lockfile_dependencies_are_kept(self):
+        content = lockfile(50)
+        path = self.write("package-lock.json", content)
+        self.assertTrue(update_version_in_file(path, "1.2.3", "1.2.4", False))
+        updated = self.read(path)
+        self.assertEqual(json.loads(updated)["version"], "1.2.4")
+        self.assertEqual(updated.count('"1.2.3"'), 50)
+
+    def test_large_lockfile_beyond_window(self):
+        path = self.write("package-lock.json", lockfile(100))
+        with patch.object(file_handler, "MMAP_THRESHOLD", 1024), patch(
+            "simplebumpversion.core.bump_version.HEAD_WINDOW", 32
+        ):
+            self.assertEqual(find_version_in_file(path), "1.2.3")
+            self.assertTrue(update_version_in_file(path, "1.2.3", "1.2.4", False))
+        updated = json.loads(self.read(path))
+        self.assertEqual(updated["version"], "1.2.4")
+        self.assertEqual(updated["packages"]["node_modules/dep-0"]["version"], "1.2.3")
+
+    def test_cfg_through_index(self):
+        path = self.write("setup.cfg", SETUP_CFG)
+        index = VersionIndex(os.path.join(self.dir, "cache"))
+        apply_bumps(plan_bumps([path], False, False, True, index=index), False, index)
+        hit = index.lookup(path)
+        self.assertEqual((hit.version, hit.kind), ("1.2.4", "cfg"))
+        self.assertEqual(self.read(path), SETUP_CFG.replace("1.2.3", "1.2.4"))
+
+
+if __name__ == "__main__":
+    unittest.main()
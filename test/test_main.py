@@ -0,0 +1,111 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import io
+import threading
+import unittest
+from contextlib import redirect_stdout
+
+from simplebumpversion import main as main_module
+from simplebumpversion.core import git_tools
+from simplebumpversion.core.server import send_request, serve
+from helpers import MainTestCase, git, make_repo, temp_dir
+
+
+class TestBatchMode(MainTestCase):
+    def spawned_for(self, n_files):
+        repo, files = make_repo(self, n_files)
+        os.chdir(repo)
+        before = git_tools.get_subprocess_count()
+        code, _ = self.run_main([*files, "--batch", "--changelog", "CHANGELOG.md"])
+        self.assertIsNone(code)
+        for path in files:
+            with open(path) as f:
+                self.assertIn("1.2.4", f.read())
+        self.assertEqual(git(repo, "tag", "--list"), "1.2.3\n1.2.4")
+        return git_tools.get_subprocess_count() - before
+
+    def test_batch_subprocess_count_is_flat(self):
+        self.assertEqual(self.spawned_for(2), self.spawned_for(20))
+
+    def test_batch_no_updates(self):
+        repo, files = make_repo(self, 1)
+        os.chdir(repo)
+        git(repo, "tag", "-a", "1.2.4", "-m", "Tag 1.2.4")
+        code, out = self.run_main([*files, "--batch"])
+        self.assertIn("No Updates since last version!", out)
+        with open(files[0]) as f:
+            self.assertIn("1.2.3", f.read())
+
+
+class TestAllOrNothing(MainTestCase):
+    def test_failure_leaves_no_file_changed(self):
+        repo, files = make_repo(self, 5)
+        os.chdir(repo)
+        with open(files[3], "w") as f:
+            f.write('version = "v0.9-19-g7e2d"\n')
+        code, out = self.run_main([*files, "--jobs", "4"])
+        self.assertEqual(code, 1)
+        for path in files[:3] + files[4:]:
+            with open(path) as f:
+                self.assertEqual(f.read(), '__version__ = "1.2.3"\n')
+        self.assertFalse(os.path.exists("CHANGELOG.md"))
+        self.assertEqual(git(repo, "tag", "--list"), "1.2.3")
+        expected = [".git", "README", *map(os.path.basename, files)]
+        self.assertEqual(sorted(os.listdir(repo)), sorted(expected))
+
+    def test_parallel_bump(self):
+        repo, files = make_repo(self, 8)
+        os.chdir(repo)
+        code, out = self.run_main([*files, "--minor", "--jobs", "4"])
+        self.assertIsNone(code)
+        for path in files:
+            with open(path) as f:
+                self.assertEqual(f.read(), '__version__ = "1.3.0"\n')
+        self.assertEqual(out.count("Version bumped from 1.2.3 to 1.3.0"), 8)
+        self.assertEqual(git(repo, "tag", "--list"), "1.2.3\n1.3.0")
+
+
+class TestServer(MainTestCase):
+    def test_requests_over_socket(self):
+        repo, files = make_repo(self, 2)
+        socket_path = os.path.join(temp_dir(self), "bump.sock")
+        server = threading.Thread(target=serve, args=(socket_path, main_module.main))
+        with redirect_stdout(io.StringIO()):
+            server.start()
+            for _ in range(100):
+                if os.path.exists(socket_path):
+                    break
+                server.join(0.01)
+            response = send_request({"command": "ping"}, socket_path)
+            self.assertEqual(response["output"], "pong\n")
+
+            request = {"cwd": repo, "files": files, "bump_type": "minor"}
+            response = send_request({**request, "dry_run": True}, socket_path)
+            self.assertEqual(response["status"], 0)
+            self.assertIn("Version bumped from 1.2.3 to 1.3.0", response["output"])
+            with open(files[0]) as f:
+                self.assertIn("1.2.3", f.read())
+
+            response = send_request(request, socket_path)
+            self.assertEqual(response["status"], 0, response["output"])
+            self.assertEqual(git(repo, "tag", "--list"), "1.2.3\n1.3.0")
+            # the tag created by the previous request is seen by the next one
+            response = send_request(request, socket_path)
+            self.assertIn("No Updates since last version!", response["output"])
+
+            other_repo, _ = make_repo(self, 1)
+            request = {"cwd": other_repo, "files": ["missing.py"]}
+            response = send_request(request, socket_path)
+            self.assertEqual(response["status"], 1)
+            self.assertIn("'missing.py' not found", response["output"])
+
+            send_request({"command": "shutdown"}, socket_path)
+            server.join(5)
+        self.assertFalse(server.is_alive())
+        self.assertFalse(os.path.exists(socket_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
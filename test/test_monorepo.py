@@ -0,0 +1,146 @@
+import os
+import re
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import unittest
+
+from simplebumpversion.core import git_tools
+from simplebumpversion.core.config_handler import PackageSpec, load_config
+from simplebumpversion.core.monorepo import PathTrie, detect_changes, package_name
+from helpers import MainTestCase, git, temp_dir
+
+CONFIG = """\
+settings:
+  bump_type: patch
+  packages:
+    - file: packages/api/version.py
+      tag_prefix: api-
+    - file: packages/web/version.py
+      tag_prefix: web/v
+    - file: libs/core/version.py
+      root: libs
+"""
+
+
+def write(repo, path, content):
+    path = os.path.join(repo, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def read(repo, path):
+    with open(os.path.join(repo, path)) as f:
+        return f.read()
+
+
+def make_monorepo(test):
+    """Three released packages and a commit that only touches the api package"""
+    repo = temp_dir(test)
+    git(repo, "init", "-q")
+    write(repo, "packages/api/version.py", '__version__ = "1.0.0"\n')
+    write(repo, "packages/web/version.py", '__version__ = "2.0.0"\n')
+    write(repo, "libs/core/version.py", '__version__ = "0.1.0"\n')
+    write(repo, "bump_config.yml", CONFIG)
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "initial")
+    for tag in ("api-1.0.0", "web/v2.0.0", "0.1.0"):
+        git(repo, "tag", "-a", tag, "-m", tag)
+    write(repo, "packages/api/app.py", "print('hi')\n")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "feat: api change")
+    return repo
+
+
+class TestPathTrie(unittest.TestCase):
+    def test_match(self):
+        trie = PathTrie()
+        trie.insert("packages/api", "api")
+        trie.insert("packages/api/plugins", "plugins")
+        trie.insert(".", "root")
+        self.assertEqual(trie.match("packages/api/src/app.py"), ["root", "api"])
+        self.assertEqual(
+            trie.match("packages/api/plugins/x.py"), ["root", "api", "plugins"]
+        )
+        self.assertEqual(trie.match("packages/api2/app.py"), ["root"])
+
+    def test_package_name(self):
+        self.assertEqual(package_name("api-"), "api")
+        self.assertEqual(package_name("web/v"), "web")
+        self.assertEqual(package_name(""), "")
+        self.assertEqual(package_name("api-v2-"), "api-v2")
+        # "api-v21.0.0" would be version 21.0.0 of api
+        for prefix in ("api-v2", "api", "api-0"):
+            with self.assertRaises(ValueError):
+                package_name(prefix)
+
+
+class TestMonorepo(MainTestCase):
+    def test_config(self):
+        path = os.path.join(temp_dir(self), "bump.yml")
+        write(os.path.dirname(path), "bump.yml", CONFIG)
+        packages = load_config(path).packages
+        api = PackageSpec("packages/api/version.py", "packages/api", "api-", None)
+        self.assertEqual(packages[0], api)
+        self.assertEqual(packages[2].root, "libs")
+
+    def test_detect_changes(self):
+        repo = make_monorepo(self)
+        os.chdir(repo)
+        packages = load_config("bump_config.yml").packages
+        states = detect_changes(
+            packages, git_tools.get_session(), git_tools.get_tag_index()
+        )
+        self.assertEqual([s.changed for s in states], [True, False, False])
+        self.assertEqual(
+            [s.base_tag for s in states], ["api-1.0.0", "web/v2.0.0", "0.1.0"]
+        )
+
+    def test_bump_changed_packages_only(self):
+        repo = make_monorepo(self)
+        os.chdir(repo)
+        code, out = self.run_main(["--config", "bump_config.yml"])
+        self.assertIsNone(code)
+        self.assertIn("Unchanged packages: packages/web, libs", out)
+        self.assertIn("1.0.1", read(repo, "packages/api/version.py"))
+        self.assertIn("2.0.0", read(repo, "packages/web/version.py"))
+        self.assertIn("0.1.0", read(repo, "libs/core/version.py"))
+        self.assertIn("api-1.0.1", git(repo, "tag", "--list").split())
+        changelog = read(repo, "CHANGELOG.md")
+        self.assertIn("## api-1.0.1", changelog)
+        self.assertIn("feat: api change", changelog)
+
+        code, out = self.run_main(["--config", "bump_config.yml"])
+        self.assertIn("No Updates since last version!", out)
+
+    def test_conventional_changelog(self):
+        repo = make_monorepo(self)
+        write(repo, "packages/web/app.py", "print('web')\n")
+        git(repo, "add", ".")
+        git(repo, "commit", "-q", "-m", "fix: web change")
+        os.chdir(repo)
+        code, out = self.run_main(["--config", "bump_config.yml", "--conventional"])
+        self.assertIsNone(code, out)
+        changelog = read(repo, "CHANGELOG.md")
+        web_entry, api_entry = re.split(r"^## ", changelog, flags=re.M)[1:]
+        self.assertTrue(api_entry.startswith("api-1.0.1"))
+        self.assertIn("### Features\n\n- api change (", api_entry)
+        self.assertIn("api change", api_entry)
+        self.assertNotIn("web change", api_entry)
+        self.assertTrue(web_entry.startswith("web/v2.0.1"))
+        self.assertIn("### Bug fixes", web_entry)
+        self.assertNotIn("api change", web_entry)
+
+    def test_shared_tag_package(self):
+        repo = make_monorepo(self)
+        config = CONFIG.replace("tag_prefix: web/v", "tag_prefix: api/v")
+        write(repo, "bump_config.yml", config)
+        os.chdir(repo)
+        code, out = self.run_main(["--config", "bump_config.yml"])
+        self.assertEqual(code, 1)
+        self.assertIn("claim the same tags", out)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import json
+import unittest
+
+from simplebumpversion.core.multi import (
+    RepoJob,
+    discover_repos,
+    load_manifest,
+    run_multi,
+)
+from helpers import MainTestCase, git, make_repo, temp_dir
+
+
+def make_checkouts(test, count):
+    """Create a directory with count repositories side by side"""
+    root = temp_dir(test)
+    repos = []
+    for i in range(count):
+        repo, _ = make_repo(test, 1, os.path.join(root, f"service_{i}"))
+        repos.append(repo)
+    return root, repos
+
+
+class TestDiscovery(unittest.TestCase):
+    def test_discover_repos(self):
+        root, repos = make_checkouts(self, 2)
+        os.mkdir(os.path.join(root, "not_a_repo"))
+        self.assertEqual(discover_repos(root), repos)
+        self.assertEqual(discover_repos(repos[0]), [repos[0]])
+
+    def test_manifest(self):
+        root = temp_dir(self)
+        manifest = os.path.join(root, "repos.yml")
+        with open(manifest, "w") as f:
+            f.write(
+                "args: [version_0.py]\n"
+                "repos:\n"
+                "  - api\n"
+                "  - path: web\n"
+                "    args: [package.json, --minor]\n"
+            )
+        self.assertEqual(
+            load_manifest(manifest),
+            [
+                RepoJob(os.path.join(root, "api"), ["version_0.py"]),
+                RepoJob(os.path.join(root, "web"), ["package.json", "--minor"]),
+            ],
+        )
+        self.assertEqual(load_manifest(manifest, ["--patch"])[0].args, ["--patch"])
+
+    def test_invalid_manifest(self):
+        manifest = os.path.join(temp_dir(self), "repos.yml")
+        with open(manifest, "w") as f:
+            f.write("repos: [{args: [x]}]\n")
+        with self.assertRaises(ValueError):
+            load_manifest(manifest)
+
+
+class TestMulti(MainTestCase):
+    def test_run_multi(self):
+        root, repos = make_checkouts(self, 4)
+        # already bumped: skipped
+        git(repos[1], "tag", "-a", "1.2.4", "-m", "Tag 1.2.4")
+        # no version file: failed
+        os.remove(os.path.join(repos[2], "version_0.py"))
+        report = run_multi(root, ["version_0.py", "--changelog", "CHANGELOG.md"], 2)
+        outcomes = [result["outcome"] for result in report["results"]]
+        self.assertEqual(outcomes, ["bumped", "skipped", "failed", "bumped"])
+        self.assertEqual(report["counts"], {"bumped": 2, "skipped": 1, "failed": 1})
+        for repo in (repos[0], repos[3]):
+            with open(os.path.join(repo, "version_0.py")) as f:
+                self.assertIn("1.2.4", f.read())
+            self.assertIn("1.2.4", git(repo, "tag", "--list"))
+
+    def test_multi_command(self):
+        root, repos = make_checkouts(self, 2)
+        report_path = os.path.join(root, "report.json")
+        code, out = self.run_main(
+            ["multi", root, "--processes", "1", "--report", report_path, "--"]
+            + ["version_0.py", "--minor"]
+        )
+        self.assertEqual(code, 0)
+        self.assertIn("2 repositories: 2 bumped, 0 skipped, 0 failed", out)
+        with open(report_path) as f:
+            report = json.load(f)
+        self.assertEqual([r["repo"] for r in report["results"]], repos)
+        with open(os.path.join(repos[0], "version_0.py")) as f:
+            self.assertIn("1.3.0", f.read())
+
+    def test_multi_no_arguments(self):
+        root, _ = make_checkouts(self, 1)
+        code, out = self.run_main(["multi", root, "--processes", "1"])
+        self.assertEqual(code, 1)
+        self.assertEqual(json.loads(out)["counts"]["failed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import json
+import unittest
+from unittest.mock import patch
+
+from simplebumpversion.core import change_logger, git_tools
+from simplebumpversion.core.plan import check_plan, read_plan
+from helpers import MainTestCase, git, make_repo
+
+
+class TestPlanApply(MainTestCase):
+    def make_plan(self, *argv):
+        repo, files = make_repo(self, 2)
+        os.chdir(repo)
+        code, out = self.run_main(["plan", "version_0.py", "version_1.py", *argv])
+        self.assertIsNone(code, out)
+        return repo, files, out
+
+    def test_plan_changes_nothing(self):
+        repo, files, out = self.make_plan("--minor")
+        self.assertIn("Plan written to bump-plan.json", out)
+        for path in files:
+            with open(path) as f:
+                self.assertEqual(f.read(), '__version__ = "1.2.3"\n')
+        self.assertFalse(os.path.exists(os.path.join(repo, "CHANGELOG.md")))
+        self.assertEqual(git(repo, "tag", "--list"), "1.2.3")
+
+        plan = read_plan(os.path.join(repo, "bump-plan.json"))
+        self.assertEqual([tag["name"] for tag in plan["tags"]], ["1.3.0"])
+        self.assertEqual(plan["files"][0]["spans"], [[15, 20]])
+        self.assertEqual(plan["head"], git(repo, "rev-parse", "HEAD"))
+        self.assertEqual(check_plan(plan, plan["head"]), [])
+
+    def test_apply(self):
+        repo, files, _ = self.make_plan()
+        code, out = self.run_main(["apply"])
+        self.assertIsNone(code, out)
+        self.assertIn("Version bumped from 1.2.3 to 1.2.4 in 'version_1.py'", out)
+        for path in files:
+            with open(path) as f:
+                self.assertEqual(f.read(), '__version__ = "1.2.4"\n')
+        with open(os.path.join(repo, "CHANGELOG.md")) as f:
+            self.assertIn("## 1.2.4", f.read())
+        self.assertEqual(git(repo, "tag", "--list"), "1.2.3\n1.2.4")
+
+    def test_failed_changelog_changes_nothing(self):
+        repo, files, _ = self.make_plan("--major")
+        before = sorted(os.listdir(repo))
+        with patch.object(
+            change_logger, "_stage_file", side_effect=OSError("disk full")
+        ):
+            code, out = self.run_main(["apply"])
+        self.assertEqual(code, 1)
+        self.assertIn("Error: disk full", out)
+        for path in files:
+            with open(path) as f:
+                self.assertEqual(f.read(), '__version__ = "1.2.3"\n')
+        self.assertEqual(sorted(os.listdir(repo)), before)
+        self.assertEqual(git(repo, "tag", "--list"), "1.2.3")
+
+    def test_apply_crlf(self):
+        repo, files = make_repo(self, 1)
+        with open(files[0], "wb") as f:
+            f.write(b'# header\r\n__version__ = "1.2.3"\r\n')
+        os.chdir(repo)
+        self.run_main(["plan", "version_0.py", "--output", "release.json"])
+        code, out = self.run_main(["apply", "release.json"])
+        self.assertIsNone(code, out)
+        with open(files[0], "rb") as f:
+            self.assertEqual(f.read(), b'# header\r\n__version__ = "1.2.4"\r\n')
+
+    def test_changed_file_rejected(self):
+        repo, files, _ = self.make_plan()
+        with open(files[0], "a") as f:
+            f.write("# edited\n")
+        code, out = self.run_main(["apply"])
+        self.assertEqual(code, 1)
+        self.assertIn("version_0.py: changed since the plan was made", out)
+        with open(files[1]) as f:
+            self.assertIn("1.2.3", f.read())
+        self.assertEqual(git(repo, "tag", "--list"), "1.2.3")
+
+    def test_moved_head_rejected(self):
+        repo, _, _ = self.make_plan()
+        git(repo, "commit", "-q", "--allow-empty", "-m", "later")
+        # as in a new process
+        git_tools.refresh_sessions()
+        code, out = self.run_main(["apply"])
+        self.assertEqual(code, 1)
+        self.assertIn("HEAD moved", out)
+
+    def test_diff(self):
+        repo, _, out = self.make_plan("--diff", "--change_msg", "fix")
+        self.assertIn("--- a/version_0.py", out)
+        self.assertIn('-__version__ = "1.2.3"\n+__version__ = "1.2.4"', out)
+        code, out = self.run_main(["apply", "--dry-run", "--diff"])
+        self.assertIsNone(code, out)
+        self.assertIn("@@ -1,1 +1,1 @@", out)
+        with open(os.path.join(repo, "version_0.py")) as f:
+            self.assertIn("1.2.3", f.read())
+
+    def test_not_a_plan(self):
+        repo, _ = make_repo(self, 1)
+        os.chdir(repo)
+        with open("bump-plan.json", "w") as f:
+            json.dump({"format": 0}, f)
+        code, out = self.run_main(["apply"])
+        self.assertEqual(code, 1)
+        self.assertIn("not a plan file", out)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import datetime
+import unittest
+
+from simplebumpversion.core import schemes
+from simplebumpversion.core.schemes import (
+    CalVer,
+    ParsedVersion,
+    Scheme,
+    bump_version,
+    get_scheme,
+    parse_version,
+)
+from helpers import MainTestCase, git, make_repo
+
+
+class TestSemVer(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(parse_version("1.2.3"), ParsedVersion("", (1, 2, 3)))
+        self.assertEqual(
+            parse_version("v1.2.3-rc.4+build.7"),
+            ParsedVersion("v", (1, 2, 3), ("rc", 4), ("build", 7)),
+        )
+        with self.assertRaises(ValueError):
+            parse_version("1.2")
+
+    def test_parse_is_memoized(self):
+        parse_version.cache_clear()
+        parse_version("4.5.6")
+        parse_version("4.5.6")
+        info = parse_version.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+        self.assertEqual(info.maxsize, schemes.PARSE_CACHE_SIZE)
+
+    def test_release_bumps(self):
+        self.assertEqual(bump_version("1.2.3", "major"), "2.0.0")
+        self.assertEqual(bump_version("v1.2.3", "minor"), "v1.3.0")
+        self.assertEqual(bump_version("1.2.3+build.1", "patch"), "1.2.4")
+
+    def test_prerelease_bumps(self):
+        self.assertEqual(bump_version("1.2.3-rc.4", "prerelease"), "1.2.3-rc.5")
+        self.assertEqual(bump_version("1.2.3-rc", "prerelease"), "1.2.3-rc.1")
+        self.assertEqual(bump_version("1.2.3", "prerelease"), "1.2.4-rc.1")
+        self.assertEqual(
+            bump_version("1.2.3-beta.2", "prerelease", label="rc"), "1.2.3-rc.1"
+        )
+        self.assertEqual(
+            bump_version("1.2.3", "prerelease", label="alpha"), "1.2.4-alpha.1"
+        )
+
+    def test_finalize_prerelease(self):
+        self.assertEqual(bump_version("1.2.3-rc.1", "patch"), "1.2.3")
+        self.assertEqual(bump_version("1.3.0-rc.1", "minor"), "1.3.0")
+        self.assertEqual(bump_version("1.3.0-rc.1", "major"), "2.0.0")
+        self.assertEqual(bump_version("2.0.0-rc.1", "major"), "2.0.0")
+
+    def test_build_bumps(self):
+        self.assertEqual(bump_version("1.2.3+build.7", "build"), "1.2.3+build.8")
+        self.assertEqual(bump_version("1.2.3", "build"), "1.2.3+build.1")
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            bump_version("1.2.3", "micro")
+        with self.assertRaises(ValueError):
+            get_scheme("romver")
+
+    def test_scheme_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Scheme()
+
+
+class TestZeroVer(unittest.TestCase):
+    def test_bumps(self):
+        self.assertEqual(bump_version("0.4.1", "minor", "0ver"), "0.5.0")
+        self.assertEqual(bump_version("0.4.1-rc.1", "prerelease", "0ver"), "0.4.1-rc.2")
+        with self.assertRaises(ValueError):
+            bump_version("0.4.1", "major", "0ver")
+        with self.assertRaises(ValueError):
+            parse_version("1.0.0", "0ver")
+
+
+class TestCalVer(unittest.TestCase):
+    def scheme(self, version_format, day):
+        return CalVer(version_format, today=lambda: day)
+
+    def bump(self, scheme, version, part="patch"):
+        return scheme.format(scheme.bump(scheme.parse(version), part))
+
+    def test_new_date_resets_counter(self):
+        scheme = self.scheme("YYYY.0M.MICRO", datetime.date(2026, 10, 17))
+        self.assertEqual(self.bump(scheme, "2026.09.4"), "2026.10.0")
+        self.assertEqual(self.bump(scheme, "2026.10.4"), "2026.10.5")
+
+    def test_counters(self):
+        scheme = self.scheme("YY.MM.MINOR.MICRO", datetime.date(2026, 1, 5))
+        self.assertEqual(self.bump(scheme, "26.1.2.3", "minor"), "26.1.3.0")
+        self.assertEqual(self.bump(scheme, "26.1.2.3"), "26.1.2.4")
+        self.assertEqual(self.bump(scheme, "25.12.2.3"), "26.1.0.0")
+
+    def test_no_counter(self):
+        scheme = self.scheme("YYYY.0M.0D", datetime.date(2026, 10, 17))
+        self.assertEqual(self.bump(scheme, "2026.10.16"), "2026.10.17")
+        with self.assertRaises(ValueError):
+            self.bump(scheme, "2026.10.17")
+
+    def test_spec(self):
+        scheme = get_scheme("calver:YYYY.MM.MICRO")
+        self.assertEqual(scheme.tokens, ["YYYY", "MM", "MICRO"])
+        self.assertIs(get_scheme("calver"), get_scheme("calver"))
+        with self.assertRaises(ValueError):
+            get_scheme("calver:YYYY.QQ")
+
+
+class TestMainSchemes(MainTestCase):
+    def bump(self, version, *argv):
+        repo, files = make_repo(self, 1)
+        with open(files[0], "w") as f:
+            f.write(f'__version__ = "{version}"\n')
+        git(repo, "commit", "-q", "--allow-empty", "-am", "pre-release")
+        os.chdir(repo)
+        code, out = self.run_main([*files, "--changelog", "CHANGELOG.md", *argv])
+        with open(files[0]) as f:
+            return code, out, f.read()
+
+    def test_prerelease(self):
+        code, _, content = self.bump("1.2.4-rc.4", "--prerelease")
+        self.assertIsNone(code)
+        self.assertIn('"1.2.4-rc.5"', content)
+
+    def test_prerelease_label(self):
+        code, _, content = self.bump("1.2.3", "--prerelease", "beta")
+        self.assertIsNone(code)
+        self.assertIn('"1.2.4-beta.1"', content)
+
+    def test_finalize_prerelease(self):
+        code, out, content = self.bump("1.2.4-rc.5", "--patch")
+        self.assertIsNone(code, out)
+        self.assertIn('"1.2.4"', content)
+        code, out, content = self.bump("1.2.4-rc.5", "--minor")
+        self.assertIsNone(code, out)
+        self.assertIn('"1.3.0"', content)
+
+    def test_build(self):
+        code, _, content = self.bump("1.2.4+build.7", "--build")
+        self.assertIsNone(code)
+        self.assertIn('"1.2.4+build.8"', content)
+
+    def test_zerover_major(self):
+        code, out, content = self.bump("0.2.3", "--major", "--scheme", "0ver")
+        self.assertEqual(code, 1)
+        self.assertIn("0ver", out)
+        self.assertIn('"0.2.3"', content)
+
+
+if __name__ == "__main__":
+    unittest.main()
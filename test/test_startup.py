@@ -0,0 +1,105 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import subprocess
+import unittest
+
+from helpers import make_repo
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# modules only the code paths that need them may import
+DEFERRED_MODULES = (
+    "yaml",
+    "subprocess",
+    "datetime",
+    "concurrent.futures",
+    "simplebumpversion.core.batch",
+    "simplebumpversion.core.git_tools",
+    "simplebumpversion.core.config_handler",
+)
+# cumulative import time of simplebumpversion.main, in microseconds.
+# Generous on purpose: it guards against eager imports creeping back,
+# not against a slow machine.
+IMPORT_BUDGET_US = 100_000
+# modules a dry-run bump of one file without a config does not need
+DRY_RUN_DEFERRED_MODULES = (
+    "yaml",
+    "asyncio",
+    "concurrent.futures",
+    "simplebumpversion.core.config_handler",
+    "simplebumpversion.core.plan",
+    "simplebumpversion.core.server",
+    "simplebumpversion.core.multi",
+    "simplebumpversion.core.check",
+)
+# total import time of a dry-run bump, in microseconds; generous like IMPORT_BUDGET_US
+DRY_RUN_BUDGET_US = 250_000
+DRY_RUN = "from simplebumpversion.main import main\nmain(['version_0.py', '--dry-run'])"
+
+
+def run_python(code, *options, cwd=ROOT):
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        cwd=cwd,
+        env=dict(os.environ, PYTHONPATH=ROOT),
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+
+
+def loaded_modules(code, cwd=ROOT):
+    code += "\nprint('\\n'.join(sys.modules))"
+    return set(run_python("import sys\n" + code, cwd=cwd).stdout.split())
+
+
+def import_time(stderr):
+    """Sum of the cumulative times of the top-level imports in -X importtime output"""
+    total = 0
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            # nested imports are indented below the one that triggered them
+            if not fields[2].startswith("  "):
+                total += int(fields[1])
+    return total
+
+
+class TestStartup(unittest.TestCase):
+    def test_import_defers_heavy_modules(self):
+        loaded = loaded_modules("import simplebumpversion.main")
+        self.assertEqual([m for m in DEFERRED_MODULES if m in loaded], [])
+
+    def test_help_defers_heavy_modules(self):
+        loaded = loaded_modules(
+            "from simplebumpversion.main import main\n"
+            "try:\n    main(['--help'])\nexcept SystemExit:\n    pass"
+        )
+        self.assertIn("argparse", loaded)
+        self.assertEqual([m for m in DEFERRED_MODULES if m in loaded], [])
+
+    def test_import_time_budget(self):
+        stderr = run_python("import simplebumpversion.main", "-X", "importtime").stderr
+        for line in stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            fields = [field.strip() for field in line.split("|")]
+            if fields[-1] == "simplebumpversion.main":
+                self.assertLess(int(fields[1]), IMPORT_BUDGET_US)
+                break
+        else:
+            self.fail("simplebumpversion.main missing from -X importtime output")
+
+    def test_dry_run_bump(self):
+        repo, _ = make_repo(self, 1)
+        loaded = loaded_modules(DRY_RUN, cwd=repo)
+        self.assertIn("simplebumpversion.core.batch", loaded)
+        self.assertEqual([m for m in DRY_RUN_DEFERRED_MODULES if m in loaded], [])
+        stderr = run_python(DRY_RUN, "-X", "importtime", cwd=repo).stderr
+        self.assertLess(import_time(stderr), DRY_RUN_BUDGET_US)
+
+
+if __name__ == "__main__":
+    unittest.main()
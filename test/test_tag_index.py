@@ -0,0 +1,112 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import unittest
+from unittest.mock import patch
+
+from simplebumpversion.core import git_tools, tag_index
+from simplebumpversion.core.git_session import GitSession
+from simplebumpversion.core.tag_index import (
+    TagIndex,
+    pack_version,
+    split_tag,
+    unpack_version,
+)
+from helpers import MainTestCase, git, make_repo
+
+
+class TestSplitTag(unittest.TestCase):
+    def test_split(self):
+        self.assertEqual(split_tag("1.2.3"), ("", (1, 2, 3)))
+        self.assertEqual(split_tag("v1.2.3"), ("", (1, 2, 3)))
+        self.assertEqual(split_tag("api-v1.2.3"), ("api", (1, 2, 3)))
+        self.assertEqual(split_tag("libs/core@10.0.1"), ("libs/core", (10, 0, 1)))
+        self.assertIsNone(split_tag("release-candidate"))
+        self.assertIsNone(split_tag("1.2.3-rc.1"))
+
+    def test_pack_sorts_like_versions(self):
+        versions = [(1, 10, 0), (1, 2, 30), (2, 0, 0), (0, 0, 1)]
+        packed = sorted(pack_version(v) for v in versions)
+        self.assertEqual([unpack_version(p) for p in packed], sorted(versions))
+        with self.assertRaises(ValueError):
+            pack_version((1 << 21, 0, 0))
+
+
+class TestTagIndex(MainTestCase):
+    def setUp(self):
+        super().setUp()
+        self.repo, _ = make_repo(self, 1)
+        # 1.2.3 is on the tagged commit; a higher version lives on another branch
+        git(self.repo, "tag", "v1.10.0")
+        git(self.repo, "tag", "api-0.9.0", "HEAD~1")
+        git(self.repo, "tag", "api-v0.10.0")
+        git(self.repo, "tag", "not-a-version")
+        git(self.repo, "checkout", "-q", "-b", "old", "HEAD~1")
+        git(self.repo, "commit", "-q", "--allow-empty", "-m", "backport")
+        git(self.repo, "tag", "1.2.4")
+        git(self.repo, "pack-refs", "--all")
+        git(self.repo, "tag", "-a", "api-1.0.0", "-m", "loose annotated", "HEAD~1")
+        self.session = GitSession(self.repo)
+        self.addCleanup(self.session.close)
+
+    def test_lookups(self):
+        index = TagIndex(self.session)
+        self.assertEqual(len(index), 6)
+        self.assertEqual(index.packages(), ["", "api"])
+        self.assertEqual(index.latest(), "v1.10.0")
+        self.assertEqual(index.latest("api"), "api-1.0.0")
+        self.assertEqual(index.latest_version("api"), (1, 0, 0))
+        self.assertEqual(index.versions(), [(1, 2, 3), (1, 2, 4), (1, 10, 0)])
+        self.assertTrue(index.is_tagged("1.10.0"))
+        self.assertTrue(index.is_tagged("v1.2.4"))
+        self.assertFalse(index.is_tagged("1.2.5"))
+        self.assertFalse(index.is_tagged("0.9.0"))
+        self.assertTrue(index.is_tagged("0.9.0", "api"))
+        self.assertIsNone(index.latest("web"))
+        # the nearest tag is not the highest one
+        self.assertEqual(self.session.describe(), "1.2.4")
+
+    def test_incremental_refresh(self):
+        index = TagIndex(self.session)
+        git(self.repo, "tag", "2.0.0")
+        git(self.repo, "tag", "-d", "v1.10.0")
+        with patch.object(tag_index, "split_tag", wraps=tag_index.split_tag) as split:
+            index.refresh()
+        split.assert_called_once_with("2.0.0")
+        self.assertEqual(index.latest(), "2.0.0")
+        self.assertFalse(index.is_tagged("1.10.0"))
+        self.assertEqual(len(index), 6)
+
+
+class TestAlreadyTagged(MainTestCase):
+    def test_bump_to_tagged_version_fails(self):
+        repo, files = make_repo(self, 1)
+        os.chdir(repo)
+        git(repo, "tag", "1.2.4", "HEAD~1")
+        self.assertEqual(git_tools.get_highest_git_tag(), "1.2.4")
+        code, out = self.run_main([*files])
+        self.assertEqual(code, 1)
+        self.assertIn("version 1.2.4 is already tagged", out)
+        with open(files[0]) as f:
+            self.assertEqual(f.read(), '__version__ = "1.2.3"\n')
+
+    def test_prerelease_tag(self):
+        repo, files = make_repo(self, 1)
+        os.chdir(repo)
+        git(repo, "tag", "v1.2.4-rc.1", "HEAD~1")
+        git(repo, "tag", "api@1.0.0-rc.1", "HEAD~1")
+        index = git_tools.get_tag_index()
+        self.assertTrue(index.is_tagged("1.2.4-rc.1"))
+        self.assertTrue(index.is_tagged("1.0.0-rc.1", "api"))
+        self.assertFalse(index.is_tagged("1.0.0-rc.1"))
+        code, out = self.run_main([*files, "--prerelease"])
+        self.assertEqual(code, 1)
+        self.assertIn("version 1.2.4-rc.1 is already tagged", out)
+        with open(files[0]) as f:
+            self.assertEqual(f.read(), '__version__ = "1.2.3"\n')
+        self.assertFalse(os.path.exists(os.path.join(repo, "CHANGELOG.md")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import unittest
+from unittest.mock import patch
+
+from simplebumpversion.core import batch
+from simplebumpversion.core.batch import plan_bumps, apply_bumps
+from simplebumpversion.core.version_index import VersionIndex
+from helpers import temp_dir
+
+
+class TestVersionIndex(unittest.TestCase):
+    def setUp(self):
+        self.dir = temp_dir(self)
+        self.index_dir = os.path.join(self.dir, "cache")
+        self.path = os.path.join(self.dir, "version.py")
+        with open(self.path, "w") as f:
+            f.write('# é\nname = "x"\n__version__ = "1.2.3"\nv = "1.2.3"\n')
+
+    def plan(self, index):
+        return plan_bumps([self.path], False, False, True, 1, index)
+
+    def test_hit_skips_scan(self):
+        index = VersionIndex(self.index_dir)
+        plan = self.plan(index)[0]
+        index.save()
+
+        index = VersionIndex(self.index_dir)
+        self.assertEqual(len(index), 1)
+        with patch.object(batch, "scan_file", side_effect=AssertionError):
+            hit = self.plan(index)[0]
+        self.assertEqual((hit.current_version, hit.new_version), ("1.2.3", "1.2.4"))
+        self.assertEqual(
+            (hit.kind, hit.span, hit.spans), (plan.kind, plan.span, plan.spans)
+        )
+
+    def test_bump_through_index_and_after(self):
+        index = VersionIndex(self.index_dir)
+        self.plan(index)
+        apply_bumps(self.plan(index), is_dry_run=False, index=index)
+        with patch.object(batch, "scan_file", side_effect=AssertionError):
+            plans = self.plan(index)
+            self.assertEqual(plans[0].current_version, "1.2.4")
+            apply_bumps(plans, is_dry_run=False, index=index)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(
+                f.read(), '# é\nname = "x"\n__version__ = "1.2.5"\nv = "1.2.3"\n'
+            )
+
+    def test_changed_file_is_rescanned(self):
+        index = VersionIndex(self.index_dir)
+        self.plan(index)
+        with open(self.path, "w") as f:
+            f.write('__version__ = "2.0.0"\n')
+        self.assertIsNone(index.lookup(self.path))
+        self.assertEqual(self.plan(index)[0].current_version, "2.0.0")
+
+    def test_prune_and_invalidate(self):
+        index = VersionIndex(self.index_dir)
+        self.plan(index)
+        index.save()
+        self.assertEqual(index.prune(), 0)
+        os.remove(self.path)
+        self.assertEqual(index.prune(), 1)
+        index.invalidate()
+        self.assertEqual(len(index), 0)
+        self.assertFalse(os.path.exists(index.path))
+
+
+if __name__ == "__main__":
+    unittest.main()